@@ -31,6 +31,7 @@ else:
 from src.speedometer import SpeedometerWidget
 from src.navbar import navWidget
 from src.web_embed.maps import MapsWidget
+from src.web_embed.app_scheme import register_app_scheme
 from src.web_embed.youtube import YouTubeWidget
 from src.web_embed.movies import MoviesWidget
 from src.music_menu import MusicMenu
@@ -349,6 +350,9 @@ class CarInterface(QMainWindow):
             super().keyPressEvent(event)
 
 if __name__ == "__main__":
+    # Map pages load their bundled assets over app://; Qt only accepts
+    # custom schemes registered before the application exists.
+    register_app_scheme()
     app = QApplication(sys.argv)
 
     skip_boot = "--skip-boot" in sys.argv
@@ -19,7 +19,11 @@ static double haversineMeters(const Point&a, const Point&b){
 static double metersToSeconds(double meters){ return meters / 11.11; }
 
 struct TripLegInfo {
+    int index{};            // 0-based pickup index
     string name;
+    Point p;
+    int load{};             // amount collected at this stop
+    int cumulativeLoad{};   // vehicle load after this stop
     double meters{};
     double seconds{};
 };
@@ -32,6 +36,10 @@ struct TripInfo {
     double backSeconds{};
 };
 
+// Stops of one trip in visiting order with the amount collected at each.
+struct TripPlan { vector<int> stops; vector<int> loads; };
+using TripSink = function<void(const TripPlan&)>;
+
 static string fmtMiles(double meters){
     double miles = meters / 1609.34; 
     ostringstream oss; oss.setf(std::ios::fixed); oss<<setprecision(1)<<miles<<" mi"; return oss.str();
@@ -57,6 +65,11 @@ static string jsonEscape(const string& s){
 
 struct InputData {
     Point depot; int capacity{}; bool optimize{true}; vector<Pickup> pickups;
+    bool malformed{false}; // set in --serve mode when a line fails to parse
+    bool stream{false};    // --serve mode: reply with one frame per trip
+    // Optional (n+1)x(n+1) travel seconds / meters (row 0 = depot), e.g. from
+    // a road network; haversine at ~40km/h is used when absent.
+    vector<vector<double>> seconds, meters;
 };
 
 // Input format (lines via stdin):
@@ -64,44 +77,53 @@ struct InputData {
 // capacity: N
 // optimize: 0|1
 // pickup: name|lat|lng|demand
-static bool parseInput(InputData& data){
-    ios::sync_with_stdio(false);
-    cin.tie(nullptr);
-    string line;
-    while (std::getline(cin, line)){
-        if(line.empty()) continue;
-        auto pos = line.find(":");
-        if(pos==string::npos) continue;
-        string key = line.substr(0,pos);
-        string val = line.substr(pos+1);
-        // trim spaces
-        auto ltrim=[&](string &s){ s.erase(s.begin(), find_if(s.begin(), s.end(), [](unsigned char ch){return !isspace(ch);}));};
-        auto rtrim=[&](string &s){ s.erase(find_if(s.rbegin(), s.rend(), [](unsigned char ch){return !isspace(ch);}).base(), s.end());};
-        ltrim(key); rtrim(key); ltrim(val); rtrim(val);
-        if(key=="depot"){
-            double lat=0,lng=0; char c;
-            replace(val.begin(), val.end(), '|', ',');
-            stringstream ss(val); ss>>lat>>c>>lng; data.depot={lat,lng};
-        } else if(key=="capacity"){
-            data.capacity = stoi(val);
-        } else if(key=="optimize"){
-            data.optimize = (val!="0");
-        } else if(key=="pickup"){
-            // name|lat|lng|demand  (name may contain spaces but not pipes)
-            string name; double lat=0,lng=0; int demand=0;
-            // split by '|'
-            vector<string> parts; parts.reserve(4);
-            size_t start=0, p=0; 
-            while((p=val.find('|', start))!=string::npos){ parts.emplace_back(val.substr(start, p-start)); start=p+1; }
-            parts.emplace_back(val.substr(start));
-            if(parts.size()>=4){
-                name=parts[0];
-                lat=stod(parts[1]); lng=stod(parts[2]); demand=stoi(parts[3]);
-                Pickup pk{ name, {lat,lng}, demand, demand };
-                data.pickups.push_back(std::move(pk));
-            }
+// stream: 0|1            (--serve mode only)
+// matrix: s0 s1 ... sn    (optional, one row per line, depot first)
+// meters: m0 m1 ... mn    (optional, same layout as matrix)
+static void parseLine(InputData& data, const string& line){
+    if(line.empty()) return;
+    auto pos = line.find(":");
+    if(pos==string::npos) return;
+    string key = line.substr(0,pos);
+    string val = line.substr(pos+1);
+    // trim spaces
+    auto ltrim=[&](string &s){ s.erase(s.begin(), find_if(s.begin(), s.end(), [](unsigned char ch){return !isspace(ch);}));};
+    auto rtrim=[&](string &s){ s.erase(find_if(s.rbegin(), s.rend(), [](unsigned char ch){return !isspace(ch);}).base(), s.end());};
+    ltrim(key); rtrim(key); ltrim(val); rtrim(val);
+    if(key=="depot"){
+        double lat=0,lng=0; char c;
+        replace(val.begin(), val.end(), '|', ',');
+        stringstream ss(val); ss>>lat>>c>>lng; data.depot={lat,lng};
+    } else if(key=="capacity"){
+        data.capacity = stoi(val);
+    } else if(key=="optimize"){
+        data.optimize = (val!="0");
+    } else if(key=="stream"){
+        data.stream = (val!="0");
+    } else if(key=="matrix" || key=="meters"){
+        vector<double> row; stringstream ss(val); double v;
+        while(ss>>v) row.push_back(v);
+        (key=="matrix"? data.seconds : data.meters).push_back(std::move(row));
+    } else if(key=="pickup"){
+        // name|lat|lng|demand  (name may contain spaces but not pipes)
+        string name; double lat=0,lng=0; int demand=0;
+        // split by '|'
+        vector<string> parts; parts.reserve(4);
+        size_t start=0, p=0; 
+        while((p=val.find('|', start))!=string::npos){ parts.emplace_back(val.substr(start, p-start)); start=p+1; }
+        parts.emplace_back(val.substr(start));
+        if(parts.size()>=4){
+            name=parts[0];
+            lat=stod(parts[1]); lng=stod(parts[2]); demand=stoi(parts[3]);
+            Pickup pk{ name, {lat,lng}, demand, demand };
+            data.pickups.push_back(std::move(pk));
         }
     }
+}
+
+static bool parseInput(InputData& data){
+    string line;
+    while (std::getline(cin, line)) parseLine(data, line);
     return true;
 }
 
@@ -120,15 +142,16 @@ static vector<vector<double>> buildTimeMatrix(const Point& depot, const vector<P
     return M;
 }
 
-static vector<vector<int>> solveVRPGreedy(const vector<vector<double>>& M, const vector<int>& demands, int capacity){
+// Trips are handed to `emit` as soon as each one is closed, so callers can
+// stream them out without holding the whole plan.
+static void solveVRPGreedy(const vector<vector<double>>& M, const vector<int>& demands, int capacity, const TripSink& emit){
     int n = (int)demands.size();
     vector<int> remaining = demands;
-    vector<vector<int>> trips;
     auto anyRemain=[&](){ for(int v: remaining) if(v>0) return true; return false; };
     while(anyRemain()){
         int capLeft = capacity;
         int cur = 0; // at depot
-        vector<int> trip;
+        TripPlan trip;
         while(capLeft>0 && anyRemain()){
             int best=-1; double bestT=numeric_limits<double>::infinity();
             for(int i=0;i<n;i++){
@@ -139,74 +162,185 @@ static vector<vector<int>> solveVRPGreedy(const vector<vector<double>>& M, const
             if(best==-1 || !isfinite(bestT)) break;
             int take = min(remaining[best], capLeft);
             remaining[best]-=take; capLeft-=take;
-            if(find(trip.begin(), trip.end(), best)==trip.end()) trip.push_back(best);
+            auto it = find(trip.stops.begin(), trip.stops.end(), best);
+            if(it==trip.stops.end()){ trip.stops.push_back(best); trip.loads.push_back(take); }
+            else trip.loads[it - trip.stops.begin()] += take;
             cur = best+1;
         }
-        if(!trip.empty()) trips.push_back(std::move(trip)); else break;
+        if(trip.stops.empty()) break;
+        emit(trip);
     }
-    return trips;
 }
 
-static vector<vector<int>> splitTripsByCapacityInOrder(const vector<int>& demands, int capacity){
+static void splitTripsByCapacityInOrder(const vector<int>& demands, int capacity, const TripSink& emit){
     int n=(int)demands.size();
-    vector<int> rem=demands; vector<vector<int>> trips; vector<int> trip; int capLeft=capacity;
+    if(capacity<=0) return;
+    vector<int> rem=demands; TripPlan trip; int capLeft=capacity;
     for(int i=0;i<n;i++){
         while(rem[i]>0){
-            if(capLeft==0){ if(!trip.empty()) trips.push_back(trip); trip.clear(); capLeft=capacity; }
+            if(capLeft==0){ if(!trip.stops.empty()) emit(trip); trip=TripPlan(); capLeft=capacity; }
             int take=min(rem[i], capLeft); rem[i]-=take; capLeft-=take;
-            if(find(trip.begin(), trip.end(), i)==trip.end()) trip.push_back(i);
+            if(!trip.stops.empty() && trip.stops.back()==i) trip.loads.back()+=take;
+            else { trip.stops.push_back(i); trip.loads.push_back(take); }
         }
     }
-    if(!trip.empty()) trips.push_back(trip);
-    return trips;
-}
-
-static TripInfo computeTripInfo(const Point& depot, const vector<Pickup>& pks, const vector<int>& idxs){
-    TripInfo info; Point cur = depot;
-    for(size_t k=0;k<idxs.size();k++){
-        const Pickup& pk = pks[idxs[k]];
-        double m = haversineMeters(cur, pk.p);
-        double s = metersToSeconds(m);
-        info.legs.push_back({pk.name, m, s});
-        info.totalMeters += m; info.totalSeconds += s; cur = pk.p;
+    if(!trip.stops.empty()) emit(trip);
+}
+
+static void checkMatrix(const vector<vector<double>>& M, size_t n, const char* key){
+    if(M.empty()) return;
+    bool ok = M.size()==n+1;
+    for(const auto& row: M) ok = ok && row.size()==n+1;
+    if(!ok) throw runtime_error(string(key) + " must have " + to_string(n+1) + " rows of " + to_string(n+1) + " values");
+}
+
+static void validateInput(const InputData& in){
+    checkMatrix(in.seconds, in.pickups.size(), "matrix");
+    checkMatrix(in.meters, in.pickups.size(), "meters");
+}
+
+// Leg metrics between matrix indices (0 = depot, i+1 = pickup i): supplied
+// rows when present, haversine otherwise.
+static pair<double,double> legMetrics(const InputData& in, int a, int b){
+    Point pa = a? in.pickups[a-1].p : in.depot, pb = b? in.pickups[b-1].p : in.depot;
+    double straight = haversineMeters(pa, pb);
+    double m = in.meters.empty()? straight : in.meters[a][b];
+    double s = in.seconds.empty()? metersToSeconds(straight) : in.seconds[a][b];
+    return {m, s};
+}
+
+static TripInfo computeTripInfo(const InputData& in, const TripPlan& plan){
+    TripInfo info; int cur = 0; int carried = 0;
+    for(size_t k=0;k<plan.stops.size();k++){
+        const Pickup& pk = in.pickups[plan.stops[k]];
+        auto [m, s] = legMetrics(in, cur, plan.stops[k]+1);
+        carried += plan.loads[k];
+        info.legs.push_back({plan.stops[k], pk.name, pk.p, plan.loads[k], carried, m, s});
+        info.totalMeters += m; info.totalSeconds += s; cur = plan.stops[k]+1;
     }
-    double backM = haversineMeters(cur, depot), backS = metersToSeconds(backM);
+    auto [backM, backS] = legMetrics(in, cur, 0);
     info.backMeters = backM; info.backSeconds = backS;
     info.totalMeters += backM; info.totalSeconds += backS;
     return info;
 }
 
-int main(){
-    InputData in; if(!parseInput(in)) return 1;
+static string fmtCoord(double v){
+    ostringstream oss; oss.setf(std::ios::fixed); oss<<setprecision(6)<<v; return oss.str();
+}
+
+// One trip as a single-line JSON object (also the NDJSON record format).
+static void writeTrip(ostream& out, const InputData& in, const TripPlan& plan, size_t t){
+    auto info = computeTripInfo(in, plan);
+    out << "{\"index\":" << t << ",\"items\":[";
+    for(size_t k=0;k<info.legs.size();k++){
+        const auto& L = info.legs[k];
+        out << (k? ",":"")
+            << "{\"index\":" << L.index
+            << ",\"name\":\"" << jsonEscape(L.name) << "\""
+            << ",\"lat\":" << fmtCoord(L.p.lat) << ",\"lng\":" << fmtCoord(L.p.lng)
+            << ",\"load\":" << L.load << ",\"cumulativeLoad\":" << L.cumulativeLoad
+            << ",\"meters\":" << (long long) llround(L.meters)
+            << ",\"seconds\":" << (long long) llround(L.seconds)
+            << ",\"distanceText\":\"" << jsonEscape(fmtMiles(L.meters)) << "\""
+            << ",\"durationText\":\"" << jsonEscape(fmtMinutes(L.seconds)) << "\"}";
+    }
+    int total = info.legs.empty() ? 0 : info.legs.back().cumulativeLoad;
+    out << "],\"load\":" << total
+        << ",\"totalMeters\":" << (long long) llround(info.totalMeters)
+        << ",\"totalSeconds\":" << (long long) llround(info.totalSeconds)
+        << ",\"returnMeters\":" << (long long) llround(info.backMeters)
+        << ",\"returnSeconds\":" << (long long) llround(info.backSeconds)
+        << ",\"returnDistanceText\":\"" << jsonEscape(fmtMiles(info.backMeters)) << "\""
+        << ",\"returnDurationText\":\"" << jsonEscape(fmtMinutes(info.backSeconds)) << "\"}";
+}
+
+static void solveTrips(const InputData& in, const TripSink& emit){
     // Prepare demands
     vector<int> demands; demands.reserve(in.pickups.size());
     for(const auto& p: in.pickups) demands.push_back(max(0, p.demand));
-    // Build time matrix (Haversine/time approximation)
-    auto M = buildTimeMatrix(in.depot, in.pickups);
-    // Solve trips
-    vector<vector<int>> trips = in.optimize ? solveVRPGreedy(M, demands, in.capacity)
-                                            : splitTripsByCapacityInOrder(demands, in.capacity);
-    // Output JSON
-    cout << "{\n  \"trips\": [\n";
-    for(size_t t=0;t<trips.size();t++){
-        auto info = computeTripInfo(in.depot, in.pickups, trips[t]);
-        cout << "    {\n";
-        cout << "      \"items\": [\n";
-        for(size_t k=0;k<info.legs.size();k++){
-            const auto& L = info.legs[k];
-            cout << "        {\"name\": \"" << jsonEscape(L.name) << "\", "
-                 << "\"distanceText\": \"" << jsonEscape(fmtMiles(L.meters)) << "\", "
-                 << "\"durationText\": \"" << jsonEscape(fmtMinutes(L.seconds)) << "\"}"
-                 << (k+1<info.legs.size()? ",\n" : "\n");
+    validateInput(in);
+    if(in.optimize){
+        if(!in.seconds.empty()){ solveVRPGreedy(in.seconds, demands, in.capacity, emit); return; }
+        // Build time matrix (Haversine/time approximation)
+        auto M = buildTimeMatrix(in.depot, in.pickups);
+        solveVRPGreedy(M, demands, in.capacity, emit);
+    } else {
+        splitTripsByCapacityInOrder(demands, in.capacity, emit);
+    }
+}
+
+static void writeResult(ostream& out, const InputData& in){
+    out << "{\n  \"trips\": [";
+    size_t t = 0;
+    solveTrips(in, [&](const TripPlan& plan){
+        out << (t? ",\n    " : "\n    ");
+        writeTrip(out, in, plan, t++);
+    });
+    out << (t? "\n  ]\n}\n" : "]\n}\n");
+}
+
+// --ndjson: one trip object per line, flushed as soon as the trip is closed.
+static void writeNdjson(ostream& out, const InputData& in){
+    size_t t = 0;
+    solveTrips(in, [&](const TripPlan& plan){
+        writeTrip(out, in, plan, t++);
+        out << "\n" << flush;
+    });
+}
+
+// Resident mode (--serve): requests are framed on stdin as the usual
+// key: value lines followed by a line "end". Each response is a header
+// line "ok <bytes>" or "err <bytes>" followed by exactly that many bytes.
+// A line "ping" is answered with "pong" for health checks.
+// With "stream: 1" in the request, each trip is first sent as its own
+// "trip <bytes>" frame (one JSON object) and the final "ok" frame is empty.
+static int serve(){
+    InputData in; string line;
+    while (std::getline(cin, line)){
+        if(!line.empty() && line.back()=='\r') line.pop_back();
+        if(line=="ping"){ cout << "pong\n" << flush; continue; }
+        if(line!="end"){
+            try { parseLine(in, line); } catch(const exception&){ in.malformed = true; }
+            continue;
+        }
+        string status = "ok", body;
+        if(in.malformed){
+            status = "err"; body = "malformed request";
+        } else if(in.stream){
+            try {
+                size_t t = 0;
+                solveTrips(in, [&](const TripPlan& plan){
+                    ostringstream oss; writeTrip(oss, in, plan, t++);
+                    string trip = oss.str();
+                    cout << "trip " << trip.size() << "\n" << trip << flush;
+                });
+            } catch(const exception& e){ status = "err"; body = e.what(); }
+        } else {
+            try { ostringstream oss; writeResult(oss, in); body = oss.str(); }
+            catch(const exception& e){ status = "err"; body = e.what(); }
         }
-        cout << "      ],\n";
-        cout << "      \"totalMeters\": " << (long long) llround(info.totalMeters) << ",\n";
-        cout << "      \"totalSeconds\": " << (long long) llround(info.totalSeconds) << ",\n";
-        cout << "      \"returnDistanceText\": \"" << jsonEscape(fmtMiles(info.backMeters)) << "\",\n";
-        cout << "      \"returnDurationText\": \"" << jsonEscape(fmtMinutes(info.backSeconds)) << "\"\n";
-        cout << "    }" << (t+1<trips.size()? ",\n" : "\n");
+        cout << status << " " << body.size() << "\n" << body << flush;
+        in = InputData();
     }
-    cout << "  ]\n}\n";
     return 0;
 }
 
+int main(int argc, char** argv){
+    ios::sync_with_stdio(false);
+    cin.tie(nullptr);
+    bool ndjson = false;
+    for(int i=1;i<argc;i++){
+        string arg = argv[i];
+        if(arg=="--serve") return serve();
+        if(arg=="--ndjson") ndjson = true;
+    }
+    InputData in; if(!parseInput(in)) return 1;
+    try {
+        validateInput(in);
+        if(ndjson) writeNdjson(cout, in); else writeResult(cout, in);
+    } catch(const exception& e){
+        cerr << e.what() << "\n";
+        return 1;
+    }
+    return 0;
+}
@@ -0,0 +1,113 @@
+"""
+JSON-file LRU shared by the on-disk caches (`vrp_cache`, `places_cache`).
+
+Reads and writes stay in memory. `flush()` writes the whole mapping to a
+temporary file and renames it over the old one, so a reader never sees a
+half-written cache and a crash leaves the previous file in place.
+"""
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+def default_cache_dir() -> str:
+    """Directory for on-disk caches (`SPCTA_CACHE_DIR` or ~/.cache/spcta)."""
+    return os.environ.get("SPCTA_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "spcta"
+    )
+
+
+class PersistentLRU:
+    """A size-bounded LRU mapping of string keys to JSON values, saved to disk.
+
+    Entries are kept in recency order in memory; `flush()` rewrites the file
+    atomically (temp file + rename) when something changed. The file is a
+    JSON list of [key, value] pairs, least recently used first.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50000) -> None:
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Held from snapshot to rename, so flushes land on disk in order.
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(items, list):
+            return
+        for item in items[-self.max_entries:]:
+            if isinstance(item, list) and len(item) == 2:
+                self._data[str(item[0])] = item[1]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def get_many(self, keys: Iterable[str]) -> List[Any]:
+        with self._lock:
+            out = []
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    out.append(self._data[key])
+                else:
+                    out.append(None)
+            return out
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        with self._lock:
+            for key, value in items:
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                items = [[k, v] for k, v in self._data.items()]
+                self._dirty = False
+            try:
+                self._write(items)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def _write(self, items: List[List[Any]]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".lru-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(items, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
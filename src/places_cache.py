@@ -0,0 +1,58 @@
+"""
+Persistent cache of Places search results and place details for map.js.
+
+The page picks the keys: "q:" / "ac:" plus the normalised query for text
+searches and autocomplete prefixes, "d:" plus the placeId for details.
+Values are the page's plain JSON records, stamped with the time they were
+stored. Lookups pass a maximum age, so each kind keeps its own TTL; older
+entries count as misses and age out of the LRU.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from src.persistent_lru import PersistentLRU, default_cache_dir
+
+
+class PlacesCache:
+    def __init__(self, path: Optional[str] = None, max_entries: int = 2000) -> None:
+        self._store = PersistentLRU(path or os.path.join(default_cache_dir(), "places.json"), max_entries)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def lookup(
+        self, keys: Sequence[str], max_age: float, now: Optional[float] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """{key: {t, v}} for the keys stored less than `max_age` seconds ago."""
+        now = time.time() if now is None else now
+        out = {}
+        for key, entry in zip(keys, self._store.get_many(keys)):
+            if isinstance(entry, dict) and now - float(entry.get("t", 0)) <= max_age:
+                out[key] = entry
+        return out
+
+    def store(
+        self, entries: Iterable[Tuple[str, Any]], flush: bool = True, now: Optional[float] = None
+    ) -> None:
+        """Cache (key, value) pairs stamped with `now`."""
+        now = time.time() if now is None else now
+        self._store.put_many((str(k), {"t": now, "v": v}) for k, v in entries if v is not None)
+        if flush:
+            self._store.flush()
+
+    def flush(self) -> None:
+        self._store.flush()
+
+
+_default_cache: Optional[PlacesCache] = None
+_default_lock = threading.Lock()
+
+
+def default_places_cache() -> PlacesCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PlacesCache()
+        return _default_cache
@@ -0,0 +1,63 @@
+"""
+Google encoded polyline format (the same algorithm as
+`google.maps.geometry.encoding`), used to ship route geometry to the map
+page as compact strings instead of JS coordinate literals.
+"""
+import math
+from typing import Dict, Iterable, List, Sequence, Union
+
+Point = Union[Dict[str, float], Sequence[float]]
+
+
+def _latlng(p: Point):
+    if isinstance(p, dict):
+        return float(p["lat"]), float(p["lng"])
+    return float(p[0]), float(p[1])
+
+
+def _encode_value(v: int, out: List[str]) -> None:
+    v = ~(v << 1) if v < 0 else (v << 1)
+    while v >= 0x20:
+        out.append(chr((0x20 | (v & 0x1F)) + 63))
+        v >>= 5
+    out.append(chr(v + 63))
+
+
+def encode_polyline(points: Iterable[Point], precision: int = 5) -> str:
+    """Encode {lat,lng} dicts or (lat, lng) pairs; ~5 chars per point at 1e-5 degrees."""
+    factor = 10 ** precision
+    out: List[str] = []
+    prev_lat = prev_lng = 0
+    for p in points:
+        lat, lng = _latlng(p)
+        # Math.round semantics (halves go up), as in the JS encoder; Python's
+        # round() sends halves to even and would disagree on exact .5 values.
+        ilat, ilng = math.floor(lat * factor + 0.5), math.floor(lng * factor + 0.5)
+        _encode_value(ilat - prev_lat, out)
+        _encode_value(ilng - prev_lng, out)
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(out)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[List[float]]:
+    """Inverse of `encode_polyline`; returns [lat, lng] pairs."""
+    factor = float(10 ** precision)
+    coords: List[List[float]] = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coords.append([lat / factor, lng / factor])
+    return coords
@@ -0,0 +1,426 @@
+"""
+Offline road-network travel times with contraction hierarchies.
+
+    net = RoadNetwork.from_osm("city.osm.pbf")     # or .osm XML
+    net.save("city.ch.npz")                        # preprocessing is the slow part
+    net = RoadNetwork.load("city.ch.npz")
+    seconds, meters = net.matrix([depot] + pickups)
+
+Ways tagged as drivable `highway` become directed edges weighted by travel
+time (maxspeed, or a default per highway class). Contraction hierarchies
+are built once. Many-to-many queries then use the bucket method: one
+upward search per target fills buckets, and one upward search per source
+scans them. Points are snapped to the nearest graph node, and the snap
+distance is added at `METERS_PER_SECOND`.
+
+Reading `.osm.pbf` needs the optional `osmium` package. Plain `.osm` XML is
+read with the standard library.
+"""
+import heapq
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.vrp_numpy import METERS_PER_SECOND, HaversineLegs, haversine_matrix
+from src.vrp_spatial import SpatialIndex
+
+_log = logging.getLogger(__name__)
+
+# Default speeds (km/h) when a way has no usable maxspeed.
+HIGHWAY_SPEEDS = {
+    "motorway": 100, "motorway_link": 60,
+    "trunk": 80, "trunk_link": 50,
+    "primary": 65, "primary_link": 45,
+    "secondary": 55, "secondary_link": 40,
+    "tertiary": 45, "tertiary_link": 35,
+    "unclassified": 35, "residential": 30, "road": 30,
+    "living_street": 10, "service": 15,
+}
+_FORMAT_VERSION = 1
+_WITNESS_SETTLE_LIMIT = 400
+
+Edge = Tuple[int, int, float, float]  # (u, v, seconds, meters)
+
+
+def _maxspeed_kmh(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    v = value.strip().lower()
+    factor = 1.609344 if v.endswith("mph") else 1.0
+    try:
+        return float(v.replace("mph", "").replace("km/h", "").strip()) * factor
+    except ValueError:
+        return None
+
+
+def _way_edges(refs: Sequence[int], tags: Dict[str, str]) -> Optional[Tuple[float, int]]:
+    """(speed km/h, direction) for a drivable way; direction 1 forward, -1 reverse, 0 both."""
+    highway = tags.get("highway")
+    if highway not in HIGHWAY_SPEEDS or len(refs) < 2:
+        return None
+    if tags.get("access") in ("no", "private") or tags.get("motor_vehicle") == "no":
+        return None
+    speed = _maxspeed_kmh(tags.get("maxspeed")) or HIGHWAY_SPEEDS[highway]
+    oneway = tags.get("oneway", "").lower()
+    if oneway in ("-1", "reverse"):
+        direction = -1
+    elif oneway in ("yes", "true", "1") or tags.get("junction") == "roundabout" or highway == "motorway":
+        direction = 1
+    else:
+        direction = 0
+    return speed, direction
+
+
+def _edges_from_ways(
+    ways: Iterable[Tuple[Sequence[int], Dict[str, str]]], coords: Dict[int, Tuple[float, float]]
+):
+    ids: Dict[int, int] = {}
+    lats: List[float] = []
+    lngs: List[float] = []
+    edges: List[Edge] = []
+
+    def node(ref: int) -> int:
+        k = ids.get(ref)
+        if k is None:
+            k = ids[ref] = len(lats)
+            lats.append(coords[ref][0])
+            lngs.append(coords[ref][1])
+        return k
+
+    for refs, tags in ways:
+        spec = _way_edges(refs, tags)
+        if spec is None:
+            continue
+        speed, direction = spec
+        mps = speed / 3.6
+        refs = [r for r in refs if r in coords]
+        for a, b in zip(refs, refs[1:]):
+            if a == b:
+                continue
+            u, v = node(a), node(b)
+            m = float(haversine_matrix([lats[u], lats[v]], [lngs[u], lngs[v]])[0, 1])
+            s = m / mps
+            if direction >= 0:
+                edges.append((u, v, s, m))
+            if direction <= 0:
+                edges.append((v, u, s, m))
+    return lats, lngs, edges
+
+
+def _read_osm_xml(path: str):
+    import xml.etree.ElementTree as ET
+
+    coords: Dict[int, Tuple[float, float]] = {}
+    ways = []
+    for _, el in ET.iterparse(path, events=("end",)):
+        if el.tag == "node":
+            coords[int(el.get("id"))] = (float(el.get("lat")), float(el.get("lon")))
+            el.clear()
+        elif el.tag == "way":
+            tags = {t.get("k"): t.get("v") for t in el.iter("tag")}
+            if tags.get("highway") in HIGHWAY_SPEEDS:
+                ways.append(([int(nd.get("ref")) for nd in el.iter("nd")], tags))
+            el.clear()
+    return _edges_from_ways(ways, coords)
+
+
+def _read_osm_pbf(path: str):
+    try:
+        import osmium
+    except ImportError:
+        raise RuntimeError("Reading .osm.pbf needs the 'osmium' package (pip install osmium)")
+
+    coords: Dict[int, Tuple[float, float]] = {}
+    ways = []
+
+    class _Handler(osmium.SimpleHandler):
+        def way(self, w):
+            tags = {t.k: t.v for t in w.tags}
+            if tags.get("highway") not in HIGHWAY_SPEEDS:
+                return
+            refs = []
+            for n in w.nodes:
+                if n.location.valid():
+                    coords[n.ref] = (n.location.lat, n.location.lon)
+                    refs.append(n.ref)
+            ways.append((refs, tags))
+
+    _Handler().apply_file(path, locations=True)
+    return _edges_from_ways(ways, coords)
+
+
+def _csr(lists: List[List[Tuple[int, float, float]]]):
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(x) for x in lists])
+    flat = [e for x in lists for e in x]
+    idx = np.array([e[0] for e in flat], dtype=np.int64)
+    cost = np.array([e[1] for e in flat], dtype=np.float64)
+    meters = np.array([e[2] for e in flat], dtype=np.float64)
+    return indptr, idx, cost, meters
+
+
+def _uncsr(indptr, idx, cost, meters) -> List[List[Tuple[int, float, float]]]:
+    indptr = indptr.tolist()
+    triples = list(zip(idx.tolist(), cost.tolist(), meters.tolist()))
+    return [triples[indptr[i]:indptr[i + 1]] for i in range(len(indptr) - 1)]
+
+
+class _Contractor:
+    """Builds the upward graphs of a contraction hierarchy."""
+
+    def __init__(self, n: int, edges: Iterable[Edge]) -> None:
+        self.out: List[Dict[int, Tuple[float, float]]] = [dict() for _ in range(n)]
+        self.inc: List[Dict[int, Tuple[float, float]]] = [dict() for _ in range(n)]
+        for u, v, s, m in edges:
+            if u == v:
+                continue
+            old = self.out[u].get(v)
+            if old is None or s < old[0]:
+                self.out[u][v] = (s, m)
+                self.inc[v][u] = (s, m)
+        self.deleted_neighbors = [0] * n
+
+    def _witness(self, src: int, skip: int, limit: float, targets) -> Dict[int, float]:
+        dist = {src: 0.0}
+        heap = [(0.0, src)]
+        settled = 0
+        remaining = set(targets)
+        out = self.out
+        while heap and remaining and settled < _WITNESS_SETTLE_LIMIT:
+            d, x = heapq.heappop(heap)
+            if d > dist.get(x, math.inf):
+                continue
+            if d > limit:
+                break
+            settled += 1
+            remaining.discard(x)
+            for y, (c, _) in out[x].items():
+                if y == skip:
+                    continue
+                nd = d + c
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    heapq.heappush(heap, (nd, y))
+        return dist
+
+    def shortcuts(self, v: int) -> List[Edge]:
+        outs = list(self.out[v].items())
+        found: List[Edge] = []
+        for u, (cu, mu) in self.inc[v].items():
+            targets = {x: cu + cx for x, (cx, _) in outs if x != u}
+            if not targets:
+                continue
+            dist = self._witness(u, v, max(targets.values()), targets)
+            for x, (cx, mx) in outs:
+                if x != u and dist.get(x, math.inf) > cu + cx:
+                    found.append((u, x, cu + cx, mu + mx))
+        return found
+
+    def priority(self, v: int, shortcuts: List[Edge]) -> float:
+        return len(shortcuts) - len(self.out[v]) - len(self.inc[v]) + self.deleted_neighbors[v]
+
+    def contract(self, v: int, shortcuts: List[Edge]):
+        up_out = [(x, c, m) for x, (c, m) in self.out[v].items()]
+        up_in = [(u, c, m) for u, (c, m) in self.inc[v].items()]
+        for u in self.inc[v]:
+            del self.out[u][v]
+            self.deleted_neighbors[u] += 1
+        for x in self.out[v]:
+            del self.inc[x][v]
+            self.deleted_neighbors[x] += 1
+        self.out[v] = {}
+        self.inc[v] = {}
+        for u, x, c, m in shortcuts:
+            old = self.out[u].get(x)
+            if old is None or c < old[0]:
+                self.out[u][x] = (c, m)
+                self.inc[x][u] = (c, m)
+        return up_out, up_in
+
+    def run(self):
+        n = len(self.out)
+        heap = [(self.priority(v, self.shortcuts(v)), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = [0] * n
+        up_out: List[list] = [[] for _ in range(n)]
+        up_in: List[list] = [[] for _ in range(n)]
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            sc = self.shortcuts(v)
+            p = self.priority(v, sc)
+            if heap and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+            up_out[v], up_in[v] = self.contract(v, sc)
+            rank[v] = order
+            order += 1
+        return rank, up_out, up_in
+
+
+class RoadNetwork:
+    """A contracted road graph answering many-to-many travel-time queries."""
+
+    def __init__(self, lats, lngs, rank, up_out, up_in) -> None:
+        self.lats = np.asarray(lats, dtype=float)
+        self.lngs = np.asarray(lngs, dtype=float)
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.up_out = up_out
+        self.up_in = up_in
+        self._index: Optional[SpatialIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    @classmethod
+    def from_edges(cls, lats: Sequence[float], lngs: Sequence[float], edges: Iterable[Edge]) -> "RoadNetwork":
+        """Contract a graph given as node coordinates and (u, v, seconds, meters) edges."""
+        rank, up_out, up_in = _Contractor(len(lats), edges).run()
+        return cls(lats, lngs, rank, up_out, up_in)
+
+    @classmethod
+    def from_osm(cls, path: str) -> "RoadNetwork":
+        """Read an `.osm` / `.osm.pbf` extract and build the hierarchy."""
+        reader = _read_osm_pbf if path.endswith(".pbf") else _read_osm_xml
+        lats, lngs, edges = reader(path)
+        if not lats:
+            raise RuntimeError(f"No drivable roads found in {path}")
+        return cls.from_edges(lats, lngs, edges)
+
+    def save(self, path: str) -> None:
+        oi, ox, oc, om = _csr(self.up_out)
+        ii, ix, ic, im = _csr(self.up_in)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp, version=_FORMAT_VERSION, lats=self.lats, lngs=self.lngs, rank=self.rank,
+            out_indptr=oi, out_idx=ox, out_cost=oc, out_meters=om,
+            in_indptr=ii, in_idx=ix, in_cost=ic, in_meters=im,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RoadNetwork":
+        with np.load(path) as z:
+            if int(z["version"]) != _FORMAT_VERSION:
+                raise RuntimeError(f"Unsupported road graph format in {path}")
+            up_out = _uncsr(z["out_indptr"], z["out_idx"], z["out_cost"], z["out_meters"])
+            up_in = _uncsr(z["in_indptr"], z["in_idx"], z["in_cost"], z["in_meters"])
+            return cls(z["lats"], z["lngs"], z["rank"], up_out, up_in)
+
+    def snap(self, points: Sequence[Dict[str, float]]) -> Tuple[List[int], List[float]]:
+        """Nearest graph node of each point and the straight-line meters to it."""
+        if self._index is None:
+            self._index = SpatialIndex(self.lats, self.lngs)
+        nodes, gaps = [], []
+        for p in points:
+            k = self._index.nearest(float(p["lat"]), float(p["lng"]))
+            nodes.append(k)
+            legs = HaversineLegs(p, [{"lat": self.lats[k], "lng": self.lngs[k]}])
+            gaps.append(legs[0, 1])
+        return nodes, gaps
+
+    @staticmethod
+    def _upward(start: int, graph) -> Dict[int, Tuple[float, float]]:
+        best = {start: (0.0, 0.0)}
+        settled: Dict[int, Tuple[float, float]] = {}
+        heap = [(0.0, 0.0, start)]
+        while heap:
+            d, m, x = heapq.heappop(heap)
+            if x in settled:
+                continue
+            settled[x] = (d, m)
+            for y, c, em in graph[x]:
+                nd = d + c
+                if y not in settled and nd < best.get(y, (math.inf,))[0]:
+                    best[y] = (nd, m + em)
+                    heapq.heappush(heap, (nd, m + em, y))
+        return settled
+
+    def node_matrix(self, sources: Sequence[int], targets: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Shortest (seconds, meters) between graph nodes; inf where unreachable."""
+        buckets: Dict[int, List[Tuple[int, float, float]]] = {}
+        for j, t in enumerate(targets):
+            for x, (d, m) in self._upward(t, self.up_in).items():
+                buckets.setdefault(x, []).append((j, d, m))
+        seconds = np.full((len(sources), len(targets)), np.inf)
+        meters = np.full((len(sources), len(targets)), np.inf)
+        for i, s in enumerate(sources):
+            row_s, row_m = seconds[i], meters[i]
+            for x, (d, m) in self._upward(s, self.up_out).items():
+                for j, dt, mt in buckets.get(x, ()):
+                    if d + dt < row_s[j]:
+                        row_s[j] = d + dt
+                        row_m[j] = m + mt
+        return seconds, meters
+
+    def matrix(self, points: Sequence[Dict[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        n x n (seconds, meters) between `points` over the road graph.
+
+        Snap distances are added at `METERS_PER_SECOND`. Pairs with no road
+        connection fall back to straight-line values.
+        """
+        nodes, gaps = self.snap(points)
+        uniq = sorted(set(nodes))
+        pos = {k: i for i, k in enumerate(uniq)}
+        sec, met = self.node_matrix(uniq, uniq)
+        at = [pos[k] for k in nodes]
+        seconds = sec[np.ix_(at, at)]
+        meters = met[np.ix_(at, at)]
+        gap = np.asarray(gaps)
+        meters = meters + gap[:, None] + gap[None, :]
+        seconds = seconds + (gap[:, None] + gap[None, :]) / METERS_PER_SECOND
+        straight = haversine_matrix([p["lat"] for p in points], [p["lng"] for p in points])
+        same = np.asarray(nodes)[:, None] == np.asarray(nodes)[None, :]
+        missing = ~np.isfinite(seconds) | same
+        meters[missing] = straight[missing]
+        seconds[missing] = straight[missing] / METERS_PER_SECOND
+        np.fill_diagonal(seconds, 0.0)
+        np.fill_diagonal(meters, 0.0)
+        return seconds, meters
+
+
+def road_matrices(
+    depot: Dict[str, float], pickups: List[Dict[str, Any]], network: Optional[RoadNetwork] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(seconds, meters) with the depot at index 0, ready for `solve_vrp(matrix=, meters=)`."""
+    network = network or default_road_network()
+    if network is None:
+        raise RuntimeError("No road graph configured. Set SPCTA_ROAD_GRAPH to an .osm/.osm.pbf/.npz file.")
+    return network.matrix([depot] + list(pickups))
+
+
+_default_network: Optional[RoadNetwork] = None
+_default_lock = threading.Lock()
+
+
+def default_road_network() -> Optional[RoadNetwork]:
+    """
+    Network from `SPCTA_ROAD_GRAPH`, or None when unset. OSM extracts are
+    contracted on first use and cached next to the other caches.
+    """
+    global _default_network
+    path = os.environ.get("SPCTA_ROAD_GRAPH")
+    if not path:
+        return None
+    with _default_lock:
+        if _default_network is None:
+            if path.endswith(".npz"):
+                _default_network = RoadNetwork.load(path)
+            else:
+                from src.persistent_lru import default_cache_dir
+
+                stamp = int(os.path.getmtime(path))
+                cached = os.path.join(default_cache_dir(), f"{os.path.basename(path)}.{stamp}.ch.npz")
+                if os.path.exists(cached):
+                    _default_network = RoadNetwork.load(cached)
+                else:
+                    _log.info("Building contraction hierarchy for %s (one-off)", path)
+                    _default_network = RoadNetwork.from_osm(path)
+                    os.makedirs(os.path.dirname(cached), exist_ok=True)
+                    _default_network.save(cached)
+        return _default_network
@@ -0,0 +1,127 @@
+"""
+Non-blocking wrappers around `vrp_cpp.solve_vrp`.
+
+Solves run on a small shared thread pool. `solve_vrp_async` returns a
+`SolveHandle` that can be cancelled, waited on, or awaited from asyncio:
+
+    handle = solve_vrp_async(depot, pickups, 100, improve=True)
+    result = handle.result()            # blocking wait, or
+    result = await handle               # inside a coroutine
+
+`LatestSolveRunner` keeps only the newest request alive: submitting a new
+solve cancels the previous one. For Qt signal delivery see `vrp_qt`.
+"""
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+
+from src.vrp_cpp import solve_vrp
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vrp-solve")
+        return _executor
+
+
+class SolveHandle:
+    """A running or queued solve.
+
+    Cancellation is cooperative: a queued solve never starts, and a running
+    local search stops at its next check. A cancelled handle's future raises
+    `concurrent.futures.CancelledError`.
+    """
+
+    def __init__(self, future: Future, cancel_event: threading.Event) -> None:
+        self.future = future
+        self._cancel_event = cancel_event
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        self.future.cancel()
+
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return self.future.result(timeout)
+
+    def add_done_callback(self, fn: Callable[["SolveHandle"], None]) -> None:
+        self.future.add_done_callback(lambda _f: fn(self))
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+
+def _run(cancel_event: threading.Event, args, kwargs) -> Dict[str, Any]:
+    if cancel_event.is_set():
+        raise CancelledError()
+    result = solve_vrp(*args, should_stop=cancel_event.is_set, **kwargs)
+    if cancel_event.is_set():
+        raise CancelledError()
+    return result
+
+
+def solve_vrp_async(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    executor: Optional[ThreadPoolExecutor] = None,
+    **kwargs,
+) -> SolveHandle:
+    """Start `solve_vrp(depot, pickups, capacity, **kwargs)` on a worker thread.
+
+    kwargs are passed through (optimize, engine, pool, improve, time_budget,
+    progress). A `progress` callback runs on the worker thread.
+    """
+    cancel_event = threading.Event()
+    future = (executor or _default_executor()).submit(
+        _run, cancel_event, (depot, pickups, capacity), kwargs
+    )
+    return SolveHandle(future, cancel_event)
+
+
+class LatestSolveRunner:
+    """Runs solves so that a newer request supersedes any older one.
+
+    `submit` cancels the previous handle before starting the new solve and
+    returns (request_id, handle). A `progress` callback is called as
+    progress(request_id, result). `is_current(request_id)` tells callbacks
+    whether their result is still wanted.
+    """
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None) -> None:
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._current: Optional[SolveHandle] = None
+        self._request_id = 0
+
+    def submit(self, depot, pickups, capacity, progress=None, **kwargs):
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+            self._request_id += 1
+            request_id = self._request_id
+            if progress is not None:
+                kwargs["progress"] = lambda result: progress(request_id, result)
+            handle = solve_vrp_async(depot, pickups, capacity, executor=self._executor, **kwargs)
+            self._current = handle
+        return request_id, handle
+
+    def is_current(self, request_id: int) -> bool:
+        return request_id == self._request_id
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._current is not None:
+                self._current.cancel()
+                self._current = None
@@ -0,0 +1,134 @@
+"""
+Fan many VRP instances (what-if scenarios) out over worker processes.
+
+    for rec in solve_vrp_batch(scenarios, workers=4, deadline=2.0):
+        print(rec["index"], rec["seconds"], rec["totalSeconds"])
+
+Each instance is a dict of `vrp_cpp.solve_vrp` keyword arguments (depot,
+pickups, capacity, optimize, engine, improve, time_budget, ...). Records are
+yielded in completion order.
+"""
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait,
+)
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from src.vrp_cpp import solve_vrp
+
+
+def plan_totals(result: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Summed totalSeconds/totalMeters and trip count of a solve result."""
+    trips = (result or {}).get("trips") or []
+    return {
+        "trips": len(trips),
+        "totalSeconds": sum(t.get("totalSeconds", 0) for t in trips),
+        "totalMeters": sum(t.get("totalMeters", 0) for t in trips),
+    }
+
+
+def _solve_timed(instance: Dict[str, Any], pool=None):
+    kwargs = dict(instance)
+    kwargs.pop("progress", None)  # callbacks cannot cross process boundaries
+    if pool is not None:
+        kwargs["pool"] = pool
+    start = time.perf_counter()
+    try:
+        result = solve_vrp(**kwargs)
+        return result, None, time.perf_counter() - start
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+
+def _terminate_workers(executor: ProcessPoolExecutor) -> None:
+    terminate = getattr(executor, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    for proc in list((getattr(executor, "_processes", None) or {}).values()):
+        if proc.is_alive():
+            proc.terminate()
+
+
+def _record(index: int, outcome, submitted: float) -> Dict[str, Any]:
+    result, error, seconds = outcome
+    rec = {
+        "index": index,
+        "result": result,
+        "error": error,
+        "seconds": seconds,
+        "elapsed": time.perf_counter() - submitted,
+    }
+    rec.update(plan_totals(result))
+    return rec
+
+
+def solve_vrp_batch(
+    instances: Iterable[Dict[str, Any]],
+    workers: Optional[int] = None,
+    deadline: Optional[float] = None,
+    pool=None,
+    executor: Optional[Executor] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Solve `instances` concurrently and yield one record per instance as it
+    finishes: {index, result, error, seconds, elapsed, trips, totalSeconds,
+    totalMeters}. `seconds` is solver time inside the worker, `elapsed` the
+    wall time since submission (including queueing).
+
+    workers: process count (default: CPU count)
+    deadline: overall latency budget in seconds; instances not finished by
+              then are cancelled and yielded with error "deadline exceeded".
+              Worker processes of the batch's own process pool that are
+              still solving are terminated, as they are when the consumer
+              stops iterating early
+    pool: a `vrp_pool.SolverPool`; instances then run on threads that share
+          its resident C++ workers instead of on a process pool. Threads
+          cannot be stopped: an overrunning solve finishes (or hits the
+          pool's timeout) in the background
+    executor: optional executor to use instead of creating one; its queued
+              work is cancelled but running work is left alone
+    """
+    items = list(instances)
+    if not items:
+        return
+    own = executor is None
+    if own:
+        if pool is not None:
+            executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="vrp-batch")
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+    started = time.perf_counter()
+    stop_at = None if deadline is None else started + float(deadline)
+    pending = {}
+    finished = False
+    try:
+        for i, inst in enumerate(items):
+            args = (inst, pool) if pool is not None else (inst,)
+            pending[executor.submit(_solve_timed, *args)] = i
+        while pending:
+            remaining = None if stop_at is None else max(0.0, stop_at - time.perf_counter())
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in done:
+                i = pending.pop(fut)
+                try:
+                    outcome = fut.result()
+                except Exception as e:  # worker crashed or result could not be unpickled
+                    outcome = (None, f"{type(e).__name__}: {e}", 0.0)
+                yield _record(i, outcome, started)
+        finished = not pending
+        for fut, i in sorted(pending.items(), key=lambda kv: kv[1]):
+            fut.cancel()
+            yield _record(i, (None, "deadline exceeded", 0.0), started)
+    finally:
+        for fut in pending:
+            fut.cancel()
+        if own:
+            # Do not block on solves that overran the deadline or were
+            # abandoned, and do not leave their processes burning CPU.
+            if not finished and isinstance(executor, ProcessPoolExecutor):
+                _terminate_workers(executor)
+            executor.shutdown(wait=finished, cancel_futures=True)
@@ -0,0 +1,7 @@
+from .generators import LAYOUTS, generate_instance, instance_suite
+from .runner import ENGINES, compare_to_baseline, run_benchmark, write_csv, write_json
+
+__all__ = [
+    "LAYOUTS", "generate_instance", "instance_suite",
+    "ENGINES", "run_benchmark", "write_json", "write_csv", "compare_to_baseline",
+]
@@ -0,0 +1,53 @@
+"""
+Command-line benchmark:
+
+    python -m src.vrp_bench --sizes 10 100 1000 10000 --engines cpp numpy \
+        --json bench.json --csv bench.csv [--baseline old.json]
+"""
+import argparse
+import json
+import sys
+
+from .generators import LAYOUTS
+from .runner import ENGINES, compare_to_baseline, run_benchmark, write_csv, write_json
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m src.vrp_bench", description="Benchmark VRP engines")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    ap.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    ap.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=["cpp", "numpy"])
+    ap.add_argument("--seeds", type=int, nargs="+", default=[0])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--max-pickups", type=int, default=None,
+                    help="override the per-engine size limit")
+    ap.add_argument("--json", dest="json_path")
+    ap.add_argument("--csv", dest="csv_path")
+    ap.add_argument("--baseline", help="earlier --json output to check for regressions")
+    args = ap.parse_args(argv)
+
+    def log(rec):
+        if rec["error"]:
+            print(f"{rec['layout']:>9} n={rec['n']:<6} {rec['engine']:<9} {rec['error']}")
+        else:
+            print(f"{rec['layout']:>9} n={rec['n']:<6} {rec['engine']:<9} trips={rec['trips']:<5} "
+                  f"cost={rec['totalSeconds']}s p50={rec['p50'] * 1000:.1f}ms p90={rec['p90'] * 1000:.1f}ms")
+
+    records = run_benchmark(args.sizes, args.layouts, args.engines, args.repeat, args.seeds,
+                            args.max_pickups, log=log)
+    if args.json_path:
+        write_json(records, args.json_path)
+    if args.csv_path:
+        write_csv(records, args.csv_path)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(json.load(f), records)
+        for r in regressions:
+            print(f"REGRESSION {r['layout']} n={r['n']} {r['engine']}: "
+                  f"cost x{r['cost_ratio']:.3f}, p50 x{r['time_ratio']:.2f}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Seeded synthetic VRP instances.
+
+Every instance is a dict of `solve_vrp` keyword arguments (depot, pickups,
+capacity), so it can be passed straight to any engine or to `vrp_batch`.
+The same (layout, n, seed) always gives the same instance.
+"""
+import math
+from typing import Any, Dict, Iterator, Sequence
+
+import numpy as np
+
+KM_PER_DEG_LAT = 111.32
+DEFAULT_DEPOT = {"lat": 37.7749, "lng": -122.4194}
+CAPACITIES = (50, 100, 200)
+
+
+def _uniform(rng: np.random.Generator, n: int, radius_km: float):
+    return rng.uniform(-radius_km, radius_km, size=(n, 2))
+
+
+def _clustered(rng: np.random.Generator, n: int, radius_km: float):
+    k = max(2, n // 50)
+    centers = rng.uniform(-radius_km, radius_km, size=(k, 2))
+    spread = rng.uniform(0.03, 0.12, size=k) * radius_km
+    which = rng.integers(0, k, size=n)
+    return centers[which] + rng.normal(size=(n, 2)) * spread[which, None]
+
+
+def _ring(rng: np.random.Generator, n: int, radius_km: float):
+    angle = rng.uniform(0.0, 2.0 * math.pi, size=n)
+    r = radius_km * (0.8 + 0.2 * rng.random(size=n))
+    return np.column_stack([r * np.cos(angle), r * np.sin(angle)])
+
+
+LAYOUTS = {"uniform": _uniform, "clustered": _clustered, "ring": _ring}
+
+
+def generate_instance(
+    layout: str,
+    n: int,
+    seed: int = 0,
+    capacity: int = None,
+    radius_km: float = 15.0,
+    depot: Dict[str, float] = None,
+) -> Dict[str, Any]:
+    """
+    One instance with `n` pickups around `depot`.
+
+    layout: "uniform" (square around the depot), "clustered" (gaussian blobs,
+            about one per 50 pickups) or "ring" (annulus at 80-100% of
+            radius_km, the worst case for nearest-neighbour construction)
+    capacity: defaults to one of 50/100/200 picked by the seed
+    Demands are skewed toward small loads, and a few exceed the capacity,
+    so split deliveries get exercised.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+    rng = np.random.default_rng([int(seed), int(n), sorted(LAYOUTS).index(layout)])
+    depot = dict(depot or DEFAULT_DEPOT)
+    if capacity is None:
+        capacity = int(CAPACITIES[int(rng.integers(0, len(CAPACITIES)))])
+    xy = LAYOUTS[layout](rng, int(n), float(radius_km))
+    lat = depot["lat"] + xy[:, 1] / KM_PER_DEG_LAT
+    lng = depot["lng"] + xy[:, 0] / (KM_PER_DEG_LAT * math.cos(math.radians(depot["lat"])))
+    demand = np.clip(np.ceil(rng.lognormal(math.log(capacity / 6.0), 0.9, size=n)), 1, 2 * capacity)
+    pickups = [
+        {"name": f"{layout[0].upper()}{i}", "lat": round(float(a), 6), "lng": round(float(b), 6),
+         "demand": int(d)}
+        for i, (a, b, d) in enumerate(zip(lat, lng, demand))
+    ]
+    return {"depot": depot, "pickups": pickups, "capacity": int(capacity)}
+
+
+def instance_suite(
+    sizes: Sequence[int] = (10, 100, 1000),
+    layouts: Sequence[str] = ("uniform", "clustered", "ring"),
+    seeds: Sequence[int] = (0,),
+) -> Iterator[Dict[str, Any]]:
+    """Yield {"layout", "n", "seed", "instance"} for every combination."""
+    for layout in layouts:
+        for n in sizes:
+            for seed in seeds:
+                yield {"layout": layout, "n": int(n), "seed": int(seed),
+                       "instance": generate_instance(layout, n, seed)}
@@ -0,0 +1,159 @@
+"""
+Time VRP engines on generated instances and report cost, trips and
+runtime percentiles.
+"""
+import csv
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.vrp_batch import plan_totals
+from src.vrp_cpp import _find_solver, solve_vrp_with_cpp
+from src.vrp_numpy import solve_vrp_with_numpy
+from src.vrp_sparse import NeighborLegs
+
+from .generators import instance_suite
+
+
+def _numpy(inst):
+    return solve_vrp_with_numpy(**inst)
+
+
+def _numpy_ls(inst):
+    return solve_vrp_with_numpy(**inst, improve=True, time_budget=1.0)
+
+
+def _numpy_savings(inst):
+    return solve_vrp_with_numpy(**inst, strategy="savings")
+
+
+def _sparse_ls(inst):
+    legs = NeighborLegs(inst["depot"], inst["pickups"])
+    return solve_vrp_with_numpy(**inst, matrix=legs, improve=True, time_budget=1.0)
+
+
+def _cpp(inst):
+    return solve_vrp_with_cpp(**inst)
+
+
+def _cpp_available() -> bool:
+    return _find_solver() is not None
+
+
+# name -> (solve(instance) -> result, available() -> bool, max pickups or None).
+# Engines that build dense (n+1)^2 float64 matrices stop at 5k by default;
+# plain numpy switches to the `vrp_spatial` index on large instances.
+ENGINES: Dict[str, tuple] = {
+    "cpp": (_cpp, _cpp_available, 5000),
+    "numpy": (_numpy, lambda: True, None),
+    "numpy+ls": (_numpy_ls, lambda: True, 5000),
+    "numpy+savings": (_numpy_savings, lambda: True, None),
+    "sparse+ls": (_sparse_ls, lambda: True, None),
+}
+
+CSV_FIELDS = [
+    "layout", "n", "seed", "capacity", "engine", "repeat", "trips", "totalSeconds",
+    "totalMeters", "p50", "p90", "p99", "min", "max", "error",
+]
+
+
+def _time_engine(solve: Callable, inst: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    times: List[float] = []
+    result = None
+    for _ in range(max(1, int(repeat))):
+        start = time.perf_counter()
+        result = solve(inst)
+        times.append(time.perf_counter() - start)
+    p50, p90, p99 = np.percentile(times, [50, 90, 99])
+    rec = plan_totals(result)
+    rec.update(p50=float(p50), p90=float(p90), p99=float(p99),
+               min=min(times), max=max(times))
+    return rec
+
+
+def run_benchmark(
+    sizes: Sequence[int] = (10, 100, 1000, 10000),
+    layouts: Sequence[str] = ("uniform", "clustered", "ring"),
+    engines: Sequence[str] = ("cpp", "numpy"),
+    repeat: int = 3,
+    seeds: Sequence[int] = (0,),
+    max_pickups: Optional[int] = None,
+    log: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Solve each generated instance with each engine `repeat` times.
+
+    Returns one record per (layout, n, seed, engine) with trips,
+    totalSeconds/totalMeters of the plan (the route cost) and runtime
+    percentiles in seconds. Unavailable engines and sizes above an engine's
+    limit (or `max_pickups`) are recorded with an "error" instead of being run.
+    log: called with each record as it is produced
+    """
+    records = []
+    for case in instance_suite(sizes, layouts, seeds):
+        inst = case["instance"]
+        for name in engines:
+            if name not in ENGINES:
+                raise ValueError(f"Unknown engine: {name}")
+            solve, available, limit = ENGINES[name]
+            limit = max_pickups if max_pickups is not None else limit
+            rec = {"layout": case["layout"], "n": case["n"], "seed": case["seed"],
+                   "capacity": inst["capacity"], "engine": name, "repeat": int(repeat),
+                   "error": None}
+            if not available():
+                rec["error"] = "unavailable"
+            elif limit is not None and case["n"] > limit:
+                rec["error"] = f"skipped (>{limit} pickups)"
+            else:
+                try:
+                    rec.update(_time_engine(solve, inst, repeat))
+                except Exception as e:
+                    rec["error"] = f"{type(e).__name__}: {e}"
+            records.append(rec)
+            if log is not None:
+                log(rec)
+    return records
+
+
+def write_json(records: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2)
+
+
+def write_csv(records: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for rec in records:
+            writer.writerow(rec)
+
+
+def compare_to_baseline(
+    baseline: List[Dict[str, Any]],
+    records: List[Dict[str, Any]],
+    cost_tolerance: float = 0.01,
+    time_factor: float = 1.5,
+) -> List[Dict[str, Any]]:
+    """
+    Regressions against an earlier run: cases whose route cost grew by more
+    than `cost_tolerance` (fraction) or whose p50 runtime grew by more than
+    `time_factor`. Cases missing from either side are ignored.
+    """
+    def key(r):
+        return (r["layout"], r["n"], r["seed"], r["engine"])
+
+    base = {key(r): r for r in baseline if not r.get("error")}
+    out = []
+    for rec in records:
+        old = base.get(key(rec))
+        if old is None or rec.get("error"):
+            continue
+        cost_ratio = rec["totalSeconds"] / old["totalSeconds"] if old["totalSeconds"] else 1.0
+        time_ratio = rec["p50"] / old["p50"] if old["p50"] else 1.0
+        if cost_ratio > 1.0 + cost_tolerance or time_ratio > time_factor:
+            out.append({"layout": rec["layout"], "n": rec["n"], "seed": rec["seed"],
+                        "engine": rec["engine"], "cost_ratio": cost_ratio,
+                        "time_ratio": time_ratio})
+    return out
@@ -0,0 +1,88 @@
+"""
+Persistent cache of driving times between coordinate pairs.
+
+Keys quantise both endpoints to `precision` decimal places (4 ~= 11 m) and
+add a time-of-day bucket, so repeated plans around the same depot reuse
+Distance Matrix results instead of re-requesting the full n x n block.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Optional, Sequence, Tuple
+
+from src.persistent_lru import PersistentLRU, default_cache_dir
+
+LatLng = Dict[str, float]
+
+
+class TravelTimeCache:
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: int = 200000,
+        precision: int = 4,
+        bucket_minutes: int = 60,
+    ) -> None:
+        self.precision = int(precision)
+        self.bucket_minutes = max(1, int(bucket_minutes))
+        self._store = PersistentLRU(
+            path or os.path.join(default_cache_dir(), "travel_times.json"), max_entries
+        )
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def bucket(self, departure: Optional[float] = None) -> int:
+        """Time-of-day bucket for a departure time given in epoch seconds."""
+        t = datetime.fromtimestamp(time.time() if departure is None else departure)
+        return (t.hour * 60 + t.minute) // self.bucket_minutes
+
+    def _point(self, p: LatLng) -> str:
+        return f"{float(p['lat']):.{self.precision}f},{float(p['lng']):.{self.precision}f}"
+
+    def key(self, origin: LatLng, dest: LatLng, bucket: int) -> str:
+        return f"{self._point(origin)}>{self._point(dest)}@{bucket}"
+
+    def lookup_matrix(
+        self, points: Sequence[LatLng], departure: Optional[float] = None
+    ) -> List[List[Optional[float]]]:
+        """n x n seconds with None where the pair is not cached (diagonal is 0)."""
+        b = self.bucket(departure)
+        labels = [self._point(p) for p in points]
+        n = len(points)
+        keys = [f"{labels[i]}>{labels[j]}@{b}" for i in range(n) for j in range(n)]
+        values = self._store.get_many(keys)
+        out = [values[i * n:(i + 1) * n] for i in range(n)]
+        for i in range(n):
+            out[i][i] = 0.0
+        return out
+
+    def store(
+        self,
+        entries: Sequence[Tuple[LatLng, LatLng, float]],
+        departure: Optional[float] = None,
+        flush: bool = True,
+    ) -> None:
+        """Cache (origin, destination, seconds) triples."""
+        b = self.bucket(departure)
+        self._store.put_many(
+            (self.key(o, d, b), float(s)) for o, d, s in entries if s is not None
+        )
+        if flush:
+            self._store.flush()
+
+    def flush(self) -> None:
+        self._store.flush()
+
+
+_default_cache: Optional[TravelTimeCache] = None
+_default_lock = threading.Lock()
+
+
+def default_travel_time_cache() -> TravelTimeCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TravelTimeCache()
+        return _default_cache
@@ -0,0 +1,265 @@
+"""
+Cluster-first, route-second solving for large instances.
+
+Pickups are swept by angle around the depot into clusters of roughly
+`trips_per_cluster` truckloads each, every cluster is solved independently
+on a process pool, and the stitched plan is repaired by merging the
+under-filled trips left at cluster boundaries. Reached through
+`vrp_cpp.solve_vrp(..., decompose=True)`.
+"""
+import heapq
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.vrp_numpy import METERS_PER_SECOND, HaversineLegs, _demands, format_result
+
+
+def sweep_clusters(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    trips_per_cluster: int = 4,
+) -> List[List[int]]:
+    """
+    Partition pickup indices into angular sectors around the depot.
+
+    The sweep starts at the widest angular gap so that a natural group of
+    stops is not cut in two, and closes a cluster once its demand reaches
+    `trips_per_cluster * capacity`.
+    """
+    if not pickups:
+        return []
+    lat0 = math.radians(float(depot["lat"]))
+    angles = []
+    for i, p in enumerate(pickups):
+        dy = float(p["lat"]) - float(depot["lat"])
+        dx = (float(p["lng"]) - float(depot["lng"])) * math.cos(lat0)
+        angles.append((math.atan2(dy, dx), i))
+    angles.sort()
+    gaps = [
+        (angles[(k + 1) % len(angles)][0] - angles[k][0]) % (2.0 * math.pi)
+        for k in range(len(angles))
+    ]
+    start = (max(range(len(gaps)), key=gaps.__getitem__) + 1) % len(angles)
+    order = [i for _, i in angles[start:] + angles[:start]]
+
+    demands = _demands(pickups)
+    limit = max(1, int(capacity)) * max(1, int(trips_per_cluster))
+    clusters: List[List[int]] = []
+    current: List[int] = []
+    load = 0
+    for i in order:
+        if current and load + int(demands[i]) > limit:
+            clusters.append(current)
+            current, load = [], 0
+        current.append(i)
+        load += int(demands[i])
+    if current:
+        clusters.append(current)
+    return clusters
+
+
+def _solve_cluster(args) -> Tuple[List[List[int]], List[List[int]]]:
+    """Worker: solve one cluster and return (trips, loads) in cluster-local indices."""
+    from src.vrp_cpp import solve_vrp
+
+    depot, sub, capacity, kwargs = args
+    res = solve_vrp(depot, sub, capacity, **kwargs)
+    trips = [[int(it["index"]) for it in t["items"]] for t in res["trips"]]
+    loads = [[int(it["load"]) for it in t["items"]] for t in res["trips"]]
+    return trips, loads
+
+
+def _route_cost(D, route: List[int]) -> float:
+    prev, total = 0, 0.0
+    for u in route:
+        total += D[prev, u + 1]
+        prev = u + 1
+    return total + D[prev, 0]
+
+
+def _join(route_a, load_a, route_b, load_b):
+    route, load = list(route_a), list(load_a)
+    for u, amt in zip(route_b, load_b):
+        if u in route:
+            load[route.index(u)] += amt
+        else:
+            route.append(u)
+            load.append(amt)
+    return route, load
+
+
+def merge_underfilled(
+    D,
+    trips: List[List[int]],
+    loads: List[List[int]],
+    capacity: int,
+    sectors: Optional[List[int]] = None,
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Boundary repair: repeatedly merge the pair of partially loaded trips with
+    the largest travel-time saving (A+B, A+reversed B or B+A) that still fits
+    in one vehicle.
+
+    sectors: sweep cluster of each trip; when given, only trips from the same
+             or neighbouring sectors are paired, which keeps the repair linear
+             in the number of clusters
+    """
+    trips = [list(t) for t in trips]
+    loads = [list(l) for l in loads]
+    cost = [_route_cost(D, t) for t in trips]
+    total = [sum(l) for l in loads]
+    n_sectors = (max(sectors) + 1) if sectors else 0
+    owned = [{sectors[k]} if sectors else set() for k in range(len(trips))]
+    version = [0] * len(trips)
+
+    def near(a: int, b: int) -> bool:
+        if not sectors:
+            return True
+        return any(
+            min(abs(x - y), n_sectors - abs(x - y)) <= 1 for x in owned[a] for y in owned[b]
+        )
+
+    def best_join(a: int, b: int):
+        best = None
+        for ra, la, rb, lb in (
+            (trips[a], loads[a], trips[b], loads[b]),
+            (trips[a], loads[a], trips[b][::-1], loads[b][::-1]),
+            (trips[b], loads[b], trips[a], loads[a]),
+        ):
+            route, load = _join(ra, la, rb, lb)
+            c = _route_cost(D, route)
+            saving = cost[a] + cost[b] - c
+            if saving > 1e-9 and (best is None or saving > best[0]):
+                best = (saving, route, load, c)
+        return best
+
+    heap: List[tuple] = []
+
+    def push_pairs(a: int, others) -> None:
+        for b in others:
+            if b == a or not trips[b] or total[a] + total[b] > capacity or not near(a, b):
+                continue
+            found = best_join(a, b)
+            if found is not None:
+                heapq.heappush(heap, (-found[0], a, b, version[a], version[b]))
+
+    partial = [k for k in range(len(trips)) if trips[k] and total[k] < capacity]
+    for x, a in enumerate(partial):
+        push_pairs(a, partial[x + 1:])
+    while heap:
+        _, a, b, va, vb = heapq.heappop(heap)
+        if va != version[a] or vb != version[b] or not trips[a] or not trips[b]:
+            continue
+        found = best_join(a, b)
+        if found is None or total[a] + total[b] > capacity:
+            continue
+        _, route, load, c = found
+        trips[a], loads[a], cost[a] = route, load, c
+        total[a] += total[b]
+        owned[a] |= owned[b]
+        trips[b], loads[b] = [], []
+        version[a] += 1
+        version[b] += 1
+        if total[a] < capacity:
+            push_pairs(a, [k for k in range(len(trips)) if trips[k] and total[k] < capacity])
+    keep = [k for k in range(len(trips)) if trips[k]]
+    return [trips[k] for k in keep], [loads[k] for k in keep]
+
+
+def solve_vrp_clustered(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    workers: Optional[int] = None,
+    trips_per_cluster: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    pool=None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    **solve_kwargs,
+) -> Dict[str, Any]:
+    """
+    Decomposed solve with the same result shape as `solve_vrp`.
+
+    workers: processes for the cluster solves (default: CPU count)
+    trips_per_cluster: truckloads per sweep cluster; by default sized so that
+                       there are about four clusters per worker
+    executor: optional executor to use instead of creating one
+    pool: a `vrp_pool.SolverPool`; clusters then run on threads sharing it
+    should_stop: polled between clusters and, for in-process and thread
+                 solves, passed to each cluster's solve. Once it returns True,
+                 clusters not yet solved get a quick greedy plan, the pool's
+                 own worker processes are terminated and the repair is skipped
+    solve_kwargs: forwarded to `solve_vrp` for every cluster (engine,
+                  solver_path, improve, time_budget, ...)
+    """
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    capacity = int(capacity)
+    if trips_per_cluster is None:
+        truckloads = int(_demands(pickups).sum()) / max(1, capacity)
+        trips_per_cluster = max(1, math.ceil(truckloads / (4 * workers)))
+    clusters = sweep_clusters(depot, pickups, capacity, trips_per_cluster)
+    kwargs = dict(solve_kwargs, optimize=True)
+    kwargs.pop("progress", None)  # callbacks cannot cross process boundaries
+    if pool is not None:
+        kwargs["pool"] = pool
+    own = executor is None and len(clusters) > 1
+    if own:
+        if pool is not None:
+            executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="vrp-cluster")
+        else:
+            executor = ProcessPoolExecutor(max_workers=min(workers, len(clusters)))
+    if should_stop is not None and not isinstance(executor, ProcessPoolExecutor):
+        kwargs["should_stop"] = should_stop  # callables cannot cross process boundaries
+    jobs = [(depot, [pickups[i] for i in c], capacity, kwargs) for c in clusters]
+
+    def stopped() -> bool:
+        return should_stop is not None and should_stop()
+
+    parts: List[Optional[Tuple[List[List[int]], List[List[int]]]]] = [None] * len(jobs)
+    try:
+        if executor is None:
+            for k, job in enumerate(jobs):
+                if stopped():
+                    break
+                parts[k] = _solve_cluster(job)
+        else:
+            futures = [executor.submit(_solve_cluster, job) for job in jobs]
+            pending = set(futures)
+            while pending and not stopped():
+                _, pending = wait(pending, timeout=None if should_stop is None else 0.1, return_when=FIRST_COMPLETED)
+            for k, fut in enumerate(futures):
+                if fut.done():
+                    parts[k] = fut.result()
+                else:
+                    fut.cancel()
+    finally:
+        if own:
+            cut_short = any(part is None for part in parts)
+            if cut_short and isinstance(executor, ProcessPoolExecutor):
+                from src.vrp_batch import _terminate_workers
+
+                _terminate_workers(executor)
+            executor.shutdown(wait=not cut_short, cancel_futures=True)
+
+    # Clusters skipped after a stop still need a plan: plain greedy, in process.
+    quick = {k: v for k, v in kwargs.items() if k not in ("pool", "should_stop", "improve")}
+    quick["engine"] = "numpy"
+    for k, part in enumerate(parts):
+        if part is None:
+            parts[k] = _solve_cluster((depot, jobs[k][1], capacity, quick))
+
+    trips: List[List[int]] = []
+    loads: List[List[int]] = []
+    sectors: List[int] = []
+    for c, (members, (sub_trips, sub_loads)) in enumerate(zip(clusters, parts)):
+        trips.extend([members[i] for i in t] for t in sub_trips)
+        loads.extend(sub_loads)
+        sectors.extend([c] * len(sub_trips))
+    meters = HaversineLegs(depot, pickups)
+    seconds = HaversineLegs(depot, pickups, 1.0 / METERS_PER_SECOND)
+    if not stopped():
+        trips, loads = merge_underfilled(seconds, trips, loads, capacity, sectors)
+    return format_result(pickups, trips, loads, meters, seconds)
@@ -1,8 +1,13 @@
 import os
 import json
+import itertools
 import shutil
 import subprocess
-from typing import List, Dict, Any, Optional
+import time
+import warnings
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+
+from src.polyline import encode_polyline
 
 
 def _find_solver() -> Optional[str]:
@@ -18,12 +23,54 @@ def _find_solver() -> Optional[str]:
     return None
 
 
+def _sanitize_name(s: str) -> str:
+    return (s or "").replace("|", "/").replace("\n", " ").strip()
+
+
+def _encode_request(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    optimize: bool = True,
+    matrix=None,
+    meters=None,
+) -> str:
+    """Encode a solve request in the solver's `key: value` text protocol.
+
+    matrix / meters: optional (n+1)x(n+1) seconds / meters sent as one
+                     `matrix:` / `meters:` line per row (depot first)
+    """
+    lines = []
+    lines.append(f"depot: {depot['lat']},{depot['lng']}")
+    lines.append(f"capacity: {int(capacity)}")
+    lines.append(f"optimize: {1 if optimize else 0}")
+    for p in pickups:
+        name = _sanitize_name(str(p.get("name", "")))
+        lines.append(
+            f"pickup: {name}|{float(p['lat'])}|{float(p['lng'])}|{int(p.get('demand', 1))}"
+        )
+    for key, rows in (("matrix", matrix), ("meters", meters)):
+        if rows is not None:
+            lines.extend(f"{key}: " + " ".join(f"{float(v):.1f}" for v in row) for row in rows)
+    return "\n".join(lines) + "\n"
+
+
+def _parse_result(out: str) -> Dict[str, Any]:
+    try:
+        return json.loads(out)
+    except Exception as e:
+        raise RuntimeError(f"Failed to parse solver JSON: {e}\nOutput was:\n{out}")
+
+
 def solve_vrp_with_cpp(
     depot: Dict[str, float],
     pickups: List[Dict[str, Any]],
     capacity: int,
     optimize: bool = True,
     solver_path: Optional[str] = None,
+    pool=None,
+    matrix=None,
+    meters=None,
 ) -> Dict[str, Any]:
     """
     Call the C++ VRP solver CLI with a compact text protocol and return parsed JSON.
@@ -33,27 +80,22 @@ def solve_vrp_with_cpp(
     capacity: vehicle capacity per trip
     optimize: if False, respect input order (manual); if True, greedy optimization
     solver_path: optional explicit path to compiled solver; otherwise auto-detect
+    pool: optional `vrp_pool.SolverPool`; the request is sent to one of its
+          resident solver processes instead of spawning a new one
+    matrix: optional (n+1)x(n+1) travel seconds, index 0 the depot (e.g. from
+            `road_network.road_matrices`); replaces the haversine estimate
+    meters: optional matrix of the same shape for the reported leg distances
     """
+    if pool is not None:
+        return pool.solve(depot, pickups, capacity, optimize=optimize, matrix=matrix, meters=meters)
+
     solver = solver_path or _find_solver()
     if not solver:
         raise RuntimeError(
             "vrp_solver not found. Build C++ backend (see docs) or set VRP_SOLVER_PATH."
         )
 
-    def sanitize_name(s: str) -> str:
-        return (s or "").replace("|", "/").replace("\n", " ").strip()
-
-    lines = []
-    lines.append(f"depot: {depot['lat']},{depot['lng']}")
-    lines.append(f"capacity: {int(capacity)}")
-    lines.append(f"optimize: {1 if optimize else 0}")
-    for p in pickups:
-        name = sanitize_name(str(p.get("name", "")))
-        lines.append(
-            f"pickup: {name}|{float(p['lat'])}|{float(p['lng'])}|{int(p.get('demand', 1))}"
-        )
-
-    input_blob = "\n".join(lines) + "\n"
+    input_blob = _encode_request(depot, pickups, capacity, optimize, matrix, meters)
 
     proc = subprocess.run(
         [solver], input=input_blob.encode("utf-8"), stdout=subprocess.PIPE, stderr=subprocess.PIPE
@@ -63,42 +105,241 @@ def solve_vrp_with_cpp(
             f"vrp_solver failed with code {proc.returncode}: {proc.stderr.decode('utf-8', 'ignore')}"
         )
 
-    out = proc.stdout.decode("utf-8", "ignore")
+    return _parse_result(proc.stdout.decode("utf-8", "ignore"))
+
+
+def solve_vrp(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    optimize: bool = True,
+    engine: str = "auto",
+    solver_path: Optional[str] = None,
+    pool=None,
+    improve: bool = False,
+    time_budget: float = 1.0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    decompose: bool = False,
+    workers: Optional[int] = None,
+    matrix=None,
+    meters=None,
+    sequence: bool = False,
+    strategy: str = "nearest",
+    matrix_store=None,
+) -> Dict[str, Any]:
+    """
+    Solve with the best available engine; same arguments and result shape as
+    `solve_vrp_with_cpp`.
+
+    engine: "cpp" (compiled solver, raises if missing), "numpy" (in-process
+            `vrp_numpy` engine) or "auto" (C++ when a solver or pool is
+            available, NumPy otherwise)
+    improve: follow construction with 2-opt/Or-opt/relocate/swap local search
+             for up to `time_budget` seconds; runs on the NumPy engine
+    progress: with improve, called with each best-so-far result dict
+    should_stop: with improve, polled to end the search early (cancellation)
+    decompose: cluster-first/route-second (`vrp_cluster`): sweep the pickups
+               into capacity-sized sectors, solve them in parallel on
+               `workers` processes (or on `pool`), then stitch and repair
+               the boundary trips; ignored for manual order
+    matrix / meters: optional (n+1)x(n+1) travel seconds / meters, e.g. road
+                     times from `road_network.road_matrices`; not combined
+                     with decompose, which works on haversine sectors.
+                     `matrix` may also be a `vrp_sparse.NeighborLegs`
+                     (NumPy engine)
+    sequence: reorder the stops of every trip optimally (Held–Karp up to 12
+              stops, `vrp_sequence`); runs on the NumPy engine
+    strategy: "nearest" (greedy nearest neighbour, both engines) or
+              "savings" (Clarke–Wright, `vrp_savings`; runs on the NumPy engine)
+    matrix_store: a `vrp_matrix_store.MatrixStore`; when it holds the depot
+                  and every pickup, its stored times (and meters) are used
+                  as `matrix` / `meters`. The result then carries
+                  "matrixSource": "store", or "haversine" (with a
+                  RuntimeWarning) when some location is missing from it
+    """
+    if engine not in ("auto", "cpp", "numpy"):
+        raise ValueError(f"Unknown VRP engine: {engine}")
+    if strategy not in ("nearest", "savings"):
+        raise ValueError(f"Unknown VRP strategy: {strategy}")
+    if (improve or sequence or strategy != "nearest") and optimize:
+        if engine == "cpp":
+            raise ValueError("improve/sequence/strategy='savings' requires the numpy engine")
+        engine = "numpy"
+    matrix_source = None
+    if matrix is None and matrix_store is not None and optimize:
+        try:
+            matrix, stored_meters = matrix_store.submatrix([depot] + list(pickups))
+            meters = stored_meters if meters is None else meters
+            matrix_source = "store"
+        except ValueError as e:
+            warnings.warn(f"{e}; using haversine times", RuntimeWarning, stacklevel=2)
+            matrix_source = "haversine"
+    if matrix is not None and hasattr(matrix, "neighbor_lists"):
+        # Sparse legs have no dense text-protocol form.
+        if engine == "cpp":
+            raise ValueError("sparse matrix (vrp_sparse.NeighborLegs) requires the numpy engine")
+        engine = "numpy"
+    if decompose and optimize and matrix is None:
+        from src.vrp_cluster import solve_vrp_clustered
+
+        res = solve_vrp_clustered(
+            depot, pickups, capacity, workers=workers, pool=pool, should_stop=should_stop,
+            engine=engine, solver_path=solver_path, improve=improve, time_budget=time_budget,
+            sequence=sequence, strategy=strategy,
+        )
+    else:
+        if engine == "auto":
+            engine = "cpp" if (pool is not None or solver_path or _find_solver()) else "numpy"
+        if engine == "cpp":
+            res = solve_vrp_with_cpp(
+                depot, pickups, capacity, optimize=optimize, solver_path=solver_path, pool=pool,
+                matrix=matrix, meters=meters,
+            )
+        else:
+            from src.vrp_numpy import solve_vrp_with_numpy
+
+            res = solve_vrp_with_numpy(
+                depot, pickups, capacity, optimize=optimize, matrix=matrix, meters=meters,
+                improve=improve, time_budget=time_budget, progress=progress,
+                should_stop=should_stop, sequence=sequence, strategy=strategy,
+            )
+    if matrix_source is not None:
+        res["matrixSource"] = matrix_source
+    return res
+
+
+def iter_vrp_trips(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    optimize: bool = True,
+    engine: str = "auto",
+    solver_path: Optional[str] = None,
+    pool=None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream a solve: yield one trip record at a time, as the engine closes it.
+
+    Records have the same shape as the entries of `solve_vrp(...)["trips"]`
+    (stop index, lat/lng, load and cumulativeLoad per item, per-leg meters and
+    seconds, trip totals). The C++ engine runs `vrp_solver --ndjson`, or a
+    `stream: 1` request on a pool, so large plans can be drawn before the solve
+    finishes. Local search (`improve`) rewrites whole plans and is not streamed.
+    """
+    if engine not in ("auto", "cpp", "numpy"):
+        raise ValueError(f"Unknown VRP engine: {engine}")
+    if engine == "auto":
+        engine = "cpp" if (pool is not None or solver_path or _find_solver()) else "numpy"
+    if engine == "numpy":
+        from src.vrp_numpy import iter_vrp_with_numpy
+
+        yield from iter_vrp_with_numpy(depot, pickups, capacity, optimize=optimize)
+        return
+    if pool is not None:
+        yield from pool.iter_trips(depot, pickups, capacity, optimize=optimize)
+        return
+
+    solver = solver_path or _find_solver()
+    if not solver:
+        raise RuntimeError(
+            "vrp_solver not found. Build C++ backend (see docs) or set VRP_SOLVER_PATH."
+        )
+    proc = subprocess.Popen(
+        [solver, "--ndjson"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
     try:
-        return json.loads(out)
-    except Exception as e:
-        raise RuntimeError(f"Failed to parse solver JSON: {e}\nOutput was:\n{out}")
+        # The solver reads all input before answering, so this cannot deadlock.
+        proc.stdin.write(_encode_request(depot, pickups, capacity, optimize).encode("utf-8"))
+        proc.stdin.close()
+        for line in proc.stdout:
+            line = line.strip()
+            if line:
+                yield _parse_result(line.decode("utf-8", "ignore"))
+        if proc.wait() != 0:
+            raise RuntimeError(
+                f"vrp_solver failed with code {proc.returncode}: "
+                f"{proc.stderr.read().decode('utf-8', 'ignore')}"
+            )
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
 
+TRIP_COLORS = ["#4285F4", "#34A853", "#FBBC05", "#EA4335", "#A142F4", "#00ACC1"]
+_overlay_batches = itertools.count(1)
 
-def draw_trips_on_maps_widget(maps_widget, trips: List[Dict[str, Any]]):
+
+def trip_overlay_chunks(
+    trips: Iterable[Dict[str, Any]],
+    depot: Optional[Dict[str, float]] = None,
+    chunk_points: int = 20000,
+    flush_seconds: float = 0.1,
+) -> Iterator[Dict[str, Any]]:
     """
-    Draw simple colored polylines on the current Google Map for each trip.
-    This bypasses Directions and uses straight segments between depot->stops->depot.
+    Group trip geometry into messages for `receiveTripOverlays` in map.js.
+
+    Each message is {batch, seq, final, trips: [{trip, color, points, path}]}
+    where `path` is an encoded polyline (see `src/polyline.py`). A message is
+    cut after `chunk_points` points, so large plans never become one giant
+    string, or once `flush_seconds` have passed since the previous message.
+    The time check runs as each trip arrives: while a streamed `trips`
+    iterator is still solving the next trip, nothing is sent. A partial
+    chunk therefore waits for the next trip, or for the end of the stream,
+    and not for `flush_seconds`.
     """
-    # Choose a small color palette to rotate through
-    colors = ["#4285F4", "#34A853", "#FBBC05", "#EA4335", "#A142F4", "#00ACC1"]
-    js_parts = [
-        "try{ if(window._cppTripOverlays){ window._cppTripOverlays.forEach(o=>o.setMap(null)); } window._cppTripOverlays=[]; }catch(e){}"
-    ]
+    batch = next(_overlay_batches)
+    ends = [depot] if depot else []
+    seq = 0
+    pending: List[Dict[str, Any]] = []
+    points = 0
+    started = time.monotonic()
     for i, trip in enumerate(trips):
-        color = colors[i % len(colors)]
-        # Reconstruct a basic path from legs: we need depot -> leg1 stop -> leg2 stop ... -> depot
-        # The page does not expose depot coords, so we only connect consecutive legs (approximate).
-        # For better fidelity, you can extend the solver to also return coordinates of each stop.
-        path_js = []
-        # The solver JSON contains only leg texts. In a production setup, include lat/lng per stop.
-        # Here, we no-op if coordinates are missing.
-        # Kept for completeness; users can adapt this to pass coordinates.
-        #
-        # Example expected structure to draw:
-        # path_js = [ "new google.maps.LatLng(37.77,-122.41)", ... ]
-        if not path_js:
+        stops = [it for it in trip.get("items", []) if "lat" in it and "lng" in it]
+        if not stops:
             continue
-        js_parts.append(
-            "(function(){ var pl = new google.maps.Polyline({path:[" + ",".join(path_js) + 
-            f"], strokeColor:'{color}', strokeOpacity:1.0, strokeWeight:5, geodesic:true}}); pl.setMap(map); (window._cppTripOverlays||(window._cppTripOverlays=[])).push(pl); } )();"
-        )
+        path = ends + stops + ends
+        pending.append({
+            "trip": int(trip.get("index", i)),
+            "color": TRIP_COLORS[int(trip.get("index", i)) % len(TRIP_COLORS)],
+            "points": len(path),
+            "path": encode_polyline(path),
+        })
+        points += len(path)
+        if points >= chunk_points or time.monotonic() - started >= flush_seconds:
+            yield {"batch": batch, "seq": seq, "final": False, "trips": pending}
+            seq += 1
+            pending, points, started = [], 0, time.monotonic()
+    yield {"batch": batch, "seq": seq, "final": True, "trips": pending}
+
 
-    if js_parts:
-        maps_widget.page().runJavaScript("\n".join(js_parts))
+def draw_trips_on_maps_widget(
+    maps_widget,
+    trips: Iterable[Dict[str, Any]],
+    depot: Optional[Dict[str, float]] = None,
+    chunk_points: int = 20000,
+):
+    """
+    Draw simple colored polylines on the current Google Map for each trip.
+    This bypasses Directions and uses straight segments between depot->stops->depot.
 
+    trips: trip records with per-item lat/lng (a result's "trips" list, or the
+           `iter_vrp_trips` generator to draw each trip as it is solved)
+    depot: when given, each path starts and ends at the depot
+
+    Geometry goes to the page as encoded polylines, one message per chunk
+    (see `trip_overlay_chunks`), over the widget's QWebChannel bridge when it
+    has one. The page builds each chunk's overlays in a single animation frame.
+    """
+    bridge = getattr(maps_widget, "bridge", None)
+    for msg in trip_overlay_chunks(trips, depot, chunk_points):
+        payload = json.dumps(msg, separators=(",", ":"))
+        if bridge is not None and hasattr(bridge, "tripOverlays"):
+            bridge.tripOverlays.emit(payload)
+        else:
+            maps_widget.page().runJavaScript(
+                f"(window.receiveTripOverlays||function(){{}})({payload});"
+            )
@@ -0,0 +1,227 @@
+"""
+Warm-started re-solves for interactive planner edits.
+
+    plan = solve_vrp_incremental(depot, pickups, 100)
+    ...user adds/removes/edits a pickup...
+    plan = solve_vrp_incremental(depot, new_pickups, 100, previous=plan)
+    plan.result()          # same JSON shape as solve_vrp
+    plan.changed_trips     # indices of trips that differ from, or moved since, the previous plan
+
+Pickups are matched to the previous plan by their "id" field, or by
+(name, lat, lng) when there is none. A stop whose id is kept but whose
+coordinates changed is treated as removed and re-added. Removed stops are dropped, lowered
+demands are trimmed from the last visits, and new or increased demand is
+placed by cheapest insertion. If capacity shrank, only over-capacity trips
+are repaired. A changed depot, or a capacity cut that overloads most trips,
+falls back to a full solve.
+"""
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+
+from src.vrp_numpy import _demands, build_matrices, format_result, greedy_trips
+
+_EPS = 1e-9
+
+
+def _pickup_keys(pickups: List[Dict[str, Any]]) -> List[Tuple]:
+    seen: Dict[Tuple, int] = {}
+    keys = []
+    for p in pickups:
+        if p.get("id") is not None:
+            base = ("id", str(p["id"]))
+        else:
+            base = (str(p.get("name", "")), round(float(p["lat"]), 6), round(float(p["lng"]), 6))
+        k = seen.get(base, 0)
+        seen[base] = k + 1
+        keys.append(base + (k,))
+    return keys
+
+
+def _moved(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    return (round(float(old["lat"]), 6), round(float(old["lng"]), 6)) != (
+        round(float(new["lat"]), 6), round(float(new["lng"]), 6)
+    )
+
+
+class IncrementalPlan:
+    """A solved plan that later edits can be applied to."""
+
+    def __init__(self, depot, pickups, capacity, trips, loads, meters, seconds,
+                 changed_trips: Optional[Set[int]] = None) -> None:
+        self.depot = {"lat": float(depot["lat"]), "lng": float(depot["lng"])}
+        self.pickups = list(pickups)
+        self.capacity = int(capacity)
+        self.trips = trips
+        self.loads = loads
+        self.meters = meters
+        self.seconds = seconds
+        self.keys = _pickup_keys(self.pickups)
+        self.changed_trips = set(range(len(trips))) if changed_trips is None else changed_trips
+
+    def result(self) -> Dict[str, Any]:
+        return format_result(self.pickups, self.trips, self.loads, self.meters, self.seconds)
+
+
+def _insertion(D, route: List[int], u: int) -> Tuple[float, int]:
+    best, best_pos = float("inf"), 0
+    prev = 0
+    for pos in range(len(route) + 1):
+        nxt = route[pos] if pos < len(route) else 0
+        delta = D[prev][u] + D[u][nxt] - D[prev][nxt]
+        if delta < best:
+            best, best_pos = delta, pos
+        prev = nxt
+    return best, best_pos
+
+
+def _removal_gain(D, route: List[int], pos: int) -> float:
+    prev = route[pos - 1] if pos > 0 else 0
+    nxt = route[pos + 1] if pos + 1 < len(route) else 0
+    u = route[pos]
+    return D[prev][u] + D[u][nxt] - D[prev][nxt]
+
+
+def solve_vrp_incremental(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    previous: Optional[IncrementalPlan] = None,
+    time_budget: float = 0.0,
+) -> IncrementalPlan:
+    """
+    Solve `pickups`, reusing `previous` when possible.
+
+    time_budget: optional seconds of `vrp_local_search` polishing afterwards
+                 (0 keeps the repaired plan as is)
+    """
+    meters, seconds = build_matrices(depot, pickups)
+    capacity = int(capacity)
+    demands = _demands(pickups)
+    same_depot = previous is not None and np.allclose(
+        [previous.depot["lat"], previous.depot["lng"]],
+        [float(depot["lat"]), float(depot["lng"])], atol=1e-9,
+    )
+    plan = None
+    if same_depot and capacity > 0:
+        plan = _repair(previous, depot, pickups, capacity, demands, meters, seconds)
+    if plan is None:
+        trips, loads = greedy_trips(seconds, demands, capacity)
+        plan = IncrementalPlan(depot, pickups, capacity, trips, loads, meters, seconds)
+    if time_budget > 0 and plan.trips:
+        from src.vrp_local_search import improve_trips
+
+        plan.trips, plan.loads = improve_trips(
+            seconds, plan.trips, plan.loads, capacity, time_budget=time_budget
+        )
+        plan.changed_trips = set(range(len(plan.trips)))
+    return plan
+
+
+def _repair(previous, depot, pickups, capacity, demands, meters, seconds) -> Optional[IncrementalPlan]:
+    D = seconds.tolist()
+    new_index = {k: i for i, k in enumerate(_pickup_keys(pickups))}
+    old_to_new = [new_index.get(k) for k in previous.keys]
+    # A stop matched by id but moved is handled as removed and re-added:
+    # it leaves its old trip and its demand is re-placed by cheapest insertion.
+    for i, j in enumerate(old_to_new):
+        if j is not None and _moved(previous.pickups[i], pickups[j]):
+            old_to_new[i] = None
+
+    # Translate routes to new node ids (pickup i -> node i + 1), dropping removed stops.
+    routes: List[List[int]] = []
+    rloads: List[List[int]] = []
+    changed: Set[int] = set()
+    for t, (trip, load) in enumerate(zip(previous.trips, previous.loads)):
+        route, rl = [], []
+        for i, amt in zip(trip, load):
+            j = old_to_new[i]
+            if j is None:
+                continue
+            route.append(j + 1)
+            rl.append(int(amt))
+        if len(route) != len(trip):
+            changed.add(t)
+        routes.append(route)
+        rloads.append(rl)
+
+    # Reconcile demand per stop: trim over-served stops from their last visits.
+    served = [0] * len(pickups)
+    visits: Dict[int, List[Tuple[int, int]]] = {}
+    for t, route in enumerate(routes):
+        for pos, u in enumerate(route):
+            served[u - 1] += rloads[t][pos]
+            visits.setdefault(u, []).append((t, pos))
+    pending: List[Tuple[int, int]] = []
+    for i, want in enumerate(int(d) for d in demands):
+        extra = want - served[i]
+        if extra > 0:
+            pending.append((i + 1, extra))
+        elif extra < 0:
+            for t, pos in reversed(visits.get(i + 1, [])):
+                cut = min(-extra, rloads[t][pos])
+                rloads[t][pos] -= cut
+                extra += cut
+                changed.add(t)
+                if extra == 0:
+                    break
+    for t in list(changed):
+        keep = [k for k, amt in enumerate(rloads[t]) if amt > 0]
+        routes[t] = [routes[t][k] for k in keep]
+        rloads[t] = [rloads[t][k] for k in keep]
+
+    # Capacity shrank: eject the cheapest-to-remove visits from overloaded trips.
+    overloaded = [t for t in range(len(routes)) if sum(rloads[t]) > capacity]
+    if 2 * len(overloaded) > len(routes):
+        return None
+    for t in overloaded:
+        while sum(rloads[t]) > capacity:
+            pos = max(range(len(routes[t])), key=lambda k: _removal_gain(D, routes[t], k))
+            pending.append((routes[t].pop(pos), rloads[t].pop(pos)))
+            changed.add(t)
+
+    # Cheapest insertion, largest amounts first; open new trips when nothing fits.
+    pending.sort(key=lambda x: -x[1])
+    for u, amt in pending:
+        while amt > 0:
+            best = (float("inf"), -1, 0)
+            for t, route in enumerate(routes):
+                spare = capacity - sum(rloads[t])
+                if spare <= 0:
+                    continue
+                if u in route:
+                    if spare >= amt:
+                        best = (0.0, t, -1)
+                        break
+                    continue
+                if spare < amt:
+                    continue
+                delta, pos = _insertion(D, route, u)
+                if delta < best[0] - _EPS:
+                    best = (delta, t, pos)
+            _, t, pos = best
+            if t < 0:
+                routes.append([u])
+                rloads.append([min(amt, capacity)])
+                changed.add(len(routes) - 1)
+                amt -= rloads[-1][0]
+                continue
+            if pos < 0:
+                rloads[t][routes[t].index(u)] += amt
+            else:
+                routes[t].insert(pos, u)
+                rloads[t].insert(pos, amt)
+            changed.add(t)
+            amt = 0
+
+    # Once an emptied trip is dropped, every later trip moves down one index;
+    # report those too, so callers redrawing by index drop stale overlays.
+    trips, loads, renumbered = [], [], set()
+    for t, (route, rl) in enumerate(zip(routes, rloads)):
+        if not route:
+            continue
+        if t in changed or len(trips) != t:
+            renumbered.add(len(trips))
+        trips.append([u - 1 for u in route])
+        loads.append(rl)
+    return IncrementalPlan(depot, pickups, capacity, trips, loads, meters, seconds, renumbered)
@@ -0,0 +1,262 @@
+"""
+Local-search improvement for VRP plans built by `vrp_numpy`.
+
+Intra-trip moves are 2-opt and Or-opt (segments of 1-3 stops); inter-trip
+moves relocate or swap single visits between trips. Inter-trip moves only
+look at each stop's nearest neighbours (a granular neighbourhood) so a pass
+stays close to linear in the number of stops. Relocating a visit into a trip
+that already serves the same stop merges the two split deliveries.
+
+Matrices are indexed with the depot at 0 and pickup i at i + 1; trips and
+loads use the `vrp_numpy` convention (0-based pickup indices per trip, with
+the amount collected at each stop).
+"""
+import time
+from typing import List, Callable, Optional, Tuple
+
+import numpy as np
+
+_EPS = 1e-9
+
+
+def neighbor_lists(matrix, k: int = 10) -> List[List[int]]:
+    """k nearest pickup nodes (1-based node ids) for every node; index 0 unused."""
+    M = np.asarray(matrix, dtype=float)
+    n = M.shape[0] - 1
+    out: List[List[int]] = [[]]
+    if n <= 1:
+        return out + [[] for _ in range(n)]
+    k = max(1, min(int(k), n - 1))
+    sub = np.minimum(M[1:, 1:], M[1:, 1:].T).copy()
+    np.fill_diagonal(sub, np.inf)
+    idx = np.argpartition(sub, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(sub, idx, axis=1).argsort(axis=1)
+    idx = np.take_along_axis(idx, order, axis=1) + 1
+    return out + idx.tolist()
+
+
+class _Plan:
+    """Mutable routes (node ids, depot excluded) with per-visit loads."""
+
+    def __init__(self, D, trips, loads, capacity: int) -> None:
+        self.D = D
+        self.capacity = int(capacity)
+        self.routes: List[List[int]] = [[i + 1 for i in t] for t in trips]
+        self.loads: List[List[int]] = [list(map(int, l)) for l in loads]
+        self.where = {}
+        for r, route in enumerate(self.routes):
+            for u in route:
+                self.where.setdefault(u, set()).add(r)
+
+    def route_cost(self, r: int) -> float:
+        D = self.D
+        route = self.routes[r]
+        cost, prev = 0.0, 0
+        for u in route:
+            cost += D[prev][u]
+            prev = u
+        return cost + D[prev][0] if route else 0.0
+
+    def cost(self) -> float:
+        return sum(self.route_cost(r) for r in range(len(self.routes)))
+
+    def load(self, r: int) -> int:
+        return sum(self.loads[r])
+
+    def export(self) -> Tuple[List[List[int]], List[List[int]]]:
+        trips, loads = [], []
+        for route, load in zip(self.routes, self.loads):
+            if route:
+                trips.append([u - 1 for u in route])
+                loads.append(list(load))
+        return trips, loads
+
+    # -- intra-trip -------------------------------------------------------
+
+    def two_opt(self, r: int) -> bool:
+        D = self.D
+        route = self.routes[r]
+        L = len(route)
+        if L < 2:
+            return False
+        ext = [0] + route + [0]
+        pf = [0.0] * (L + 2)
+        pr = [0.0] * (L + 2)
+        for m in range(L + 1):
+            pf[m + 1] = pf[m] + D[ext[m]][ext[m + 1]]
+            pr[m + 1] = pr[m] + D[ext[m + 1]][ext[m]]
+        for i in range(1, L):
+            a = ext[i - 1]
+            for j in range(i + 1, L + 1):
+                b = ext[j + 1]
+                before = D[a][ext[i]] + (pf[j] - pf[i]) + D[ext[j]][b]
+                after = D[a][ext[j]] + (pr[j] - pr[i]) + D[ext[i]][b]
+                if after < before - _EPS:
+                    route[i - 1:j] = route[i - 1:j][::-1]
+                    loads = self.loads[r]
+                    loads[i - 1:j] = loads[i - 1:j][::-1]
+                    return True
+        return False
+
+    def or_opt(self, r: int) -> bool:
+        D = self.D
+        route = self.routes[r]
+        L = len(route)
+        if L < 2:
+            return False
+        ext = [0] + route + [0]
+        for s in (1, 2, 3):
+            for i in range(1, L - s + 2):
+                first, last = ext[i], ext[i + s - 1]
+                prev, nxt = ext[i - 1], ext[i + s]
+                gain = D[prev][first] + D[last][nxt] - D[prev][nxt]
+                for p in range(L + 1):
+                    if i - 1 <= p <= i + s - 1:
+                        continue
+                    x, y = ext[p], ext[p + 1]
+                    if D[x][first] + D[last][y] - D[x][y] < gain - _EPS:
+                        at = p if p < i - 1 else p - s
+                        for seq in (route, self.loads[r]):
+                            seg = seq[i - 1:i - 1 + s]
+                            del seq[i - 1:i - 1 + s]
+                            seq[at:at] = seg
+                        return True
+        return False
+
+    # -- inter-trip -------------------------------------------------------
+
+    def _gap(self, r: int, pos: int) -> Tuple[int, int]:
+        route = self.routes[r]
+        prev = route[pos - 1] if pos > 0 else 0
+        nxt = route[pos + 1] if pos + 1 < len(route) else 0
+        return prev, nxt
+
+    def _remove(self, r: int, pos: int) -> Tuple[int, int]:
+        u = self.routes[r].pop(pos)
+        amt = self.loads[r].pop(pos)
+        self.where[u].discard(r)
+        return u, amt
+
+    def _insert(self, r: int, pos: int, u: int, amt: int) -> None:
+        self.routes[r].insert(pos, u)
+        self.loads[r].insert(pos, amt)
+        self.where.setdefault(u, set()).add(r)
+
+    def relocate(self, u: int, neighbors: List[int], route_loads: List[int]) -> bool:
+        D = self.D
+        for a in list(self.where.get(u, ())):
+            i = self.routes[a].index(u)
+            amt = self.loads[a][i]
+            prev, nxt = self._gap(a, i)
+            gain = D[prev][u] + D[u][nxt] - D[prev][nxt]
+            # Merge into another trip that already visits u.
+            for b in list(self.where[u]):
+                if b != a and route_loads[b] + amt <= self.capacity and gain > _EPS:
+                    self._remove(a, i)
+                    self.loads[b][self.routes[b].index(u)] += amt
+                    route_loads[a] -= amt
+                    route_loads[b] += amt
+                    return True
+            for w in neighbors:
+                for b in self.where.get(w, ()):
+                    if b == a or u in self.routes[b] or route_loads[b] + amt > self.capacity:
+                        continue
+                    j = self.routes[b].index(w)
+                    for pos in (j, j + 1):
+                        x = self.routes[b][pos - 1] if pos > 0 else 0
+                        y = self.routes[b][pos] if pos < len(self.routes[b]) else 0
+                        if D[x][u] + D[u][y] - D[x][y] < gain - _EPS:
+                            self._remove(a, i)
+                            self._insert(b, pos, u, amt)
+                            route_loads[a] -= amt
+                            route_loads[b] += amt
+                            return True
+        return False
+
+    def swap(self, u: int, neighbors: List[int], route_loads: List[int]) -> bool:
+        D = self.D
+        cap = self.capacity
+        for a in list(self.where.get(u, ())):
+            i = self.routes[a].index(u)
+            au = self.loads[a][i]
+            pa, na = self._gap(a, i)
+            for w in neighbors:
+                for b in list(self.where.get(w, ())):
+                    if b == a or u in self.routes[b] or w in self.routes[a]:
+                        continue
+                    j = self.routes[b].index(w)
+                    bw = self.loads[b][j]
+                    if route_loads[a] - au + bw > cap or route_loads[b] - bw + au > cap:
+                        continue
+                    pb, nb = self._gap(b, j)
+                    delta = (
+                        D[pa][w] + D[w][na] - D[pa][u] - D[u][na]
+                        + D[pb][u] + D[u][nb] - D[pb][w] - D[w][nb]
+                    )
+                    if delta < -_EPS:
+                        self.routes[a][i], self.routes[b][j] = w, u
+                        self.loads[a][i], self.loads[b][j] = bw, au
+                        self.where[u].discard(a)
+                        self.where[u].add(b)
+                        self.where[w].discard(b)
+                        self.where[w].add(a)
+                        route_loads[a] += bw - au
+                        route_loads[b] += au - bw
+                        return True
+        return False
+
+
+def improve_trips(
+    matrix,
+    trips: List[List[int]],
+    loads: List[List[int]],
+    capacity: int,
+    time_budget: float = 1.0,
+    progress: Optional[Callable[[List[List[int]], List[List[int]], float], None]] = None,
+    neighbors: int = 10,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Improve a plan with 2-opt, Or-opt, relocate and swap until a local optimum
+    is reached or `time_budget` seconds have elapsed.
+
+    progress: optional callback invoked as progress(trips, loads, cost) with
+              the best plan so far after every improving round.
+    should_stop: optional callable polled alongside the deadline; returning
+                 True ends the search early with the current plan.
+    Returns (trips, loads) in the same format as the input; capacity is never
+    exceeded and every visit keeps its load.
+    """
+    deadline = time.perf_counter() + max(0.0, float(time_budget))
+    if hasattr(matrix, "neighbor_lists"):
+        # Sparse legs (`vrp_sparse`) index like nested lists and bring their own neighbours.
+        D = matrix
+        nbrs = matrix.neighbor_lists(neighbors)
+    else:
+        M = np.asarray(matrix, dtype=float)
+        D = M.tolist()
+        nbrs = neighbor_lists(M, neighbors)
+    plan = _Plan(D, trips, loads, capacity)
+
+    def out_of_time() -> bool:
+        return time.perf_counter() >= deadline or (should_stop is not None and should_stop())
+
+    while not out_of_time():
+        improved = False
+        for r in range(len(plan.routes)):
+            while not out_of_time() and (plan.two_opt(r) or plan.or_opt(r)):
+                improved = True
+        route_loads = [plan.load(r) for r in range(len(plan.routes))]
+        for u in range(1, len(D)):
+            if out_of_time():
+                break
+            while plan.relocate(u, nbrs[u], route_loads) or plan.swap(u, nbrs[u], route_loads):
+                improved = True
+                if out_of_time():
+                    break
+        if not improved:
+            break
+        if progress is not None:
+            t, l = plan.export()
+            progress(t, l, plan.cost())
+    return plan.export()
@@ -0,0 +1,211 @@
+"""
+Memory-mapped travel-time matrices for recurring location sets.
+
+A fleet that serves mostly the same addresses every day can compute one
+full matrix for the whole set once and keep it on disk. A set is a directory
+holding `seconds.npy` (float32, N x N), an optional `meters.npy` and an
+`index.json` with the location ids and coordinates. The arrays are opened
+with `mmap_mode="r"`, so opening a set costs nothing and a plan reads only
+the rows it touches:
+
+    MatrixStore.create("daily", locations, seconds, meters)   # once
+    store = MatrixStore.open("daily")
+    seconds, meters = store.submatrix([depot] + pickups)      # (n+1)x(n+1)
+    res = solve_vrp(depot, pickups, 100, matrix_store=store)
+
+Locations are matched by their `id` when they have one, otherwise by
+coordinates rounded to `precision` decimals (5 ~= 1 m).
+"""
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.persistent_lru import default_cache_dir
+
+_FORMAT_VERSION = 1
+
+
+def _label(p: Dict[str, Any], precision: int) -> str:
+    return f"{float(p['lat']):.{precision}f},{float(p['lng']):.{precision}f}"
+
+
+def _set_dir(name: str, directory: Optional[str]) -> str:
+    if os.sep in name or name.endswith(".matrix"):
+        return name
+    return os.path.join(directory or os.path.join(default_cache_dir(), "matrix_sets"), f"{name}.matrix")
+
+
+class _StoreLegs:
+    """`legs[a, b]` view of a stored matrix for a list of locations; copies nothing."""
+
+    def __init__(self, array: np.memmap, rows: np.ndarray) -> None:
+        self.array = array
+        self.rows = rows
+        self.shape = (len(rows), len(rows))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, key):
+        a, b = key
+        return float(self.array[self.rows[a], self.rows[b]])
+
+    def pairs(self, a, b) -> np.ndarray:
+        return self.array[self.rows[np.asarray(a)], self.rows[np.asarray(b)]].astype(float)
+
+
+class MatrixStore:
+    """A named, memory-mapped full matrix over a fixed location set."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, "index.json"), encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") != _FORMAT_VERSION:
+            raise RuntimeError(f"{path}: unsupported matrix set version {index.get('version')}")
+        self.precision = int(index["precision"])
+        self.ids: List[Optional[str]] = index["ids"]
+        self.lats: List[float] = index["lats"]
+        self.lngs: List[float] = index["lngs"]
+        n = len(self.lats)
+        self.seconds = np.load(os.path.join(path, "seconds.npy"), mmap_mode="r")
+        meters_path = os.path.join(path, "meters.npy")
+        self.meters = np.load(meters_path, mmap_mode="r") if index.get("meters") else None
+        for arr in (self.seconds, self.meters):
+            if arr is not None and arr.shape != (n, n):
+                raise RuntimeError(f"{path}: matrix shape {arr.shape} does not match {n} locations")
+        self._by_id = {str(i): r for r, i in enumerate(self.ids) if i is not None}
+        self._by_label = {}
+        for r in range(n):
+            self._by_label.setdefault(_label({"lat": self.lats[r], "lng": self.lngs[r]}, self.precision), r)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    @classmethod
+    def open(cls, name: str, directory: Optional[str] = None) -> "MatrixStore":
+        """Open set `name` (in `directory`, default the cache dir) or a set directory path."""
+        return cls(_set_dir(name, directory))
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        locations: Sequence[Dict[str, Any]],
+        seconds,
+        meters=None,
+        directory: Optional[str] = None,
+        precision: int = 5,
+        block_rows: int = 1024,
+    ) -> "MatrixStore":
+        """
+        Write (or replace) a location set and return it opened.
+
+        locations: dicts with lat, lng and optionally id, in matrix order
+        seconds / meters: N x N arrays (anything NumPy can slice by rows,
+                          including another memmap); stored as float32
+        block_rows: rows copied per step, so huge inputs never need a
+                    second full copy in memory
+        """
+        path = _set_dir(name, directory)
+        os.makedirs(path, exist_ok=True)
+        n = len(locations)
+        arrays = {"seconds": seconds, "meters": meters}
+        for key, src in arrays.items():
+            if src is None:
+                continue
+            if tuple(np.shape(src)) != (n, n):
+                raise ValueError(f"{key} must be {n} x {n} for {n} locations")
+            fd, tmp = tempfile.mkstemp(dir=path, prefix=f".{key}-", suffix=".npy")
+            os.close(fd)
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(n, n))
+            for start in range(0, n, block_rows):
+                out[start:start + block_rows] = np.asarray(src[start:start + block_rows], dtype=np.float32)
+            out.flush()
+            del out
+            os.replace(tmp, os.path.join(path, f"{key}.npy"))
+        index = {
+            "version": _FORMAT_VERSION,
+            "precision": int(precision),
+            "meters": meters is not None,
+            "ids": [None if p.get("id") is None else str(p["id"]) for p in locations],
+            "lats": [float(p["lat"]) for p in locations],
+            "lngs": [float(p["lng"]) for p in locations],
+        }
+        # The index is written last: a set is complete once it exists.
+        fd, tmp = tempfile.mkstemp(dir=path, prefix=".index-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, os.path.join(path, "index.json"))
+        return cls(path)
+
+    def row(self, point: Dict[str, Any]) -> int:
+        """Stored row of a location, or -1."""
+        if point.get("id") is not None:
+            r = self._by_id.get(str(point["id"]))
+            if r is not None:
+                return r
+        return self._by_label.get(_label(point, self.precision), -1)
+
+    def rows(self, points: Sequence[Dict[str, Any]]) -> np.ndarray:
+        return np.fromiter((self.row(p) for p in points), dtype=np.int64, count=len(points))
+
+    def covers(self, points: Sequence[Dict[str, Any]]) -> bool:
+        return bool((self.rows(points) >= 0).all())
+
+    def submatrix(self, points: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        (seconds, meters) between `points`, e.g. [depot] + pickups; meters is
+        None when the set has none. Only the k x k requested cells are read.
+        """
+        rows = self.rows(points)
+        missing = int((rows < 0).sum())
+        if missing:
+            raise ValueError(f"{missing} of {len(points)} locations are not in matrix set {self.path}")
+        grid = np.ix_(rows, rows)
+        return self.seconds[grid], None if self.meters is None else self.meters[grid]
+
+    def legs(self, points: Sequence[Dict[str, Any]], kind: str = "seconds") -> _StoreLegs:
+        """Lazy `legs[a, b]` over `points` without copying, e.g. as a `NeighborLegs` source."""
+        rows = self.rows(points)
+        if (rows < 0).any():
+            raise ValueError(f"locations missing from matrix set {self.path}")
+        array = self.seconds if kind == "seconds" else self.meters
+        if array is None:
+            raise ValueError(f"matrix set {self.path} has no {kind}")
+        return _StoreLegs(array, rows)
+
+    def lookup_matrix(self, points: Sequence[Dict[str, Any]]) -> List[List[Optional[float]]]:
+        """n x n seconds with None where either endpoint is not stored (diagonal 0)."""
+        rows = self.rows(points)
+        known = np.flatnonzero(rows >= 0)
+        out: List[List[Optional[float]]] = [[None] * len(points) for _ in points]
+        if len(known):
+            block = self.seconds[np.ix_(rows[known], rows[known])].astype(float).round(1).tolist()
+            for a, i in enumerate(known.tolist()):
+                row = out[i]
+                for b, j in enumerate(known.tolist()):
+                    row[j] = block[a][b]
+        for i in range(len(points)):
+            out[i][i] = 0.0
+        return out
+
+
+_default_store: Optional[MatrixStore] = None
+_default_lock = threading.Lock()
+
+
+def default_matrix_store() -> Optional[MatrixStore]:
+    """Set named by `SPCTA_MATRIX_SET` (a name in the cache dir or a path), or None."""
+    global _default_store
+    name = os.environ.get("SPCTA_MATRIX_SET")
+    if not name:
+        return None
+    with _default_lock:
+        if _default_store is None:
+            _default_store = MatrixStore.open(name)
+        return _default_store
@@ -0,0 +1,404 @@
+"""
+In-process VRP engine mirroring `cpp_backend/vrp_solver.cpp`.
+
+Used when the compiled solver is not available. The travel-time matrix is
+built with NumPy broadcasting and the greedy capacity split runs on arrays,
+so a few hundred pickups solve in milliseconds. Results have the same JSON
+shape as the C++ CLI output.
+"""
+import math
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+# Approximate driving speed (~40 km/h) used by every fallback in the project.
+METERS_PER_SECOND = 11.11
+
+
+def haversine_matrix(lats, lngs) -> np.ndarray:
+    """Pairwise haversine distances in meters for the given coordinates."""
+    phi = np.radians(np.asarray(lats, dtype=float))
+    lmb = np.radians(np.asarray(lngs, dtype=float))
+    dphi = phi[None, :] - phi[:, None]
+    dlmb = lmb[None, :] - lmb[:, None]
+    cos_phi = np.cos(phi)
+    h = np.sin(dphi / 2.0) ** 2 + (cos_phi[:, None] * cos_phi[None, :]) * np.sin(dlmb / 2.0) ** 2
+    np.clip(h, 0.0, 1.0, out=h)
+    return 2.0 * EARTH_RADIUS_M * np.arctan2(np.sqrt(h), np.sqrt(1.0 - h))
+
+
+def build_matrices(
+    depot: Dict[str, float], pickups: List[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (meters, seconds) matrices; index 0 is the depot, i+1 is pickup i."""
+    lats = [float(depot["lat"])] + [float(p["lat"]) for p in pickups]
+    lngs = [float(depot["lng"])] + [float(p["lng"]) for p in pickups]
+    meters = haversine_matrix(lats, lngs)
+    return meters, meters / METERS_PER_SECOND
+
+
+class HaversineLegs:
+    """Lazy stand-in for the meters (or, with `scale`, seconds) matrix.
+
+    `legs[a, b]` computes one haversine distance on demand (index 0 is the
+    depot, i+1 is pickup i), so results can be formatted without n x n memory.
+    """
+
+    def __init__(self, depot: Dict[str, float], pickups: List[Dict[str, Any]], scale: float = 1.0) -> None:
+        self.phi = [math.radians(float(depot["lat"]))] + [math.radians(float(p["lat"])) for p in pickups]
+        self.lmb = [math.radians(float(depot["lng"]))] + [math.radians(float(p["lng"])) for p in pickups]
+        self.scale = scale
+
+    def __getitem__(self, ij) -> float:
+        a, b = ij
+        h = (math.sin((self.phi[b] - self.phi[a]) / 2.0) ** 2
+             + math.cos(self.phi[a]) * math.cos(self.phi[b]) * math.sin((self.lmb[b] - self.lmb[a]) / 2.0) ** 2)
+        h = min(max(h, 0.0), 1.0)
+        return 2.0 * EARTH_RADIUS_M * math.atan2(math.sqrt(h), math.sqrt(1.0 - h)) * self.scale
+
+    def pairs(self, a, b) -> np.ndarray:
+        """Vectorised `legs[a[k], b[k]]` for index arrays `a` and `b`."""
+        phi, lmb = np.asarray(self.phi), np.asarray(self.lmb)
+        a, b = np.asarray(a, dtype=np.int64), np.asarray(b, dtype=np.int64)
+        h = np.sin((phi[b] - phi[a]) / 2.0) ** 2 + np.cos(phi[a]) * np.cos(phi[b]) * np.sin((lmb[b] - lmb[a]) / 2.0) ** 2
+        np.clip(h, 0.0, 1.0, out=h)
+        return 2.0 * EARTH_RADIUS_M * np.arctan2(np.sqrt(h), np.sqrt(1.0 - h)) * self.scale
+
+
+# From this many pickups on, haversine solves use `vrp_spatial` and lazy leg
+# metrics instead of dense matrices (same plans, O(n) memory).
+SPATIAL_MIN_PICKUPS = 500
+
+
+# Construction heuristics accepted by `solve_vrp_with_numpy(strategy=...)`.
+STRATEGIES = ("nearest", "savings")
+
+
+def _is_sparse(matrix) -> bool:
+    """True for lazy neighbour-list legs such as `vrp_sparse.NeighborLegs`."""
+    return matrix is not None and hasattr(matrix, "neighbor_lists")
+
+
+def _use_spatial(pickups, matrix, improve: bool, spatial: Optional[bool], meters=None) -> bool:
+    if matrix is not None or meters is not None or improve:
+        return False
+    return len(pickups) >= SPATIAL_MIN_PICKUPS if spatial is None else bool(spatial)
+
+
+def _demands(pickups: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array([max(0, int(p.get("demand", 1))) for p in pickups], dtype=np.int64)
+
+
+def iter_greedy_trips(
+    matrix: np.ndarray, demands, capacity: int
+) -> Iterator[Tuple[List[int], List[int]]]:
+    """Nearest-neighbour construction with split deliveries.
+
+    Yields (trip, load) as each trip is closed: trip lists pickup indices
+    (0-based, depot excluded) in visiting order, load[k] is the amount
+    collected at the k-th stop.
+    """
+    remaining = np.array(demands, dtype=np.int64)
+    n = remaining.shape[0]
+    capacity = int(capacity)
+    if n == 0 or capacity <= 0:
+        return
+    times = np.asarray(matrix, dtype=float)[:, 1:]
+    open_mask = remaining > 0
+    left = int(open_mask.sum())
+    while left:
+        cap_left = capacity
+        cur = 0
+        trip: List[int] = []
+        load: List[int] = []
+        while cap_left > 0 and left:
+            row = np.where(open_mask, times[cur], np.inf)
+            best = int(np.argmin(row))
+            if not math.isfinite(row[best]):
+                break
+            take = int(min(remaining[best], cap_left))
+            remaining[best] -= take
+            cap_left -= take
+            if remaining[best] <= 0:
+                open_mask[best] = False
+                left -= 1
+            trip.append(best)
+            load.append(take)
+            cur = best + 1
+        if not trip:
+            break
+        yield trip, load
+
+
+def greedy_trips(
+    matrix: np.ndarray, demands, capacity: int
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """All of `iter_greedy_trips` as (trips, loads)."""
+    trips: List[List[int]] = []
+    loads: List[List[int]] = []
+    for trip, load in iter_greedy_trips(matrix, demands, capacity):
+        trips.append(trip)
+        loads.append(load)
+    return trips, loads
+
+
+def iter_trips_in_order(demands, capacity: int) -> Iterator[Tuple[List[int], List[int]]]:
+    """Manual-order packing: fill trips sequentially in the given order."""
+    capacity = int(capacity)
+    if capacity <= 0:
+        return
+    trip: List[int] = []
+    load: List[int] = []
+    cap_left = capacity
+    for i, d in enumerate(int(x) for x in demands):
+        while d > 0:
+            if cap_left == 0:
+                yield trip, load
+                trip, load, cap_left = [], [], capacity
+            take = min(d, cap_left)
+            d -= take
+            cap_left -= take
+            if trip and trip[-1] == i:
+                load[-1] += take
+            else:
+                trip.append(i)
+                load.append(take)
+    if trip:
+        yield trip, load
+
+
+def split_trips_in_order(demands, capacity: int) -> Tuple[List[List[int]], List[List[int]]]:
+    """All of `iter_trips_in_order` as (trips, loads)."""
+    trips: List[List[int]] = []
+    loads: List[List[int]] = []
+    for trip, load in iter_trips_in_order(demands, capacity):
+        trips.append(trip)
+        loads.append(load)
+    return trips, loads
+
+
+def _round_half_up(x: float) -> int:
+    return int(math.floor(x + 0.5)) if x >= 0 else -int(math.floor(-x + 0.5))
+
+
+def _fmt_miles(meters: float) -> str:
+    return f"{meters / 1609.34:.1f} mi"
+
+
+def _fmt_minutes(seconds: float) -> str:
+    return f"{_round_half_up(seconds / 60.0)} min"
+
+
+def trip_record(
+    pickups: List[Dict[str, Any]],
+    trip: List[int],
+    load: List[int],
+    meters: np.ndarray,
+    seconds: np.ndarray,
+    index: int = 0,
+) -> Dict[str, Any]:
+    """One trip in the solver's JSON shape (also the NDJSON record format)."""
+    items = []
+    total_m = total_s = 0.0
+    carried = 0
+    cur = 0
+    for i, amt in zip(trip, load):
+        m = float(meters[cur, i + 1])
+        s = float(seconds[cur, i + 1])
+        carried += int(amt)
+        items.append({
+            "index": int(i),
+            "name": str(pickups[i].get("name", "")),
+            "lat": round(float(pickups[i]["lat"]), 6),
+            "lng": round(float(pickups[i]["lng"]), 6),
+            "load": int(amt),
+            "cumulativeLoad": carried,
+            "meters": _round_half_up(m),
+            "seconds": _round_half_up(s),
+            "distanceText": _fmt_miles(m),
+            "durationText": _fmt_minutes(s),
+        })
+        total_m += m
+        total_s += s
+        cur = i + 1
+    back_m = float(meters[cur, 0])
+    back_s = float(seconds[cur, 0])
+    total_m += back_m
+    total_s += back_s
+    return {
+        "index": index,
+        "items": items,
+        "load": carried,
+        "totalMeters": _round_half_up(total_m),
+        "totalSeconds": _round_half_up(total_s),
+        "returnMeters": _round_half_up(back_m),
+        "returnSeconds": _round_half_up(back_s),
+        "returnDistanceText": _fmt_miles(back_m),
+        "returnDurationText": _fmt_minutes(back_s),
+    }
+
+
+def format_result(
+    pickups: List[Dict[str, Any]],
+    trips: List[List[int]],
+    loads: List[List[int]],
+    meters: np.ndarray,
+    seconds: np.ndarray,
+) -> Dict[str, Any]:
+    """Render trips in the same JSON shape as the C++ solver."""
+    return {
+        "trips": [
+            trip_record(pickups, trip, load, meters, seconds, t)
+            for t, (trip, load) in enumerate(zip(trips, loads))
+        ]
+    }
+
+
+def iter_vrp_with_numpy(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    optimize: bool = True,
+    matrix: Optional[np.ndarray] = None,
+    spatial: Optional[bool] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield trip records one by one as construction closes each trip."""
+    demands = _demands(pickups)
+    if _is_sparse(matrix):
+        from src.vrp_sparse import iter_greedy_trips_sparse
+
+        meters = HaversineLegs(depot, pickups)
+        if optimize:
+            trips = iter_greedy_trips_sparse(matrix, demands, capacity)
+        else:
+            trips = iter_trips_in_order(demands, capacity)
+        for t, (trip, load) in enumerate(trips):
+            yield trip_record(pickups, trip, load, meters, matrix, t)
+        return
+    if _use_spatial(pickups, matrix, False, spatial):
+        from src.vrp_spatial import iter_greedy_trips_spatial
+
+        meters = HaversineLegs(depot, pickups)
+        seconds = HaversineLegs(depot, pickups, 1.0 / METERS_PER_SECOND)
+        if optimize:
+            trips = iter_greedy_trips_spatial(depot, pickups, demands, capacity)
+        else:
+            trips = iter_trips_in_order(demands, capacity)
+        for t, (trip, load) in enumerate(trips):
+            yield trip_record(pickups, trip, load, meters, seconds, t)
+        return
+    meters, seconds = build_matrices(depot, pickups)
+    if matrix is not None:
+        seconds = np.asarray(matrix, dtype=float)
+    if optimize:
+        trips = iter_greedy_trips(seconds, demands, capacity)
+    else:
+        trips = iter_trips_in_order(demands, capacity)
+    for t, (trip, load) in enumerate(trips):
+        yield trip_record(pickups, trip, load, meters, seconds, t)
+
+
+def solve_vrp_with_numpy(
+    depot: Dict[str, float],
+    pickups: List[Dict[str, Any]],
+    capacity: int,
+    optimize: bool = True,
+    matrix: Optional[np.ndarray] = None,
+    improve: bool = False,
+    time_budget: float = 1.0,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    spatial: Optional[bool] = None,
+    meters: Optional[np.ndarray] = None,
+    sequence: bool = False,
+    strategy: str = "nearest",
+) -> Dict[str, Any]:
+    """
+    Pure-Python/NumPy counterpart of `solve_vrp_with_cpp` with the same
+    arguments and result shape.
+
+    matrix: optional (n+1)x(n+1) travel-time matrix in seconds (index 0 is the
+            depot), or sparse `vrp_sparse.NeighborLegs`. Defaults to
+            haversine distance at ~40 km/h.
+    meters: optional matrix of the same shape for reported leg distances
+            (default haversine meters)
+    improve: run `vrp_local_search.improve_trips` on the constructed plan for up to
+             `time_budget` seconds (ignored for manual order)
+    progress: called with the best-so-far result dict while improving
+    should_stop: polled during improvement; True stops early (see `vrp_async`)
+    spatial: build the greedy plan with the `vrp_spatial` index and no dense
+             matrices; defaults to on from SPATIAL_MIN_PICKUPS pickups when
+             neither `matrix` nor `improve` is given
+    sequence: finally put every trip's stops in optimal order
+              (`vrp_sequence`: exact up to 12 stops, 2-opt/Or-opt above);
+              ignored for manual order
+    strategy: construction heuristic, one of STRATEGIES: "nearest"
+              (nearest-neighbour greedy) or "savings" (Clarke–Wright,
+              `vrp_savings`); ignored for manual order
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown VRP strategy: {strategy}")
+    savings = strategy == "savings"
+    if _use_spatial(pickups, matrix, improve, spatial, meters):
+        if not ((sequence or savings) and optimize):
+            return {"trips": list(iter_vrp_with_numpy(depot, pickups, capacity, optimize, spatial=True))}
+        seconds = HaversineLegs(depot, pickups, 1.0 / METERS_PER_SECOND)
+        if savings:
+            from src.vrp_savings import savings_trips
+
+            trips, loads = savings_trips(seconds, _demands(pickups), capacity)
+        else:
+            from src.vrp_spatial import iter_greedy_trips_spatial
+
+            trips, loads = [], []
+            for trip, load in iter_greedy_trips_spatial(depot, pickups, _demands(pickups), capacity):
+                trips.append(trip)
+                loads.append(load)
+        if sequence:
+            from src.vrp_sequence import sequence_trips
+
+            trips, loads = sequence_trips(seconds, trips, loads)
+        return format_result(pickups, trips, loads, HaversineLegs(depot, pickups), seconds)
+    if _is_sparse(matrix):
+        # Neighbour-list legs: no dense matrix is built on this path.
+        seconds = matrix
+        meters = HaversineLegs(depot, pickups) if meters is None else meters
+    else:
+        straight, seconds = build_matrices(depot, pickups)
+        if matrix is not None:
+            seconds = np.asarray(matrix, dtype=float)
+        meters = straight if meters is None else np.asarray(meters, dtype=float)
+    demands = _demands(pickups)
+    if not optimize:
+        trips, loads = split_trips_in_order(demands, capacity)
+        return format_result(pickups, trips, loads, meters, seconds)
+    if savings:
+        from src.vrp_savings import savings_trips
+
+        trips, loads = savings_trips(seconds, demands, capacity)
+    elif _is_sparse(seconds):
+        from src.vrp_sparse import iter_greedy_trips_sparse
+
+        trips, loads = [], []
+        for trip, load in iter_greedy_trips_sparse(seconds, demands, capacity):
+            trips.append(trip)
+            loads.append(load)
+    else:
+        trips, loads = greedy_trips(seconds, demands, capacity)
+    if improve and trips:
+        from src.vrp_local_search import improve_trips
+
+        report = None
+        if progress is not None:
+            def report(t, l, _cost):
+                progress(format_result(pickups, t, l, meters, seconds))
+        trips, loads = improve_trips(
+            seconds, trips, loads, capacity, time_budget=time_budget, progress=report,
+            should_stop=should_stop,
+        )
+    if sequence:
+        from src.vrp_sequence import sequence_trips
+
+        trips, loads = sequence_trips(seconds, trips, loads)
+    return format_result(pickups, trips, loads, meters, seconds)
@@ -0,0 +1,302 @@
+"""
+Resident `vrp_solver --serve` processes shared across solves.
+
+`SolverPool` starts its workers once and lends one to each request, so a
+solve pays no process start-up. Crashed workers are restarted and the
+request retried once; a worker that misses its timeout is killed and
+replaced. `default_pool()` is a shared instance sized from VRP_POOL_SIZE.
+"""
+import atexit
+import os
+import queue
+import subprocess
+import threading
+from typing import List, Dict, Any, Iterator, Optional
+
+from src.vrp_cpp import _find_solver, _encode_request, _parse_result
+
+
+class _SolverWorker:
+    """One resident `vrp_solver --serve` process.
+
+    A reader thread turns the framed stdout stream into queue items so that
+    requests can wait with a timeout without platform-specific select().
+    Queue items are (status, payload) tuples, or None when the process exits.
+    """
+
+    def __init__(self, solver: str) -> None:
+        self.solver = solver
+        self.proc: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue" = queue.Queue()
+        self.restarts = 0
+        self.start()
+
+    def start(self) -> None:
+        self.proc = subprocess.Popen(
+            [self.solver, "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._responses = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_loop, args=(self.proc, self._responses), daemon=True
+        )
+        reader.start()
+
+    @staticmethod
+    def _read_loop(proc: subprocess.Popen, responses: "queue.Queue") -> None:
+        out = proc.stdout
+        try:
+            while True:
+                header = out.readline()
+                if not header:
+                    break
+                parts = header.decode("utf-8", "ignore").split()
+                if not parts:
+                    continue
+                if parts[0] == "pong":
+                    responses.put(("pong", ""))
+                    continue
+                size = int(parts[1]) if len(parts) > 1 else 0
+                body = out.read(size) if size else b""
+                if len(body) < size:
+                    break
+                responses.put((parts[0], body.decode("utf-8", "ignore")))
+        except Exception:
+            pass
+        responses.put(None)
+
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def stop(self, kill: bool = False) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        if kill:
+            proc.kill()
+        try:
+            proc.stdin.close()
+        except Exception:
+            pass
+        try:
+            proc.wait(timeout=1.0)
+        except Exception:
+            proc.kill()
+            try:
+                proc.wait(timeout=1.0)
+            except Exception:
+                pass
+
+    def restart(self, kill: bool = False) -> None:
+        self.stop(kill)
+        self.restarts += 1
+        self.start()
+
+    def _send(self, blob: str, timeout: Optional[float]):
+        if not self.alive():
+            self.restart()
+        try:
+            self.proc.stdin.write(blob.encode("utf-8"))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            return None
+        try:
+            return self._responses.get(timeout=timeout)
+        except queue.Empty:
+            # The process is mid-solve in an unknown state; replace it.
+            self.restart(kill=True)
+            raise TimeoutError(f"vrp_solver did not answer within {timeout}s")
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """Health check; an unresponsive process is replaced before returning False."""
+        try:
+            reply = self._send("ping\n", timeout)
+        except TimeoutError:
+            return False
+        if reply != ("pong", ""):
+            self.restart(kill=True)
+            return False
+        return True
+
+    def request(self, blob: str, timeout: Optional[float]) -> str:
+        reply = self._send(blob + "end\n", timeout)
+        if reply is None:
+            self.restart()
+            raise ConnectionError("vrp_solver worker exited while solving")
+        status, payload = reply
+        if status != "ok":
+            raise RuntimeError(f"vrp_solver rejected request: {payload}")
+        return payload
+
+    def stream(self, blob: str, timeout: Optional[float]) -> Iterator[str]:
+        """Send a `stream: 1` request and yield each "trip" frame body.
+
+        `timeout` applies to each frame. A consumer that stops early leaves
+        frames in flight, so the caller must restart the worker in that case.
+        """
+        reply = self._send(blob + "stream: 1\nend\n", timeout)
+        while True:
+            if reply is None:
+                self.restart()
+                raise ConnectionError("vrp_solver worker exited while solving")
+            status, payload = reply
+            if status == "ok":
+                return
+            if status != "trip":
+                raise RuntimeError(f"vrp_solver rejected request: {payload}")
+            yield payload
+            try:
+                reply = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                self.restart(kill=True)
+                raise TimeoutError(f"vrp_solver did not answer within {timeout}s")
+
+
+class SolverPool:
+    """A fixed set of long-lived `vrp_solver` processes.
+
+    Solver lookup happens once here instead of on every call. Each request
+    borrows an idle worker, so up to `size` solves run concurrently; crashed
+    workers are restarted and the request retried once, and a worker that
+    exceeds its timeout is killed and replaced.
+
+        pool = SolverPool(size=2)
+        result = pool.solve(depot, pickups, capacity=100)
+        pool.close()
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        solver_path: Optional[str] = None,
+        timeout: Optional[float] = 30.0,
+    ) -> None:
+        self.solver = solver_path or _find_solver()
+        if not self.solver:
+            raise RuntimeError(
+                "vrp_solver not found. Build C++ backend (see docs) or set VRP_SOLVER_PATH."
+            )
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_SolverWorker]" = queue.Queue()
+        self._workers: List[_SolverWorker] = []
+        self._closed = False
+        for _ in range(max(1, int(size))):
+            w = _SolverWorker(self.solver)
+            self._workers.append(w)
+            self._idle.put(w)
+
+    @property
+    def size(self) -> int:
+        return len(self._workers)
+
+    def solve(
+        self,
+        depot: Dict[str, float],
+        pickups: List[Dict[str, Any]],
+        capacity: int,
+        optimize: bool = True,
+        timeout: Optional[float] = None,
+        matrix=None,
+        meters=None,
+    ) -> Dict[str, Any]:
+        """Same contract as `solve_vrp_with_cpp`, served by a resident worker."""
+        if self._closed:
+            raise RuntimeError("SolverPool is closed")
+        blob = _encode_request(depot, pickups, capacity, optimize, matrix, meters)
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        try:
+            try:
+                out = worker.request(blob, timeout)
+            except ConnectionError:
+                out = worker.request(blob, timeout)
+        finally:
+            self._idle.put(worker)
+        return _parse_result(out)
+
+    def iter_trips(
+        self,
+        depot: Dict[str, float],
+        pickups: List[Dict[str, Any]],
+        capacity: int,
+        optimize: bool = True,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield trip records as the worker closes each trip (see `vrp_cpp.iter_vrp_trips`)."""
+        if self._closed:
+            raise RuntimeError("SolverPool is closed")
+        blob = _encode_request(depot, pickups, capacity, optimize)
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        complete = False
+        try:
+            for attempt in (0, 1):
+                sent = 0
+                try:
+                    for frame in worker.stream(blob, timeout):
+                        sent += 1
+                        yield _parse_result(frame)
+                    complete = True
+                    return
+                except ConnectionError:
+                    if attempt or sent:
+                        raise
+        finally:
+            if not complete and worker.alive():
+                # Abandoned mid-stream: drop the frames still in flight.
+                worker.restart(kill=True)
+            self._idle.put(worker)
+
+    def health_check(self, timeout: float = 2.0) -> int:
+        """Ping idle workers and restart any that are dead or unresponsive.
+
+        Busy workers are skipped. Returns the number of workers restarted.
+        """
+        restarted = 0
+        checked = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked.append(worker)
+            if not worker.alive():
+                worker.restart()
+                restarted += 1
+            elif not worker.ping(timeout):
+                restarted += 1
+        for worker in checked:
+            self._idle.put(worker)
+        return restarted
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for w in self._workers:
+            w.stop()
+
+    def __enter__(self) -> "SolverPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+_default_pool: Optional[SolverPool] = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> SolverPool:
+    """Shared pool sized from `VRP_POOL_SIZE` (default 2), closed at exit."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None or _default_pool._closed:
+            size = int(os.environ.get("VRP_POOL_SIZE", "2") or 2)
+            _default_pool = SolverPool(size=size)
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,73 @@
+"""
+Qt signal delivery for background VRP solves.
+
+`AsyncVRPSolver` wraps `vrp_async.LatestSolveRunner` in a QObject. Solves
+run on worker threads; results, failures and progress are re-emitted on
+the object's own (GUI) thread through a queued connection, and only for
+the newest request.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+
+from src.vrp_async import LatestSolveRunner, SolveHandle
+
+
+class AsyncVRPSolver(QObject):
+    """Qt front-end for background VRP solves.
+
+    `request()` returns immediately with a request id; the solve runs on a
+    worker thread and its outcome comes back on the GUI thread through
+    queued signals. A newer request cancels the older one, and results from
+    superseded requests are never emitted.
+
+        solver = AsyncVRPSolver(self)
+        solver.solved.connect(lambda rid, res: draw_trips_on_maps_widget(maps, res["trips"]))
+        solver.request(depot, pickups, 100, improve=True, time_budget=0.5)
+    """
+
+    solved = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str)
+    progress = pyqtSignal(int, object)
+
+    # Emitted from worker threads; always delivered queued to this object's thread.
+    _delivered = pyqtSignal(int, str, object)
+
+    def __init__(self, parent=None, executor: Optional[ThreadPoolExecutor] = None):
+        super().__init__(parent)
+        self._runner = LatestSolveRunner(executor)
+        self._delivered.connect(self._deliver, Qt.QueuedConnection)
+
+    def request(self, depot, pickups, capacity, **kwargs) -> int:
+        """Start a solve with `vrp_cpp.solve_vrp` arguments; returns its id."""
+        request_id, handle = self._runner.submit(
+            depot, pickups, capacity,
+            progress=lambda rid, res: self._delivered.emit(rid, "progress", res),
+            **kwargs,
+        )
+        handle.add_done_callback(lambda h, rid=request_id: self._finished(rid, h))
+        return request_id
+
+    def cancel(self) -> None:
+        self._runner.cancel()
+
+    def _finished(self, request_id: int, handle: SolveHandle) -> None:
+        if handle.future.cancelled() or handle.cancelled():
+            return
+        err = handle.future.exception()
+        if err is not None:
+            self._delivered.emit(request_id, "failed", str(err))
+        else:
+            self._delivered.emit(request_id, "solved", handle.future.result())
+
+    @pyqtSlot(int, str, object)
+    def _deliver(self, request_id: int, kind: str, payload) -> None:
+        if not self._runner.is_current(request_id):
+            return
+        if kind == "solved":
+            self.solved.emit(request_id, payload)
+        elif kind == "failed":
+            self.failed.emit(request_id, payload)
+        else:
+            self.progress.emit(request_id, payload)
@@ -0,0 +1,129 @@
+"""
+Clarke–Wright savings construction.
+
+Every stop starts on its own depot round trip. Joining the trip that ends at
+i with the trip that starts at j saves D[i, 0] + D[0, j] - D[i, j]. Savings
+are popped from a heap, largest first. A join is applied when i still ends
+its trip, j still starts another one, and the combined load fits the
+vehicle. Trips are directed, so asymmetric road times are respected.
+
+Only pairs among each stop's `neighbors` nearest stops are scored. This keeps
+memory at O(n * neighbors) and works on the lazy `HaversineLegs` as well as
+on dense matrices. Demand above one truckload is served first by full
+out-and-back trips; the remainder joins the savings construction. Trips and
+loads use the `vrp_numpy` convention.
+"""
+import heapq
+from collections import deque
+from typing import List, Tuple
+
+import numpy as np
+
+from src.vrp_spatial import k_nearest
+
+SAVINGS_NEIGHBORS = 40
+
+
+def _values(matrix, a, b) -> np.ndarray:
+    if isinstance(matrix, np.ndarray):
+        return matrix[a, b]
+    if hasattr(matrix, "pairs"):
+        return matrix.pairs(a, b)
+    return np.array([float(matrix[int(x), int(y)]) for x, y in zip(a, b)])
+
+
+def _nearest_pairs(matrix, nodes: np.ndarray, k: int, chunk: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """(a, b) node pairs: each node in `nodes` with its k nearest other nodes, both directions."""
+    m = len(nodes)
+    k = min(k, m - 1)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    if hasattr(matrix, "neighbor_lists"):
+        # Sparse legs (`vrp_sparse`): their stored neighbours, among `nodes`.
+        member = np.zeros(len(matrix), dtype=bool)
+        member[nodes] = True
+        near = matrix.neighbors[nodes, :k]
+        a, b = np.repeat(nodes, near.shape[1]), near.ravel()
+        a, b = a[member[b]], b[member[b]]
+    elif hasattr(matrix, "phi"):
+        # Lazy haversine legs: chord-distance neighbours from the spatial index.
+        near = k_nearest(np.degrees(np.asarray(matrix.phi)[nodes]), np.degrees(np.asarray(matrix.lmb)[nodes]), k)
+        a, b = np.repeat(nodes, k), nodes[near.ravel()]
+    else:
+        if isinstance(matrix, np.ndarray):
+            sub = matrix[np.ix_(nodes, nodes)]
+        else:
+            sub = np.array([[float(matrix[int(x), int(y)]) for y in nodes] for x in nodes])
+        firsts, seconds = [], []
+        for start in range(0, m, chunk):
+            rows = np.arange(start, min(m, start + chunk))
+            d = np.minimum(sub[rows], sub[:, rows].T).astype(float)
+            d[np.arange(len(rows)), rows] = np.inf
+            near = np.argpartition(d, k - 1, axis=1)[:, :k]
+            firsts.append(nodes[np.repeat(rows, k)])
+            seconds.append(nodes[near.ravel()])
+        a, b = np.concatenate(firsts), np.concatenate(seconds)
+    a, b = np.concatenate([a, b]), np.concatenate([b, a])
+    pairs = np.unique(np.stack([a, b], axis=1), axis=0)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def savings_trips(
+    matrix, demands, capacity: int, neighbors: int = SAVINGS_NEIGHBORS
+) -> Tuple[List[List[int]], List[List[int]]]:
+    """
+    Clarke–Wright (parallel) construction; returns (trips, loads).
+
+    matrix: (n+1)x(n+1) travel times, or anything indexable as matrix[a, b]
+            (e.g. `HaversineLegs`, `vrp_sparse.NeighborLegs`); index 0 is the
+            depot
+    neighbors: candidate partners scored per stop
+    """
+    capacity = int(capacity)
+    remaining = [max(0, int(d)) for d in demands]
+    trips: List[List[int]] = []
+    loads: List[List[int]] = []
+    if capacity <= 0:
+        return trips, loads
+    for i, d in enumerate(remaining):
+        while d > capacity:
+            trips.append([i])
+            loads.append([capacity])
+            d -= capacity
+        remaining[i] = d
+
+    nodes = np.array([i + 1 for i, d in enumerate(remaining) if d > 0], dtype=np.int64)
+    route_of = {int(u): int(u) for u in nodes}
+    routes = {int(u): deque([int(u)]) for u in nodes}
+    route_load = {int(u): remaining[int(u) - 1] for u in nodes}
+    if len(nodes) > 1:
+        a, b = _nearest_pairs(matrix, nodes, max(1, int(neighbors)))
+        zeros = np.zeros_like(a)
+        saving = _values(matrix, a, zeros) + _values(matrix, zeros, b) - _values(matrix, a, b)
+        keep = saving > 1e-9
+        heap = list(zip((-saving[keep]).tolist(), a[keep].tolist(), b[keep].tolist()))
+        heapq.heapify(heap)
+        while heap:
+            _, i, j = heapq.heappop(heap)
+            ri, rj = route_of[i], route_of[j]
+            if ri == rj or routes[ri][-1] != i or routes[rj][0] != j:
+                continue
+            if route_load[ri] + route_load[rj] > capacity:
+                continue
+            # Keep the larger deque and relabel the stops of the smaller one.
+            if len(routes[ri]) >= len(routes[rj]):
+                keep_id, gone = ri, rj
+                routes[ri].extend(routes[rj])
+            else:
+                keep_id, gone = rj, ri
+                routes[rj].extendleft(reversed(routes[ri]))
+            for u in routes[gone]:
+                route_of[u] = keep_id
+            route_load[keep_id] += route_load.pop(gone)
+            del routes[gone]
+
+    for rid in sorted(routes, key=lambda r: min(routes[r])):
+        route = list(routes[rid])
+        trips.append([u - 1 for u in route])
+        loads.append([remaining[u - 1] for u in route])
+    return trips, loads
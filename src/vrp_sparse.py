@@ -0,0 +1,160 @@
+"""
+Sparse travel times for very large instances.
+
+`NeighborLegs` keeps, for every node, the legs to its k nearest stops plus
+the full depot row and column. Memory is O(n * k) instead of a dense
+(n+1)^2 matrix. Neighbours are found with the `vrp_spatial` index. Stored
+legs are read once from a lazy source: `HaversineLegs` by default, or any
+object indexable as `legs[a, b]`. Every other pair is computed from that
+source on demand and not kept.
+
+The solvers in `vrp_numpy` accept a `NeighborLegs` as `matrix`. Greedy
+construction walks the neighbour lists; savings, local search and
+sequencing read legs through the same indexing as a dense matrix:
+
+    legs = NeighborLegs(depot, pickups, k=16)
+    res = solve_vrp_with_numpy(depot, pickups, 100, matrix=legs, improve=True)
+
+Node ids follow the `vrp_numpy` convention (depot 0, pickup i at i + 1).
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.vrp_numpy import METERS_PER_SECOND, HaversineLegs
+from src.vrp_spatial import SpatialIndex, k_nearest
+
+SPARSE_NEIGHBORS = 16
+
+
+class _Row(dict):
+    """One node's stored legs; missing targets fall through to the lazy source."""
+
+    __slots__ = ("node", "source")
+
+    def __missing__(self, b):
+        return float(self.source[self.node, b])
+
+
+class NeighborLegs:
+    """k-nearest-neighbour travel times with the depot row and column.
+
+        legs[a, b]           # stored when b is a neighbour of a (or a depot leg)
+        legs[a][b]           # same, as for a nested list
+        legs.neighbors[u]    # node ids of u's nearest stops, closest first
+    """
+
+    def __init__(
+        self,
+        depot: Dict[str, float],
+        pickups: List[Dict[str, Any]],
+        k: int = SPARSE_NEIGHBORS,
+        legs=None,
+    ) -> None:
+        """
+        k: neighbours kept per node (clipped to the number of pickups - 1)
+        legs: lazy full travel-time source (legs[a, b], optionally a
+              vectorised `pairs(a, b)`); default haversine seconds at
+              METERS_PER_SECOND
+        """
+        self.source = HaversineLegs(depot, pickups, 1.0 / METERS_PER_SECOND) if legs is None else legs
+        n = len(pickups)
+        self.shape = (n + 1, n + 1)
+        self.lats = [float(p["lat"]) for p in pickups]
+        self.lngs = [float(p["lng"]) for p in pickups]
+        near = k_nearest(self.lats, self.lngs, k) + 1 if n else np.zeros((0, 0), dtype=np.int64)
+        self.neighbors = np.vstack([np.zeros((1, near.shape[1]), dtype=np.int64), near])
+        nodes = np.arange(1, n + 1)
+        zeros = np.zeros(n, dtype=np.int64)
+        self.depot_out = np.concatenate([[0.0], self.pairs(zeros, nodes)])
+        self.depot_in = np.concatenate([[0.0], self.pairs(nodes, zeros)])
+        rows = np.repeat(nodes, self.neighbors.shape[1])
+        self.values = self.pairs(rows, self.neighbors[1:].ravel()).reshape(near.shape)
+        self.values = np.vstack([np.zeros((1, near.shape[1])), self.values])
+        self._rows: List[Optional[_Row]] = [None] * (n + 1)
+        # Source nearest-neighbour order follows the leg times, not geography.
+        order = np.argsort(self.values[1:], axis=1, kind="stable")
+        self.neighbors[1:] = np.take_along_axis(self.neighbors[1:], order, axis=1)
+        self.values[1:] = np.take_along_axis(self.values[1:], order, axis=1)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.neighbors.nbytes + self.values.nbytes + self.depot_out.nbytes + self.depot_in.nbytes)
+
+    def pairs(self, a, b) -> np.ndarray:
+        """Vectorised `legs[a[k], b[k]]` read from the source."""
+        if hasattr(self.source, "pairs"):
+            return np.asarray(self.source.pairs(a, b), dtype=float)
+        return np.array([float(self.source[int(x), int(y)]) for x, y in zip(a, b)])
+
+    def row(self, a: int) -> _Row:
+        row = self._rows[a]
+        if row is None:
+            row = _Row()
+            row.node, row.source = a, self.source
+            if a == 0:
+                row.update(enumerate(self.depot_out.tolist()))
+            else:
+                row.update(zip(self.neighbors[a].tolist(), self.values[a].tolist()))
+                row[0] = float(self.depot_in[a])
+                row[a] = 0.0
+            self._rows[a] = row
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            a, b = key
+            return self.row(int(a))[int(b)]
+        return self.row(int(key))
+
+    def neighbor_lists(self, k: Optional[int] = None) -> List[List[int]]:
+        """`vrp_local_search.neighbor_lists` from the stored neighbours."""
+        cols = self.neighbors.shape[1] if k is None else min(int(k), self.neighbors.shape[1])
+        return [[]] + self.neighbors[1:, :cols].tolist()
+
+
+def iter_greedy_trips_sparse(legs: NeighborLegs, demands, capacity: int) -> Iterator[Tuple[List[int], List[int]]]:
+    """
+    Nearest-neighbour construction with split deliveries on `NeighborLegs`.
+
+    Each trip starts at the live stop with the shortest depot leg. The next
+    stop is the first live entry of the current stop's neighbour list. When
+    all neighbours are served, the geographically nearest live stop is used.
+    """
+    remaining = [int(d) for d in demands]
+    capacity = int(capacity)
+    if not remaining or capacity <= 0:
+        return
+    index = SpatialIndex(legs.lats, legs.lngs)
+    for i, d in enumerate(remaining):
+        if d <= 0:
+            index.remove(i)
+    from_depot = np.lexsort((np.arange(len(remaining)), legs.depot_out[1:])).tolist()
+    neighbors = legs.neighbors[1:] - 1
+    k = 0
+    while len(index):
+        cap_left = capacity
+        cur = -1
+        trip: List[int] = []
+        load: List[int] = []
+        while cap_left > 0 and len(index):
+            if cur < 0:
+                while not index.alive[from_depot[k]]:
+                    k += 1
+                best = from_depot[k]
+            else:
+                best = next((int(j) for j in neighbors[cur] if index.alive[j]), -1)
+                if best < 0:
+                    best = index.nearest_to(cur)
+            take = min(remaining[best], cap_left)
+            remaining[best] -= take
+            cap_left -= take
+            if remaining[best] <= 0:
+                index.remove(best)
+            trip.append(best)
+            load.append(take)
+            cur = best
+        yield trip, load
@@ -0,0 +1,240 @@
+"""
+Spatial index for nearest-stop queries in the greedy construction.
+
+Points are stored as unit-sphere (chord) coordinates, whose Euclidean
+distance orders pairs exactly like haversine distance. A uniform grid over
+their orthogonal projection onto the tangent plane at the centroid gives
+exact ring pruning: projection never lengthens a distance, so a point
+outside ring r is at least r cell widths away. Served stops are deleted,
+and the grid is rebuilt coarser as it empties, so searches stay local.
+"""
+import heapq
+import math
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _unit_xyz(lats, lngs) -> np.ndarray:
+    phi = np.radians(np.asarray(lats, dtype=float))
+    lmb = np.radians(np.asarray(lngs, dtype=float))
+    cos_phi = np.cos(phi)
+    return np.column_stack([cos_phi * np.cos(lmb), cos_phi * np.sin(lmb), np.sin(phi)])
+
+
+class SpatialIndex:
+    """Nearest-neighbour grid over lat/lng points with deletion.
+
+        index = SpatialIndex(lats, lngs)
+        i = index.nearest(lat, lng)     # -1 when empty
+        index.remove(i)
+    """
+
+    def __init__(self, lats: Sequence[float], lngs: Sequence[float], per_cell: float = 2.0) -> None:
+        xyz = _unit_xyz(lats, lngs)
+        n = xyz.shape[0]
+        self.per_cell = float(per_cell)
+        self.alive = [True] * n
+        self._count = n
+        self._xyz = xyz.tolist()
+        if n:
+            normal = xyz.mean(axis=0)
+            norm = np.linalg.norm(normal)
+            normal = normal / norm if norm > 1e-12 else np.array([0.0, 0.0, 1.0])
+        else:
+            normal = np.array([0.0, 0.0, 1.0])
+        # Orthonormal basis (e1, e2) of the tangent plane.
+        helper = np.array([1.0, 0.0, 0.0]) if abs(normal[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+        e1 = np.cross(normal, helper)
+        e1 /= np.linalg.norm(e1)
+        e2 = np.cross(normal, e1)
+        self._basis = (e1, e2)
+        self._uv = (xyz @ np.column_stack([e1, e2])).tolist() if n else []
+        self._build()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _build(self) -> None:
+        live = [i for i, a in enumerate(self.alive) if a]
+        self._built = len(live)
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        if not live:
+            self._h = 1.0
+            self._bounds = (0, 0, 0, 0)
+            return
+        uv = np.asarray([self._uv[i] for i in live])
+        lo, hi = uv.min(axis=0), uv.max(axis=0)
+        w, hgt = float(hi[0] - lo[0]), float(hi[1] - lo[1])
+        # Area-based cell size, floored by the linear spacing so that nearly
+        # collinear or tiny point sets do not explode into empty cells.
+        self._h = max(
+            math.sqrt(w * hgt * self.per_cell / len(live)),
+            max(w, hgt) * self.per_cell / len(live),
+            1e-9,
+        )
+        inv = 1.0 / self._h
+        cells = self._cells
+        for i in live:
+            u, v = self._uv[i]
+            cells.setdefault((math.floor(u * inv), math.floor(v * inv)), []).append(i)
+        keys = list(cells)
+        self._bounds = (
+            min(k[0] for k in keys), max(k[0] for k in keys),
+            min(k[1] for k in keys), max(k[1] for k in keys),
+        )
+
+    def remove(self, i: int) -> None:
+        if not self.alive[i]:
+            return
+        self.alive[i] = False
+        self._count -= 1
+        u, v = self._uv[i]
+        inv = 1.0 / self._h
+        cell = self._cells.get((math.floor(u * inv), math.floor(v * inv)))
+        if cell is not None:
+            cell.remove(i)
+        if self._count and self._count * 4 < self._built:
+            self._build()
+
+    def _project(self, lat: float, lng: float):
+        x, y, z = _unit_xyz([lat], [lng])[0].tolist()
+        e1, e2 = self._basis
+        return (x, y, z), (x * e1[0] + y * e1[1] + z * e1[2], x * e2[0] + y * e2[1] + z * e2[2])
+
+    def _ring(self, cx: int, cy: int, r: int) -> Iterator[Tuple[int, int]]:
+        x0, x1, y0, y1 = self._bounds
+        if r == 0:
+            yield cx, cy
+            return
+        for x in range(max(cx - r, x0), min(cx + r, x1) + 1):
+            if y0 <= cy - r <= y1:
+                yield x, cy - r
+            if y0 <= cy + r <= y1:
+                yield x, cy + r
+        for y in range(max(cy - r + 1, y0), min(cy + r - 1, y1) + 1):
+            if x0 <= cx - r <= x1:
+                yield cx - r, y
+            if x0 <= cx + r <= x1:
+                yield cx + r, y
+
+    def nearest(self, lat: float, lng: float) -> int:
+        """Index of the closest live point (lowest index on ties), or -1."""
+        if not self._count:
+            return -1
+        (qx, qy, qz), (u, v) = self._project(lat, lng)
+        return self._nearest(qx, qy, qz, u, v)
+
+    def nearest_to(self, i: int) -> int:
+        """Like `nearest`, from the position of point `i` (which may be removed)."""
+        if not self._count:
+            return -1
+        qx, qy, qz = self._xyz[i]
+        u, v = self._uv[i]
+        return self._nearest(qx, qy, qz, u, v)
+
+    def k_nearest_to(self, i: int, k: int) -> List[int]:
+        """Up to `k` live points closest to point `i` (excluding `i`), closest first."""
+        qx, qy, qz = self._xyz[i]
+        u, v = self._uv[i]
+        inv = 1.0 / self._h
+        cx, cy = math.floor(u * inv), math.floor(v * inv)
+        x0, x1, y0, y1 = self._bounds
+        max_r = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        cells, xyz = self._cells, self._xyz
+        best: List[Tuple[float, int]] = []  # max-heap of (-d, -j)
+        r = max(0, x0 - cx, cx - x1, y0 - cy, cy - y1)
+        while r <= max_r:
+            for key in self._ring(cx, cy, r):
+                for j in cells.get(key, ()):
+                    if j == i:
+                        continue
+                    x, y, z = xyz[j]
+                    item = (-((x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2), -j)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif item > best[0]:
+                        heapq.heapreplace(best, item)
+            if len(best) >= k and -best[0][0] <= (r * self._h) ** 2:
+                break
+            r += 1
+        return [-j for _, j in sorted(best, reverse=True)]
+
+    def _nearest(self, qx, qy, qz, u, v) -> int:
+        inv = 1.0 / self._h
+        cx, cy = math.floor(u * inv), math.floor(v * inv)
+        x0, x1, y0, y1 = self._bounds
+        max_r = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        cells, xyz = self._cells, self._xyz
+        best, best_d = -1, math.inf
+        # Rings closer than the occupied bounds are empty; start at the bounds.
+        r = max(0, x0 - cx, cx - x1, y0 - cy, cy - y1)
+        while r <= max_r:
+            for key in self._ring(cx, cy, r):
+                for j in cells.get(key, ()):
+                    x, y, z = xyz[j]
+                    d = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                    if d < best_d or (d == best_d and j < best):
+                        best, best_d = j, d
+            # Anything outside ring r is at least r cells away in the plane.
+            if best >= 0 and best_d <= (r * self._h) ** 2:
+                break
+            r += 1
+        return best
+
+
+def k_nearest(lats: Sequence[float], lngs: Sequence[float], k: int) -> np.ndarray:
+    """(n, k) indices of every point's k nearest other points, closest first; k is clipped to n - 1."""
+    n = len(lats)
+    k = max(0, min(int(k), n - 1))
+    index = SpatialIndex(lats, lngs)
+    out = np.empty((n, k), dtype=np.int64)
+    for i in range(n):
+        out[i] = index.k_nearest_to(i, k)
+    return out
+
+
+def iter_greedy_trips_spatial(
+    depot: Dict[str, float], pickups: List[Dict], demands, capacity: int
+) -> Iterator[Tuple[List[int], List[int]]]:
+    """
+    `vrp_numpy.iter_greedy_trips` on haversine distance without an n x n
+    matrix: the same nearest-neighbour construction with split deliveries,
+    each step answered by `SpatialIndex` instead of a full row scan.
+    """
+    remaining = [int(d) for d in demands]
+    capacity = int(capacity)
+    if not remaining or capacity <= 0:
+        return
+    lats = [float(p["lat"]) for p in pickups]
+    lngs = [float(p["lng"]) for p in pickups]
+    index = SpatialIndex(lats, lngs)
+    for i, d in enumerate(remaining):
+        if d <= 0:
+            index.remove(i)
+    # Every trip starts at the depot: walk a presorted order instead of querying.
+    dq = _unit_xyz([depot["lat"]], [depot["lng"]])[0]
+    dd = ((_unit_xyz(lats, lngs) - dq) ** 2).sum(axis=1)
+    from_depot = np.lexsort((np.arange(len(lats)), dd)).tolist()
+    k = 0
+    while len(index):
+        cap_left = capacity
+        cur = -1
+        trip: List[int] = []
+        load: List[int] = []
+        while cap_left > 0 and len(index):
+            if cur < 0:
+                while not index.alive[from_depot[k]]:
+                    k += 1
+                best = from_depot[k]
+            else:
+                best = index.nearest_to(cur)
+            take = min(remaining[best], cap_left)
+            remaining[best] -= take
+            cap_left -= take
+            if remaining[best] <= 0:
+                index.remove(best)
+            trip.append(best)
+            load.append(take)
+            cur = best
+        yield trip, load
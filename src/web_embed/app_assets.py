@@ -0,0 +1,317 @@
+"""
+Bundled web assets for the embedded map pages, served over `app://`.
+
+The pages under src/web_embed are templates. Each names its scripts and
+stylesheets as `{{asset:maps/map.js}}`. `build_bundle` minifies every
+referenced script and stylesheet and names it by content hash
+(`maps/map.3f9c0a1b2d.min.js`). It then writes the pages, pointing at those
+names, into a bundle directory with a `manifest.json`:
+
+    bundle = default_bundle()                         # rebuilt only when a source changed
+    data, mime, cache_control = bundle.read("maps/map.html")
+
+`app_scheme.AppSchemeHandler` serves a bundle to QtWebEngine. A hashed file
+never changes, so it may be cached forever. Pages are small and re-read on
+every load. When the scheme is not available, `inline_page` builds the old
+single-string page for `setHtml`.
+
+Minification uses `rjsmin` / `rcssmin` when installed. Otherwise it falls
+back to a conservative strip of comments and indentation. Vendored
+libraries ship minified and are copied unchanged.
+
+    python -m src.web_embed.app_assets [directory]    # prebuild a bundle
+"""
+import hashlib
+import importlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.persistent_lru import default_cache_dir
+
+WEB_ROOT = os.path.dirname(os.path.abspath(__file__))
+FONTS_DIR = os.path.join(os.path.dirname(os.path.dirname(WEB_ROOT)), "Fonts")
+PAGES = ("maps/map.html", "mini_map.html")
+STATIC_DIRS = ("vendor/leaflet/images",)
+MANIFEST = "manifest.json"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+STATIC = "public, max-age=86400"
+
+_FORMAT_VERSION = 1
+_HASH_LEN = 10
+_ASSET_REF = re.compile(r"\{\{asset:([^}]+)\}\}")
+_INLINE_SCRIPT = re.compile(r'<script src="\{\{asset:([^}]+)\}\}"></script>')
+_INLINE_STYLE = re.compile(r'<link rel="stylesheet" href="\{\{asset:([^}]+)\}\}">')
+_MIME = {
+    ".html": "text/html",
+    ".js": "application/javascript",
+    ".css": "text/css",
+    ".json": "application/json",
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+    ".ttf": "font/ttf",
+}
+
+
+def mime_type(path: str) -> str:
+    return _MIME.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def _optional(module: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        return None
+
+
+def _strip_js(text: str) -> str:
+    # Whole lines only: a trailing `//` may sit inside a string or URL, and
+    # keeping the line breaks keeps automatic semicolon insertion intact.
+    out = []
+    in_comment = False
+    for line in text.splitlines():
+        s = line.strip()
+        if in_comment:
+            in_comment = "*/" not in s
+            continue
+        if s.startswith("/*") and not s.startswith("/*!") and ("*/" not in s or s.endswith("*/")):
+            in_comment = "*/" not in s
+            continue
+        if s and not s.startswith("//"):
+            out.append(s)
+    return "\n".join(out) + "\n"
+
+
+def _strip_css(text: str) -> str:
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,])\s*", r"\1", text)
+    return text.replace(";}", "}").strip() + "\n"
+
+
+def _vendored(name: str) -> bool:
+    return name.startswith("vendor/")
+
+
+def minify(name: str, text: str) -> str:
+    """Minified script or stylesheet `name`; vendored files are returned as they are."""
+    ext = os.path.splitext(name)[1]
+    if _vendored(name):
+        return text
+    if ext == ".js":
+        rjsmin = _optional("rjsmin")
+        return rjsmin.jsmin(text) if rjsmin else _strip_js(text)
+    if ext == ".css":
+        rcssmin = _optional("rcssmin")
+        return rcssmin.cssmin(text) if rcssmin else _strip_css(text)
+    return text
+
+
+def _read_text(root: str, name: str) -> str:
+    with open(os.path.join(root, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _sources(root: str, pages: Sequence[str], static_dirs: Sequence[str]) -> List[str]:
+    """Every file a bundle is built from: pages, what they reference, static dirs."""
+    names = list(pages)
+    for page in pages:
+        names.extend(_ASSET_REF.findall(_read_text(root, page)))
+    for d in static_dirs:
+        names.extend(f"{d}/{f}" for f in sorted(os.listdir(os.path.join(root, d))))
+    return list(dict.fromkeys(names))
+
+
+def source_fingerprint(
+    root: str = WEB_ROOT, pages: Sequence[str] = PAGES, static_dirs: Sequence[str] = STATIC_DIRS
+) -> str:
+    """Changes whenever a source file or the available minifiers change."""
+    minifiers = ",".join(m for m in ("rjsmin", "rcssmin") if _optional(m))
+    h = hashlib.sha256(f"{_FORMAT_VERSION}:{minifiers}".encode())
+    for name in _sources(root, pages, static_dirs):
+        st = os.stat(os.path.join(root, name))
+        h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:16]
+
+
+def _write(directory: str, name: str, data: bytes) -> None:
+    path = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".asset-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _prune(directory: str, keep: Iterable[str]) -> None:
+    keep = {os.path.normpath(os.path.join(directory, k)) for k in keep}
+    for dirpath, _, filenames in os.walk(directory):
+        for f in filenames:
+            path = os.path.normpath(os.path.join(dirpath, f))
+            if path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def build_bundle(
+    directory: Optional[str] = None,
+    root: str = WEB_ROOT,
+    pages: Sequence[str] = PAGES,
+    static_dirs: Sequence[str] = STATIC_DIRS,
+) -> "AssetBundle":
+    """
+    Build (or rebuild) a bundle and return it opened.
+
+    directory: output directory, default `default_bundle_dir()`; files no
+               longer referenced are removed from it
+    root: directory the page and asset names are relative to
+    pages: HTML templates to rewrite with hashed asset URLs
+    static_dirs: directories copied as they are (e.g. images a stylesheet
+                 references by relative URL)
+    """
+    directory = directory or default_bundle_dir()
+    os.makedirs(directory, exist_ok=True)
+    fingerprint = source_fingerprint(root, pages, static_dirs)
+    files: Dict[str, str] = {}
+    immutable: List[str] = []
+    for name in _sources(root, pages, static_dirs):
+        if name in pages:
+            continue
+        stem, ext = os.path.splitext(name)
+        if ext in (".js", ".css"):
+            data = minify(name, _read_text(root, name)).encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()[:_HASH_LEN]
+            built = f"{stem}.{digest}{ext}" if _vendored(name) else f"{stem}.{digest}.min{ext}"
+            immutable.append(built)
+        else:
+            with open(os.path.join(root, name), "rb") as f:
+                data = f.read()
+            built = name
+        _write(directory, built, data)
+        files[name] = built
+    for page in pages:
+        html = _ASSET_REF.sub(lambda m: "/" + files[m.group(1)], _read_text(root, page))
+        _write(directory, page, html.encode("utf-8"))
+        files[page] = page
+    manifest = {
+        "version": _FORMAT_VERSION,
+        "fingerprint": fingerprint,
+        "pages": list(pages),
+        "files": files,
+        "immutable": immutable,
+    }
+    # The manifest is written last: a bundle is complete once it exists.
+    _write(directory, MANIFEST, json.dumps(manifest, indent=1).encode("utf-8"))
+    _prune(directory, list(files.values()) + [MANIFEST])
+    return AssetBundle(directory)
+
+
+class AssetBundle:
+    """A built bundle directory, read through an in-memory file cache."""
+
+    def __init__(self, directory: str, roots: Optional[Dict[str, str]] = None) -> None:
+        """
+        roots: extra URL prefixes served straight from disk, default
+               {"Fonts": FONTS_DIR} for the fonts map.css loads
+        """
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != _FORMAT_VERSION:
+            raise RuntimeError(f"{directory}: unsupported asset bundle version {manifest.get('version')}")
+        self.fingerprint: str = manifest["fingerprint"]
+        self.files: Dict[str, str] = manifest["files"]
+        self.pages = set(manifest["pages"])
+        self._built = set(self.files.values())
+        self._immutable = set(manifest["immutable"])
+        self.roots = {"Fonts": FONTS_DIR} if roots is None else roots
+        self._cache: Dict[str, Tuple[bytes, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def url(self, name: str) -> str:
+        """Path of source asset `name` inside the bundle, e.g. /maps/map.<hash>.min.js."""
+        return "/" + self.files[name]
+
+    def read(self, path: str) -> Optional[Tuple[bytes, str, str]]:
+        """(data, mime type, Cache-Control value) for a request path, or None."""
+        path = path.lstrip("/")
+        with self._lock:
+            hit = self._cache.get(path)
+        if hit is not None:
+            return hit
+        if path in self._built:
+            full = os.path.join(self.directory, path)
+            cache = IMMUTABLE if path in self._immutable else REVALIDATE if path in self.pages else STATIC
+        else:
+            head, _, rest = path.partition("/")
+            base = self.roots.get(head)
+            if base is None or not rest:
+                return None
+            base = os.path.normpath(base)
+            full = os.path.normpath(os.path.join(base, rest))
+            if not full.startswith(base + os.sep):
+                return None
+            cache = STATIC
+        try:
+            with open(full, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        entry = (data, mime_type(path), cache)
+        with self._lock:
+            self._cache[path] = entry
+        return entry
+
+
+def fill_page(html: str, values: Dict[str, object]) -> str:
+    """Replace the page's `__NAME__` placeholders with `values`."""
+    for key, value in values.items():
+        html = html.replace(f"__{key}__", str(value))
+    return html
+
+
+def inline_page(page: str, root: str = WEB_ROOT) -> str:
+    """Page `page` with its scripts and stylesheets inlined, for `setHtml`."""
+    html = _read_text(root, page)
+    html = _INLINE_SCRIPT.sub(lambda m: "<script>" + minify(m.group(1), _read_text(root, m.group(1))) + "</script>", html)
+    return _INLINE_STYLE.sub(lambda m: "<style>" + minify(m.group(1), _read_text(root, m.group(1))) + "</style>", html)
+
+
+def default_bundle_dir() -> str:
+    return os.path.join(default_cache_dir(), "app_assets")
+
+
+_default_bundle: Optional[AssetBundle] = None
+_default_lock = threading.Lock()
+
+
+def default_bundle() -> AssetBundle:
+    """The bundle in `default_bundle_dir()`, rebuilt first if a source changed."""
+    global _default_bundle
+    with _default_lock:
+        if _default_bundle is None:
+            directory = default_bundle_dir()
+            try:
+                bundle = AssetBundle(directory)
+                if bundle.fingerprint != source_fingerprint():
+                    bundle = None
+            except (OSError, ValueError, KeyError, RuntimeError):
+                bundle = None
+            if bundle is None:
+                print(f"Building web assets in {directory}")
+                bundle = build_bundle(directory)
+            _default_bundle = bundle
+        return _default_bundle
+
+
+if __name__ == "__main__":
+    built = build_bundle(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"Built {len(built.files)} files in {built.directory}")
@@ -0,0 +1,138 @@
+"""
+`app://` URL scheme serving the web asset bundle (`app_assets`) to QtWebEngine.
+
+    register_app_scheme()                    # once, before QApplication exists
+    url = app_page_url(page.profile(), "maps/map.html", API_KEY=key)
+    view.setUrl(url)                         # None: fall back to inline_page
+
+Every profile gets the same handler, so widgets on different profiles share
+one bundle and its in-memory file cache. Page templates keep their
+`__NAME__` placeholders on disk. The values for one page travel as a `page`
+token in the URL and are filled in when the page is served. Reloads keep the
+token, so they see the same values.
+
+Pages live on one origin, app://bundle, which is a secure context
+(geolocation works). Set `SPCTA_INLINE_PAGES=1` to keep the previous inlined
+pages on https://localhost, e.g. for an API key restricted to that referrer.
+"""
+import os
+import uuid
+from typing import Dict, Optional
+
+from PyQt5.QtCore import QBuffer, QByteArray, QCoreApplication, QIODevice, QUrl, QUrlQuery
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlSchemeHandler
+
+try:
+    from PyQt5.QtWebEngineCore import QWebEngineUrlScheme
+except ImportError:  # Qt < 5.12
+    QWebEngineUrlScheme = None
+
+from .app_assets import AssetBundle, default_bundle, fill_page
+
+SCHEME = b"app"
+HOST = "bundle"
+
+_registered = False
+_handler: Optional["AppSchemeHandler"] = None
+
+
+def register_app_scheme() -> bool:
+    """Register `app://`. Must run before QApplication is created; False if it cannot."""
+    global _registered
+    if _registered:
+        return True
+    if QWebEngineUrlScheme is None:
+        print("app:// scheme needs Qt 5.12 or newer; map pages will be inlined")
+        return False
+    if QCoreApplication.instance() is not None:
+        print("app:// scheme must be registered before QApplication is created; map pages will be inlined")
+        return False
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    flags = QWebEngineUrlScheme.SecureScheme
+    if hasattr(QWebEngineUrlScheme, "CorsEnabled"):  # Qt 5.14+
+        flags |= QWebEngineUrlScheme.CorsEnabled
+    scheme.setFlags(flags)
+    QWebEngineUrlScheme.registerScheme(scheme)
+    _registered = True
+    return True
+
+
+class AppSchemeHandler(QWebEngineUrlSchemeHandler):
+    def __init__(self, bundle: Optional[AssetBundle] = None, parent=None) -> None:
+        super().__init__(parent)
+        self._bundle = bundle
+        self._pages: Dict[str, Dict[str, str]] = {}
+
+    @property
+    def bundle(self) -> AssetBundle:
+        if self._bundle is None:
+            self._bundle = default_bundle()
+        return self._bundle
+
+    def add_page(self, values: Dict[str, object]) -> str:
+        """Token under which a page load finds its placeholder values."""
+        token = uuid.uuid4().hex
+        self._pages[token] = {k: str(v) for k, v in values.items()}
+        return token
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob) -> None:
+        url = job.requestUrl()
+        if url.host() != HOST or bytes(job.requestMethod()) != b"GET":
+            job.fail(QWebEngineUrlRequestJob.RequestDenied)
+            return
+        try:
+            entry = self.bundle.read(url.path())
+        except Exception as e:
+            print(f"app:// request for {url.path()} failed: {e}")
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+        if entry is None:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        data, mime, cache_control = entry
+        values = self._pages.get(QUrlQuery(url).queryItemValue("page"))
+        if values and mime == "text/html":
+            data = fill_page(data.decode("utf-8"), values).encode("utf-8")
+        # Qt 5 jobs cannot set response headers; hashed names alone keep
+        # caches correct there. Newer bindings get Cache-Control as well.
+        if hasattr(job, "setAdditionalResponseHeaders"):
+            job.setAdditionalResponseHeaders({QByteArray(b"Cache-Control"): QByteArray(cache_control.encode())})
+        buf = QBuffer(job)
+        buf.setData(data)
+        buf.open(QIODevice.ReadOnly)
+        job.reply(mime.encode(), buf)
+
+
+def app_scheme_handler() -> AppSchemeHandler:
+    global _handler
+    if _handler is None:
+        _handler = AppSchemeHandler()
+    return _handler
+
+
+def install_app_scheme(profile) -> bool:
+    """Serve `app://` in `profile` with the shared handler; False when the scheme is unavailable."""
+    if not _registered or os.environ.get("SPCTA_INLINE_PAGES"):
+        return False
+    handler = app_scheme_handler()
+    if profile.urlSchemeHandler(SCHEME) is not handler:
+        profile.installUrlSchemeHandler(SCHEME, handler)
+    return True
+
+
+def app_page_url(profile, page: str, **values) -> Optional[QUrl]:
+    """
+    app:// URL of bundle page `page` for a view in `profile`, or None when
+    the page should be inlined instead.
+
+    values: filled into the page's `__NAME__` placeholders when it is served
+    """
+    if not install_app_scheme(profile):
+        return None
+    handler = app_scheme_handler()
+    handler.bundle  # build or validate now, so a broken bundle falls back here
+    url = QUrl(f"app://{HOST}/{page}")
+    if values:
+        url.setQuery(f"page={handler.add_page(values)}")
+    return url
@@ -0,0 +1,217 @@
+import itertools
+import json
+import threading
+
+import numpy as np
+from PyQt5.QtCore import QFile, QIODevice, QObject, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+from src.places_cache import default_places_cache
+from src.vrp_async import solve_vrp_async
+from src.vrp_cache import default_travel_time_cache
+from src.vrp_numpy import build_matrices
+
+
+def _page_matrix(depot, pickups, rows):
+    """Page travel times as an array; null/missing pairs get the haversine estimate."""
+    _, seconds = build_matrices(depot, pickups)
+    for i, row in enumerate(rows[: len(seconds)]):
+        for j, v in enumerate((row or [])[: len(seconds)]):
+            if isinstance(v, (int, float)) and np.isfinite(v):
+                seconds[i, j] = v
+    return seconds
+
+
+class MapsBridge(QObject):
+    """Python services exposed to map.js as `mapsBridge` over QWebChannel.
+
+    Slots take and return JSON strings; from the page they are called as
+    `mapsBridge.lookupTravelTimes(json, callback)` (see `pyCall` in map.js).
+    Signals push data the other way; map.js connects `tripOverlays` to
+    `receiveTripOverlays` and `vrpEvent` to `receiveVRPEvent`.
+    """
+
+    # JSON messages from `vrp_cpp.trip_overlay_chunks`
+    tripOverlays = pyqtSignal(str)
+    # JSON {requestId, kind, result?|error?} for solves started by `solveVRP`;
+    # kind is "progress", "solved", "failed" or "cancelled"
+    vrpEvent = pyqtSignal(str)
+    # Emitted from solver threads; delivered queued on the GUI thread.
+    _vrpPosted = pyqtSignal(str)
+
+    def __init__(self, parent=None, travel_cache=None, places_cache=None):
+        super().__init__(parent)
+        self.travel_cache = travel_cache or default_travel_time_cache()
+        self.places_cache = places_cache or default_places_cache()
+        self._solves = {}
+        self._solves_lock = threading.Lock()
+        self._solve_ids = itertools.count(1)
+        self._vrpPosted.connect(self._deliverVrpEvent, Qt.QueuedConnection)
+
+    def _post(self, request_id: str, kind: str, **fields) -> None:
+        try:
+            message = json.dumps(dict(fields, requestId=request_id, kind=kind))
+        except Exception as e:
+            message = json.dumps({"requestId": request_id, "kind": "failed", "error": str(e)})
+        self._vrpPosted.emit(message)
+
+    @pyqtSlot(str)
+    def _deliverVrpEvent(self, message: str) -> None:
+        self.vrpEvent.emit(message)
+
+    @pyqtSlot(str, result=str)
+    def solveVRP(self, payload: str) -> str:
+        """
+        {requestId, depot, pickups, capacity, optimize?, improve?, sequence?, strategy?,
+         timeBudget?, matrix?}
+        -> {requestId, accepted}
+
+        The solve runs on a `vrp_async` worker thread (the C++ engine in its
+        own process when available), never on the page's thread. `matrix`
+        is the page's (n+1)x(n+1) travel seconds, with nulls for unknown
+        pairs. The outcome arrives as `vrpEvent` messages.
+        """
+        request_id = None
+        try:
+            req = json.loads(payload)
+            request_id = str(req.get("requestId") or f"py-{next(self._solve_ids)}")
+            depot, pickups = req["depot"], req.get("pickups") or []
+            kwargs = {
+                "optimize": bool(req.get("optimize", True)),
+                "improve": bool(req.get("improve", False)),
+                "sequence": bool(req.get("sequence", False)),
+                "strategy": str(req.get("strategy") or "nearest"),
+                "time_budget": float(req.get("timeBudget", 1.0)),
+                "progress": lambda res: self._post(request_id, "progress", result=res),
+            }
+            if req.get("matrix") and kwargs["optimize"]:
+                kwargs["matrix"] = _page_matrix(depot, pickups, req["matrix"])
+            self.cancelVRP(request_id)
+            with self._solves_lock:
+                handle = solve_vrp_async(depot, pickups, int(req.get("capacity") or 1), **kwargs)
+                self._solves[request_id] = handle
+            handle.add_done_callback(lambda h: self._solve_done(request_id, h))
+            return json.dumps({"requestId": request_id, "accepted": True})
+        except Exception as e:
+            print(f"MapsBridge.solveVRP failed: {e}")
+            return json.dumps({"requestId": request_id, "accepted": False, "error": str(e)})
+
+    def _solve_done(self, request_id: str, handle) -> None:
+        with self._solves_lock:
+            if self._solves.get(request_id) is handle:
+                del self._solves[request_id]
+        if handle.cancelled() or handle.future.cancelled():
+            return  # reported by cancelVRP
+        err = handle.future.exception()
+        if err is not None:
+            self._post(request_id, "failed", error=str(err))
+        else:
+            self._post(request_id, "solved", result=handle.future.result())
+
+    @pyqtSlot(str)
+    def cancelVRP(self, request_id: str) -> None:
+        """Cancel a solve started by `solveVRP`; unknown or finished ids are ignored."""
+        with self._solves_lock:
+            handle = self._solves.pop(request_id, None)
+        if handle is not None:
+            handle.cancel()
+            self._post(request_id, "cancelled")
+
+    @pyqtSlot(str, result=str)
+    def lookupTravelTimes(self, payload: str) -> str:
+        """
+        {points: [{lat,lng}], departure: ms} -> {seconds: n x n with nulls}
+
+        Pairs come from the precomputed matrix set (`SPCTA_MATRIX_SET`) when
+        both ends are in it, then from the travel-time cache.
+        """
+        try:
+            from src.vrp_matrix_store import default_matrix_store
+
+            req = json.loads(payload)
+            departure = req.get("departure")
+            points = req.get("points") or []
+            seconds = self.travel_cache.lookup_matrix(points, departure / 1000.0 if departure else None)
+            store = default_matrix_store()
+            if store is not None:
+                stored = store.lookup_matrix(points)
+                seconds = [
+                    [s if s is not None else c for s, c in zip(srow, crow)]
+                    for srow, crow in zip(stored, seconds)
+                ]
+            return json.dumps({"seconds": seconds})
+        except Exception as e:
+            print(f"MapsBridge.lookupTravelTimes failed: {e}")
+            return json.dumps({"error": str(e)})
+
+    @pyqtSlot(str, result=str)
+    def roadMatrix(self, payload: str) -> str:
+        """{points: [{lat,lng}]} -> {seconds, meters} over the offline road graph, or {error}"""
+        try:
+            from src.road_network import default_road_network
+
+            network = default_road_network()
+            if network is None:
+                return json.dumps({"error": "no road graph configured (SPCTA_ROAD_GRAPH)"})
+            seconds, meters = network.matrix(json.loads(payload).get("points") or [])
+            return json.dumps({"seconds": seconds.round(1).tolist(), "meters": meters.round(1).tolist()})
+        except Exception as e:
+            print(f"MapsBridge.roadMatrix failed: {e}")
+            return json.dumps({"error": str(e)})
+
+    @pyqtSlot(str, result=str)
+    def lookupPlaces(self, payload: str) -> str:
+        """{keys: [...], maxAge: seconds} -> {entries: {key: {t, v}}} for fresh hits"""
+        try:
+            req = json.loads(payload)
+            keys = [str(k) for k in req.get("keys") or []]
+            entries = self.places_cache.lookup(keys, float(req.get("maxAge", 86400)))
+            return json.dumps({"entries": entries})
+        except Exception as e:
+            print(f"MapsBridge.lookupPlaces failed: {e}")
+            return json.dumps({"error": str(e)})
+
+    @pyqtSlot(str)
+    def storePlaces(self, payload: str) -> None:
+        """{entries: [[key, value], ...]}"""
+        try:
+            entries = [tuple(e) for e in json.loads(payload).get("entries") or [] if len(e) == 2]
+            self.places_cache.store(entries)
+        except Exception as e:
+            print(f"MapsBridge.storePlaces failed: {e}")
+
+    @pyqtSlot(str)
+    def storeTravelTimes(self, payload: str) -> None:
+        """{departure: ms, entries: [[oLat, oLng, dLat, dLng, seconds], ...]}"""
+        try:
+            req = json.loads(payload)
+            departure = req.get("departure")
+            entries = [
+                ({"lat": e[0], "lng": e[1]}, {"lat": e[2], "lng": e[3]}, e[4])
+                for e in req.get("entries") or []
+                if len(e) == 5
+            ]
+            self.travel_cache.store(entries, departure / 1000.0 if departure else None)
+        except Exception as e:
+            print(f"MapsBridge.storeTravelTimes failed: {e}")
+
+
+def install_bridge(page, bridge: QObject, name: str = "mapsBridge") -> QWebChannel:
+    """Register `bridge` on `page` and inject qwebchannel.js before page scripts run."""
+    source = QFile(":/qtwebchannel/qwebchannel.js")
+    if source.open(QIODevice.ReadOnly):
+        script = QWebEngineScript()
+        script.setName("qwebchannel")
+        script.setSourceCode(bytes(source.readAll()).decode("utf-8"))
+        script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(False)
+        page.scripts().insert(script)
+        source.close()
+    else:
+        print("qwebchannel.js not found in Qt resources; map page runs without the Python bridge")
+    channel = QWebChannel(page)
+    channel.registerObject(name, bridge)
+    page.setWebChannel(channel)
+    return channel
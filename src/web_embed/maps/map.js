@@ -2,7 +2,7 @@ let map,
   directionsService,
   directionsRenderer,
   origin = null,
-  userMarker = null,
+  positionLayer = null,
   navigating = false,
   placesService,
   geocoder,
@@ -10,7 +10,96 @@ let map,
   initialGeoCentered = false,
   accuracyCircle = null,
   savedLocations = [],
-  vrpSelectedPlace = null;
+  vrpSelectedPlace = null,
+  pyBridge = null;
+
+function initPyBridge() {
+  try {
+    if (typeof QWebChannel === 'undefined' || !window.qt || !qt.webChannelTransport) return;
+    new QWebChannel(qt.webChannelTransport, (channel) => {
+      pyBridge = channel.objects.mapsBridge || null;
+      if (pyBridge && pyBridge.tripOverlays) pyBridge.tripOverlays.connect(receiveTripOverlays);
+      if (pyBridge && pyBridge.vrpEvent) pyBridge.vrpEvent.connect(receiveVRPEvent);
+    });
+  } catch (e) {
+    console.warn('Python bridge unavailable', e);
+  }
+}
+
+// Call a MapsBridge slot with a JSON payload; resolves to the parsed reply,
+// or null when the bridge is missing or the call fails.
+function pyCall(method, payload) {
+  return new Promise((resolve) => {
+    if (!pyBridge || typeof pyBridge[method] !== 'function') { resolve(null); return; }
+    try {
+      pyBridge[method](JSON.stringify(payload), (res) => {
+        try { resolve(res ? JSON.parse(res) : null); } catch (_) { resolve(null); }
+      });
+    } catch (_) {
+      resolve(null);
+    }
+  });
+}
+
+// Solves running in Python (MapsBridge.solveVRP), keyed by request id. Each
+// entry resolves its promise with the result, null on failure (the caller
+// falls back to the in-page solver) or { cancelled: true }.
+const vrpRequests = new Map();
+let vrpRequestSeq = 0,
+  activeVRPRequest = null,
+  vrpCalculation = 0;
+
+function solveVRPInPython(request, onProgress) {
+  return new Promise((resolve) => {
+    if (!pyBridge || typeof pyBridge.solveVRP !== 'function') { resolve(null); return; }
+    cancelVRPInPython();
+    const requestId = `vrp-${Date.now()}-${++vrpRequestSeq}`;
+    vrpRequests.set(requestId, { resolve, onProgress });
+    activeVRPRequest = requestId;
+    try {
+      pyBridge.solveVRP(JSON.stringify({ ...request, requestId }), (res) => {
+        let accepted = false;
+        try { accepted = !!JSON.parse(res).accepted; } catch (_) {}
+        if (!accepted) settleVRPRequest(requestId, null);
+      });
+    } catch (_) {
+      settleVRPRequest(requestId, null);
+    }
+  });
+}
+
+function cancelVRPInPython() {
+  const requestId = activeVRPRequest;
+  if (!requestId) return;
+  activeVRPRequest = null;
+  try { pyBridge && pyBridge.cancelVRP && pyBridge.cancelVRP(requestId); } catch (_) {}
+  settleVRPRequest(requestId, { cancelled: true });
+}
+
+function settleVRPRequest(requestId, value) {
+  const entry = vrpRequests.get(requestId);
+  if (!entry) return;
+  vrpRequests.delete(requestId);
+  if (activeVRPRequest === requestId) activeVRPRequest = null;
+  entry.resolve(value);
+}
+
+function receiveVRPEvent(payload) {
+  let msg;
+  try { msg = typeof payload === 'string' ? JSON.parse(payload) : payload; } catch (_) { return; }
+  const entry = msg && vrpRequests.get(msg.requestId);
+  if (!entry) return; // superseded or already settled
+  if (msg.kind === 'progress') {
+    if (entry.onProgress) entry.onProgress(msg.result);
+  } else if (msg.kind === 'solved') {
+    settleVRPRequest(msg.requestId, msg.result);
+  } else if (msg.kind === 'cancelled') {
+    settleVRPRequest(msg.requestId, { cancelled: true });
+  } else {
+    console.warn('Python VRP solve failed, using the in-page solver.', msg.error);
+    settleVRPRequest(msg.requestId, null);
+  }
+}
 
 function toRad(d) {
   return (d * Math.PI) / 180;
@@ -37,30 +126,12 @@ function bearing(a, b) {
   return ((Math.atan2(y, x) * 180) / Math.PI + 360) % 360;
 }
 
-function updateUser(lat, lng, hd = 0, accuracy = null) {
+function updateUser(lat, lng, hd = null, accuracy = null) {
   const pos = { lat, lng };
-  const icon = {
-    path: "M 0 -26 L 8 0 L 0 -8 L -8 0 Z", // chevron-like arrow
-    fillColor: "#1a73e8",
-    fillOpacity: 1,
-    strokeColor: "#ffffff",
-    strokeWeight: 2,
-    rotation: hd,
-    scale: 1,
-  };
-  if (!userMarker) {
-    userMarker = new google.maps.Marker({
-      map,
-      position: pos,
-      icon,
-      clickable: false,
-      zIndex: 9999,
-    });
-  } else {
-    userMarker.setPosition(pos);
-    userMarker.setIcon(icon);
-    try { userMarker.setZIndex(9999); } catch(_) {}
-  }
+  // One arrow for the whole session (`position_layer.js`): fixes set a target
+  // and the layer glides to it; no icon objects are rebuilt per fix.
+  if (!positionLayer) positionLayer = createPositionLayer(googlePositionAdapter(map), { zIndex: 9999 });
+  positionLayer.update({ lat, lng, heading: hd });
 
   if (typeof accuracy === 'number' && isFinite(accuracy)) {
     if (!accuracyCircle) {
@@ -81,17 +152,19 @@ function updateUser(lat, lng, hd = 0, accuracy = null) {
       accuracyCircle.setRadius(Math.max(accuracy, 5));
     }
   }
-  if (navigating) {
-    map.panTo(pos);
-    map.setZoom(18);
-  }
+  // Zoom in once when navigation starts; after that the camera only follows
+  // when the arrow leaves the deadband.
+  if (navigating && !positionLayer.following()) map.setZoom(18);
+  positionLayer.setFollow(navigating);
 }
 
 function recenter() {
-  if (origin) {
+  const here = (positionLayer && positionLayer.position()) || origin;
+  if (here) {
     navigating = true;
-    map.panTo(origin);
+    map.panTo(here);
     map.setZoom(18);
+    if (positionLayer) positionLayer.setFollow(true);
   }
 }
 
@@ -99,123 +172,298 @@ function rotateCW() {
   map.setHeading(((map.getHeading() || 0) + 90) % 360);
 }
 
-async function searchPlaces() {
-  const q = document.getElementById("dest").value.trim();
-  if (!q) return;
+// Places results are cached in a small in-page LRU and persisted through
+// Python (`MapsBridge.lookupPlaces` / `storePlaces`, `src/places_cache.py`).
+// Searches are keyed by the normalised query ("ac:" for keystroke
+// predictions, "q:" for full text searches) and details by placeId ("d:"),
+// so reopening a result or re-adding a saved place costs no request.
+const PLACES_SEARCH_TTL_MS = 24 * 3600 * 1000;
+const PLACES_DETAILS_TTL_MS = 7 * 24 * 3600 * 1000;
+const PLACES_MEMORY_MAX = 300;
+const PLACES_DEBOUNCE_MS = 250;
+const PLACES_DETAIL_FIELDS = [
+  'name', 'formatted_address', 'formatted_phone_number', 'rating', 'user_ratings_total',
+  'opening_hours', 'geometry', 'photos', 'types',
+];
+const placesMemory = new Map(); // key -> {t, v}; Map order is recency order
+// Photo URLs are signed and short-lived, so records only say whether a place
+// has a photo. The URL is made when it is shown, from this session's
+// PlacePhoto, or from a photos-only details call after a reload.
+const placesPhotos = new Map(); // placeId -> google.maps.places.PlacePhoto
+let autocompleteService = null,
+  placesSessionToken = null;
+
+function placesKey(kind, text) {
+  return kind === 'd' ? `d:${text}` : `${kind}:${String(text).trim().toLowerCase().replace(/\s+/g, ' ')}`;
+}
 
-  const results = document.getElementById("results");
-  results.innerHTML = "";
-  results.style.display = "block";
+function placesMemoryGet(key, ttl) {
+  const hit = placesMemory.get(key);
+  if (!hit) return undefined;
+  placesMemory.delete(key);
+  if (Date.now() - hit.t > ttl) return undefined;
+  placesMemory.set(key, hit);
+  return hit.v;
+}
 
-  try {
-    placesService.textSearch({ query: q }, (pls, status) => {
-      if (status !== google.maps.places.PlacesServiceStatus.OK) {
-        results.innerHTML = '<div class="res">No results found</div>';
-        return;
-      }
-      if (!pls || pls.length === 0) {
-        results.innerHTML = '<div class="res">No results found</div>';
-        return;
-      }
-      pls.forEach((pl) => {
-        const div = document.createElement("div");
-        div.className = "res";
-        div.textContent = pl.name;
-        div.onclick = () => {
-          results.style.display = "none";
-          showInfo(pl.place_id, pl.geometry.location);
-        };
-        results.appendChild(div);
-      });
-    });
-  } catch (error) {
-    console.error("Search error:", error);
-    results.innerHTML = '<div class="res">Search service unavailable</div>';
+function placesMemoryPut(key, value, t = Date.now()) {
+  placesMemory.delete(key);
+  placesMemory.set(key, { t, v: value });
+  while (placesMemory.size > PLACES_MEMORY_MAX) placesMemory.delete(placesMemory.keys().next().value);
+}
+
+// Memory, then the Python store, then `fetcher()`; null results are not cached.
+async function placesCached(key, ttl, fetcher) {
+  const mem = placesMemoryGet(key, ttl);
+  if (mem !== undefined) return mem;
+  const stored = await pyCall('lookupPlaces', { keys: [key], maxAge: ttl / 1000 });
+  const hit = stored && stored.entries ? stored.entries[key] : null;
+  if (hit) {
+    placesMemoryPut(key, hit.v, hit.t * 1000);
+    return hit.v;
+  }
+  const value = await fetcher();
+  if (value != null) {
+    placesMemoryPut(key, value);
+    pyCall('storePlaces', { entries: [[key, value]] });
   }
+  return value;
 }
 
-function showInfo(placeId, location) {
-  try {
-    placesService.getDetails(
-      {
-        placeId: placeId,
-        fields: [
-          "name",
-        "formatted_address",
-        "formatted_phone_number",
-        "rating",
-        "user_ratings_total",
-        "opening_hours",
-        "geometry",
-        "photos",
-        "types",
-      ],
-    },
-    (place, status) => {
-      if (status !== google.maps.places.PlacesServiceStatus.OK) return;
+// Instant provisional results: the longest cached prefix of `q`, filtered to names that still match.
+function placesPrefixHit(q) {
+  const norm = placesKey('ac', q).slice(3);
+  for (let n = norm.length; n > 0; n--) {
+    for (const kind of ['ac', 'q']) {
+      const list = placesMemoryGet(`${kind}:${norm.slice(0, n)}`, PLACES_SEARCH_TTL_MS);
+      if (!list) continue;
+      if (n === norm.length) return list;
+      const matches = list.filter(r => (r.name || '').toLowerCase().includes(norm));
+      if (matches.length) return matches;
+    }
+  }
+  return null;
+}
 
-      const box = document.getElementById("infoBox");
-      box.innerHTML = "";
+function placeRecord(placeId, place) {
+  const loc = place.geometry && place.geometry.location;
+  const photo = place.photos && place.photos.length ? place.photos[0] : null;
+  if (photo) placesPhotoPut(placeId, photo);
+  return {
+    place_id: placeId,
+    name: place.name || '',
+    formatted_address: place.formatted_address || '',
+    formatted_phone_number: place.formatted_phone_number || '',
+    rating: place.rating != null ? place.rating : null,
+    user_ratings_total: place.user_ratings_total || 0,
+    types: place.types || [],
+    location: loc ? { lat: loc.lat(), lng: loc.lng() } : null,
+    has_photo: !!photo,
+  };
+}
 
-      if (place.photos && place.photos.length) {
-        const img = document.createElement("img");
-        img.src = place.photos[0].getUrl({ maxWidth: 300 });
-        box.appendChild(img);
-      }
+function placesPhotoPut(placeId, photo) {
+  placesPhotos.delete(placeId);
+  placesPhotos.set(placeId, photo);
+  while (placesPhotos.size > PLACES_MEMORY_MAX) placesPhotos.delete(placesPhotos.keys().next().value);
+}
 
-      const d = document.createElement("div");
-      d.className = "details";
+function placePhotoUrl(place, maxWidth) {
+  return new Promise((resolve) => {
+    if (!place || !place.has_photo) { resolve(null); return; }
+    const live = placesPhotos.get(place.place_id);
+    if (live) { resolve(live.getUrl({ maxWidth })); return; }
+    try {
+      placesService.getDetails({ placeId: place.place_id, fields: ['photos'] }, (p, status) => {
+        const photo = status === google.maps.places.PlacesServiceStatus.OK && p && p.photos && p.photos.length ? p.photos[0] : null;
+        if (photo) placesPhotoPut(place.place_id, photo);
+        resolve(photo ? photo.getUrl({ maxWidth }) : null);
+      });
+    } catch (e) {
+      resolve(null);
+    }
+  });
+}
 
-      const h2 = document.createElement("h2");
-      h2.textContent = place.name;
-      d.appendChild(h2);
+function placesSessionTokenFor() {
+  try {
+    if (!placesSessionToken) placesSessionToken = new google.maps.places.AutocompleteSessionToken();
+  } catch (_) {}
+  return placesSessionToken || undefined;
+}
 
-      if (place.rating != null) {
-        const rd = document.createElement("div");
-        rd.className = "rating";
-        rd.textContent =
-          place.rating + " ★ (" + (place.user_ratings_total || 0) + ")";
-        d.appendChild(rd);
-      }
+function placeDetails(placeId) {
+  return placesCached(placesKey('d', placeId), PLACES_DETAILS_TTL_MS, () => new Promise((resolve) => {
+    try {
+      const sessionToken = placesSessionTokenFor();
+      placesSessionToken = null; // a details call ends the autocomplete session
+      placesService.getDetails({ placeId, fields: PLACES_DETAIL_FIELDS, sessionToken }, (place, status) => {
+        resolve(status === google.maps.places.PlacesServiceStatus.OK && place ? placeRecord(placeId, place) : null);
+      });
+    } catch (e) {
+      console.error('Place details error:', e);
+      resolve(null);
+    }
+  }));
+}
 
-      if (place.types && place.types.length) {
-        const t = document.createElement("p");
-        t.textContent = place.types[0].replace(/_/g, " ");
-        d.appendChild(t);
-      }
+function placesTextSearch(q) {
+  return new Promise((resolve) => {
+    try {
+      placesService.textSearch({ query: q }, (pls, status) => {
+        const S = google.maps.places.PlacesServiceStatus;
+        if (status === S.ZERO_RESULTS) { resolve([]); return; }
+        if (status !== S.OK || !pls) { resolve(null); return; }
+        resolve(pls.map(pl => ({
+          place_id: pl.place_id,
+          name: pl.name,
+          location: pl.geometry && pl.geometry.location
+            ? { lat: pl.geometry.location.lat(), lng: pl.geometry.location.lng() } : null,
+        })));
+      });
+    } catch (e) {
+      console.error('Search error:', e);
+      resolve(null);
+    }
+  });
+}
 
-      if (place.formatted_address) {
-        const a = document.createElement("p");
-        a.textContent = place.formatted_address;
-        d.appendChild(a);
-      }
+function placesPredictions(q) {
+  if (!autocompleteService) return placesTextSearch(q);
+  return new Promise((resolve) => {
+    try {
+      const request = { input: q, sessionToken: placesSessionTokenFor() };
+      try { if (map && map.getBounds()) request.locationBias = map.getBounds(); } catch (_) {}
+      autocompleteService.getPlacePredictions(request, (preds, status) => {
+        const S = google.maps.places.PlacesServiceStatus;
+        if (status === S.ZERO_RESULTS) { resolve([]); return; }
+        if (status !== S.OK || !preds) { resolve(null); return; }
+        resolve(preds.map(p => ({ place_id: p.place_id, name: p.description, location: null })));
+      });
+    } catch (_) {
+      resolve(null);
+    }
+  });
+}
 
-      if (place.formatted_phone_number) {
-        const p = document.createElement("p");
-        p.textContent = place.formatted_phone_number;
-        d.appendChild(p);
-      }
+// Search-as-you-type for one input. Keystrokes are debounced into prediction
+// requests and Enter runs a full text search immediately. Every run takes a
+// new generation, and answers for an older generation are dropped; the
+// Places JS API cannot abort a request, so this is how superseded ones are
+// cancelled. render(list|null, query, provisional) gets cached prefix hits at
+// once and the real answer when it arrives (null: search failed).
+function placesSearchBox(input, render) {
+  let timer = 0, generation = 0;
+  function run(full) {
+    const q = (input.value || '').trim();
+    const gen = ++generation;
+    clearTimeout(timer);
+    if (!q) { render([], q, false); return; }
+    const provisional = placesPrefixHit(q);
+    if (provisional) render(provisional, q, true);
+    const go = async () => {
+      const key = placesKey(full ? 'q' : 'ac', q);
+      const list = await placesCached(key, PLACES_SEARCH_TTL_MS, () => (full ? placesTextSearch(q) : placesPredictions(q)));
+      if (gen === generation) render(list, q, false);
+    };
+    if (full) go(); else timer = setTimeout(go, PLACES_DEBOUNCE_MS);
+  }
+  input.addEventListener('input', () => run(false));
+  return {
+    search: () => run(true),
+    cancel: () => { generation++; clearTimeout(timer); },
+  };
+}
 
-      box.appendChild(d);
+let destSearch = null;
 
-      const btn = document.createElement("button");
-      btn.className = "directions-btn";
-      btn.textContent = "Directions";
-      btn.onclick = () => {
-        box.style.display = "none";
-        routeTo(location);
-      };
-      box.appendChild(btn);
+function renderDestResults(list, q, provisional) {
+  const results = document.getElementById("results");
+  if (!q) { results.innerHTML = ""; results.style.display = "none"; return; }
+  results.style.display = "block";
+  if (!list) { results.innerHTML = '<div class="res">Search service unavailable</div>'; return; }
+  if (!list.length) {
+    if (!provisional) results.innerHTML = '<div class="res">No results found</div>';
+    return;
+  }
+  results.innerHTML = "";
+  list.forEach((pl) => {
+    const div = document.createElement("div");
+    div.className = "res";
+    div.textContent = pl.name;
+    div.onclick = () => {
+      if (destSearch) destSearch.cancel();
+      results.style.display = "none";
+      showInfo(pl.place_id, pl.location);
+    };
+    results.appendChild(div);
+  });
+}
 
-      box.style.display = "block";
-    }
-  );
-  } catch (error) {
-    console.error("Place details error:", error);
-    const box = document.getElementById("infoBox");
+function searchPlaces() {
+  if (destSearch) destSearch.search();
+}
+
+async function showInfo(placeId, location) {
+  const place = await placeDetails(placeId);
+  const box = document.getElementById("infoBox");
+  if (!place) {
     box.innerHTML = '<div class="details"><h2>Error</h2><p>Unable to load place details</p></div>';
     box.style.display = "block";
+    return;
+  }
+  box.innerHTML = "";
+
+  if (place.has_photo) {
+    const img = document.createElement("img");
+    box.appendChild(img);
+    placePhotoUrl(place, 300).then((url) => { if (url) img.src = url; else img.remove(); });
+  }
+
+  const d = document.createElement("div");
+  d.className = "details";
+
+  const h2 = document.createElement("h2");
+  h2.textContent = place.name;
+  d.appendChild(h2);
+
+  if (place.rating != null) {
+    const rd = document.createElement("div");
+    rd.className = "rating";
+    rd.textContent = place.rating + " ★ (" + (place.user_ratings_total || 0) + ")";
+    d.appendChild(rd);
+  }
+
+  if (place.types && place.types.length) {
+    const t = document.createElement("p");
+    t.textContent = place.types[0].replace(/_/g, " ");
+    d.appendChild(t);
+  }
+
+  if (place.formatted_address) {
+    const a = document.createElement("p");
+    a.textContent = place.formatted_address;
+    d.appendChild(a);
   }
+
+  if (place.formatted_phone_number) {
+    const p = document.createElement("p");
+    p.textContent = place.formatted_phone_number;
+    d.appendChild(p);
+  }
+
+  box.appendChild(d);
+
+  const btn = document.createElement("button");
+  btn.className = "directions-btn";
+  btn.textContent = "Directions";
+  btn.onclick = () => {
+    box.style.display = "none";
+    routeTo(location || place.location);
+  };
+  box.appendChild(btn);
+
+  box.style.display = "block";
 }
 
 function routeTo(dest) {
@@ -279,10 +527,17 @@ function init() {
     geocoder = null;
   }
 
+  try {
+    autocompleteService = new google.maps.places.AutocompleteService();
+  } catch (e) {
+    autocompleteService = null;
+  }
+
 
 
 
   try { document.getElementById("recenter").onclick = recenter; } catch(_) {}
+  destSearch = placesSearchBox(document.getElementById("dest"), renderDestResults);
   document.getElementById("go").onclick = searchPlaces;
   document.getElementById("dest").addEventListener("keydown", (e) => {
     if (e.key === "Enter") searchPlaces();
@@ -434,58 +689,56 @@ function initVRPPanel() {
     renderSavedList();
     try { modalSearch && modalSearch.focus(); } catch(_){}
   }
-  function closeVRPAddModal() { if (modal) modal.style.display = 'none'; }
+  function closeVRPAddModal() { if (modal) modal.style.display = 'none'; if (vrpSearch) vrpSearch.cancel(); }
   if (modalClose) modalClose.onclick = closeVRPAddModal;
+  function renderVRPResults(list, q, provisional) {
+    if (!modalResults) return;
+    if (!q) { modalResults.innerHTML = ''; return; }
+    if (!list) { modalResults.innerHTML = '<div class="res">Search unavailable</div>'; return; }
+    if (!list.length) {
+      if (!provisional) modalResults.innerHTML = '<div class="res">No results found</div>';
+      return;
+    }
+    modalResults.innerHTML = '';
+    list.forEach((pl) => {
+      const div = document.createElement('div');
+      div.className = 'res';
+      div.textContent = pl.name;
+      div.onclick = () => { if (vrpSearch) vrpSearch.cancel(); loadVRPPlaceInfo(pl.place_id); };
+      modalResults.appendChild(div);
+    });
+  }
+  const vrpSearch = modalSearch ? placesSearchBox(modalSearch, renderVRPResults) : null;
   function runVRPSearch() {
-    const q = (modalSearch?.value||'').trim();
-    if (modalResults) modalResults.innerHTML = '';
     if (modalInfo) modalInfo.innerHTML = '';
     vrpSelectedPlace = null;
-    if (!q) return;
-    try {
-      placesService.textSearch({ query: q }, (pls, status) => {
-        if (status !== google.maps.places.PlacesServiceStatus.OK || !pls?.length) {
-          if (modalResults) modalResults.innerHTML = '<div class="res">No results found</div>';
-          return;
-        }
-        pls.forEach((pl) => {
-          const div = document.createElement('div');
-          div.className = 'res';
-          div.textContent = pl.name;
-          div.onclick = () => loadVRPPlaceInfo(pl.place_id, pl.geometry?.location);
-          modalResults && modalResults.appendChild(div);
-        });
-      });
-    } catch (e) {
-      if (modalResults) modalResults.innerHTML = '<div class="res">Search unavailable</div>';
-    }
+    if (vrpSearch) vrpSearch.search();
   }
   if (modalSearchBtn) modalSearchBtn.onclick = runVRPSearch;
   if (modalSearch) modalSearch.addEventListener('keydown', (e)=>{ if (e.key==='Enter') runVRPSearch(); });
-  function loadVRPPlaceInfo(placeId) {
-    try {
-      placesService.getDetails({ placeId, fields: ['name','formatted_address','formatted_phone_number','rating','user_ratings_total','opening_hours','geometry','photos'] }, (place, status) => {
-        if (status !== google.maps.places.PlacesServiceStatus.OK) return;
-        vrpSelectedPlace = place;
-        if (modalPlaceName) modalPlaceName.value = place.name || '';
-        if (modalInfo) {
-          modalInfo.innerHTML = '';
-          const box = document.createElement('div');
-          const img = (place.photos && place.photos.length) ? `<img style="width:100%;border-radius:8px;" src="${place.photos[0].getUrl({maxWidth:600})}">` : '';
-          box.innerHTML = `${img}<div style="padding:8px 0;"><div style=\"font-size:16px;font-weight:600;\">${escapeHtml(place.name||'')}</div>${place.rating!=null?`<div style=\"font-size:12px;color:#bbb;\">${place.rating} ★ (${place.user_ratings_total||0})</div>`:''}${place.formatted_address?`<div style=\"font-size:13px;color:#ddd;\">${escapeHtml(place.formatted_address)}</div>`:''}${place.formatted_phone_number?`<div style=\"font-size:13px;color:#ddd;\">${escapeHtml(place.formatted_phone_number)}</div>`:''}</div>`;
-          modalInfo.appendChild(box);
-        }
-      });
-    } catch (_) {}
+  async function loadVRPPlaceInfo(placeId) {
+    const place = await placeDetails(placeId);
+    if (!place) return;
+    vrpSelectedPlace = place;
+    if (modalPlaceName) modalPlaceName.value = place.name || '';
+    if (modalInfo) {
+      const photo = await placePhotoUrl(place, 600);
+      if (vrpSelectedPlace !== place) return;
+      modalInfo.innerHTML = '';
+      const box = document.createElement('div');
+      const img = photo ? `<img style="width:100%;border-radius:8px;" src="${escapeHtml(photo)}">` : '';
+      box.innerHTML = `${img}<div style="padding:8px 0;"><div style=\"font-size:16px;font-weight:600;\">${escapeHtml(place.name||'')}</div>${place.rating!=null?`<div style=\"font-size:12px;color:#bbb;\">${place.rating} ★ (${place.user_ratings_total||0})</div>`:''}${place.formatted_address?`<div style=\"font-size:13px;color:#ddd;\">${escapeHtml(place.formatted_address)}</div>`:''}${place.formatted_phone_number?`<div style=\"font-size:13px;color:#ddd;\">${escapeHtml(place.formatted_phone_number)}</div>`:''}</div>`;
+      modalInfo.appendChild(box);
+    }
   }
   if (modalAddSelected) modalAddSelected.onclick = () => {
-    if (!vrpSelectedPlace || !vrpSelectedPlace.geometry || !vrpSelectedPlace.geometry.location) return;
-    const ll = vrpSelectedPlace.geometry.location;
+    if (!vrpSelectedPlace || !vrpSelectedPlace.location) return;
+    const ll = vrpSelectedPlace.location;
     const row = addPickupRow();
     const locInput = row.querySelector('.vrpLoc');
     if (locInput) {
-      locInput.dataset.lat = ll.lat();
-      locInput.dataset.lng = ll.lng();
+      locInput.dataset.lat = ll.lat;
+      locInput.dataset.lng = ll.lng;
       const nm = (modalPlaceName?.value || vrpSelectedPlace.name || '').trim();
       locInput.dataset.name = nm;
       locInput.value = nm || (vrpSelectedPlace.formatted_address || '');
@@ -493,11 +746,11 @@ function initVRPPanel() {
     closeVRPAddModal();
   };
   if (modalSaveSelected) modalSaveSelected.onclick = () => {
-    if (!vrpSelectedPlace || !vrpSelectedPlace.geometry || !vrpSelectedPlace.geometry.location) return;
-    const ll = vrpSelectedPlace.geometry.location;
+    if (!vrpSelectedPlace || !vrpSelectedPlace.location) return;
+    const ll = vrpSelectedPlace.location;
     const name = (modalPlaceName?.value||'').trim() || vrpSelectedPlace.name || '';
     if (!name) return;
-    addSavedLocation({ name, lat: ll.lat(), lng: ll.lng(), place_id: vrpSelectedPlace.place_id || '' });
+    addSavedLocation({ name, lat: ll.lat, lng: ll.lng, place_id: vrpSelectedPlace.place_id || '' });
     renderSavedList();
   };
   function renderSavedList() {
@@ -663,6 +916,9 @@ function readVRPInputs() {
 async function calculateVRP() {
   const summary = document.getElementById('vrpSummary');
   summary.textContent = 'Calculating…';
+  const calculation = ++vrpCalculation;
+  cancelVRPInPython();
+  cancelPlanner();
 
   clearVRPRoutes();
   setVRPInfo([]);
@@ -677,234 +933,547 @@ async function calculateVRP() {
   const points = [depotLL, ...pickups.map(p => ({ lat: p.lat, lng: p.lng }))];
 
   const manual = !!document.getElementById('vrpManualOrder')?.checked;
-  let trips;
-  if (manual) {
-    trips = splitTripsByCapacityInOrder(pickups.map(p=>p.demand), capacity);
-  } else {
-    let matrix;
+  let trips, matrix = null;
+  if (!manual) {
     try {
       matrix = await buildDurationMatrix(points);
     } catch (e) {
-      console.warn('DistanceMatrix failed, falling back to haversine distances.', e);
-      matrix = buildHaversineMatrix(points);
+      // Python and the planner worker both fall back to haversine without a matrix.
+      console.warn('Duration matrix failed, falling back to haversine distances.', e);
     }
-    trips = solveVRPGreedy(matrix, pickups.map(p => p.demand), capacity);
   }
+  if (calculation !== vrpCalculation) return;
 
-  await drawTrips(trips, depotLL, pickups, !manual);
+  // Solve in Python off the page thread; the in-page solvers are the fallback.
+  const solved = await solveVRPInPython(
+    { depot: depotLL, pickups, capacity, optimize: !manual, sequence: !manual, matrix },
+    (best) => { summary.textContent = `Improving… ${best.trips.length} trips`; },
+  );
+  if (calculation !== vrpCalculation || (solved && solved.cancelled)) return;
+  const sequenced = !!(solved && Array.isArray(solved.trips));
+  if (sequenced) {
+    trips = solved.trips.map(t => t.items.map(it => it.index));
+  } else {
+    trips = await runPlanner({
+      kind: manual ? 'inOrder' : 'greedy',
+      demands: pickups.map(p => p.demand),
+      capacity,
+      matrix: matrix ? flattenMatrix(matrix) : null,
+      lats: points.map(p => p.lat),
+      lngs: points.map(p => p.lng),
+    }, (_trip, index) => { summary.textContent = `Planning… ${index + 1} trips`; });
+    if (calculation !== vrpCalculation) return;
+    if (!trips) {
+      summary.textContent = 'Planning failed.';
+      return;
+    }
+  }
+
+  // Python already put each trip's stops in order (Held–Karp / local
+  // search); Google may re-order waypoints only for the in-page fallback.
+  await drawTrips(trips, depotLL, pickups, !manual && !sequenced);
 
   const totalTrips = trips.length;
   const totalStops = trips.reduce((a,t)=>a+t.length,0);
   summary.textContent = `Trips: ${totalTrips} • Stops (with repeats across trips): ${totalStops}`;
 }
 
-function buildHaversineMatrix(points) {
+// Distance Matrix limits for the JS API: at most 25 origins, 25 destinations
+// and 100 elements per request.
+const DM_MAX_SIDE = 25,
+  DM_MAX_ELEMENTS = 100,
+  DM_CONCURRENCY = 4,
+  DM_MAX_RETRIES = 5;
+
+// n x n durations in seconds: cached pairs first, then the missing pairs in
+// API-legal tiles. Pairs of tiles that still fail come from the offline road
+// graph, or the haversine estimate, so one bad tile no longer degrades the
+// whole instance.
+async function buildDurationMatrix(points) {
   const n = points.length;
-  const M = Array.from({length:n}, ()=>Array(n).fill(0));
+  const departure = Date.now();
+  const M = Array.from({length:n}, ()=>Array(n).fill(null));
+  const cached = await pyCall('lookupTravelTimes', { points, departure });
+  const rows = cached && Array.isArray(cached.seconds) ? cached.seconds : null;
+  for (let i=0;i<n;i++) {
+    M[i][i] = 0;
+    for (let j=0;j<n;j++) {
+      const v = rows && rows[i] ? rows[i][j] : null;
+      if (i !== j && typeof v === 'number' && isFinite(v)) M[i][j] = v;
+    }
+  }
+
+  // Only request origins/destinations that still have uncached pairs.
+  const oIdx = [], dSet = new Set();
   for (let i=0;i<n;i++) {
+    let rowMissing = false;
     for (let j=0;j<n;j++) {
-      if (i===j) { M[i][j]=0; continue; }
-      const dM = dist(points[i], points[j]);
-      M[i][j] = dM / 11.11; // seconds
+      if (M[i][j] === null) { rowMissing = true; dSet.add(j); }
+    }
+    if (rowMissing) oIdx.push(i);
+  }
+  if (!oIdx.length) return M;
+
+  const dIdx = Array.from(dSet).sort((a,b)=>a-b);
+  const tiles = planMatrixTiles(oIdx, dIdx, (i, j) => M[i][j] === null);
+  const entries = [];
+  let failed = 0;
+  await runWithConcurrency(tiles, DM_CONCURRENCY, async ({ rows: ti, cols: tj }) => {
+    let block;
+    try {
+      block = await fetchDistanceMatrixTile(ti.map(i => points[i]), tj.map(j => points[j]), departure);
+    } catch (e) {
+      failed++;
+      console.warn(`DistanceMatrix tile ${ti.length}x${tj.length} failed.`, e);
+      return;
+    }
+    for (let a=0;a<ti.length;a++) {
+      for (let b=0;b<tj.length;b++) {
+        const i = ti[a], j = tj[b], v = block[a][b];
+        if (M[i][j] !== null) continue;
+        M[i][j] = v;
+        if (isFinite(v)) entries.push([points[i].lat, points[i].lng, points[j].lat, points[j].lng, v]);
+      }
+    }
+  });
+  if (entries.length) pyCall('storeTravelTimes', { departure, entries });
+
+  if (failed) {
+    const road = await pyCall('roadMatrix', { points });
+    const R = road && Array.isArray(road.seconds) ? road.seconds : null;
+    for (let i=0;i<n;i++) {
+      for (let j=0;j<n;j++) {
+        if (M[i][j] !== null) continue;
+        const v = R && R[i] ? R[i][j] : null;
+        M[i][j] = (typeof v === 'number' && isFinite(v)) ? v : dist(points[i], points[j]) / 11.11;
+      }
     }
   }
   return M;
 }
 
-function buildDurationMatrix(points) {
+// Cover the missing pairs of origins x destinations with blocks of at most
+// DM_MAX_ELEMENTS, trimmed to the rows and columns that still need values.
+function planMatrixTiles(oIdx, dIdx, missing) {
+  const dc = Math.min(DM_MAX_SIDE, dIdx.length);
+  const oc = Math.min(DM_MAX_SIDE, Math.max(1, Math.floor(DM_MAX_ELEMENTS / dc)));
+  const tiles = [];
+  for (let a=0;a<oIdx.length;a+=oc) {
+    for (let b=0;b<dIdx.length;b+=dc) {
+      const rows = oIdx.slice(a, a + oc), cols = dIdx.slice(b, b + dc);
+      const needRows = rows.filter(i => cols.some(j => missing(i, j)));
+      if (!needRows.length) continue;
+      const needCols = cols.filter(j => needRows.some(i => missing(i, j)));
+      tiles.push({ rows: needRows, cols: needCols });
+    }
+  }
+  return tiles;
+}
+
+async function runWithConcurrency(jobs, limit, worker) {
+  let next = 0;
+  const lanes = Array.from({ length: Math.min(limit, jobs.length) }, async () => {
+    while (next < jobs.length) await worker(jobs[next++]);
+  });
+  await Promise.all(lanes);
+}
+
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+// Retry rate-limited tiles with jittered exponential backoff.
+async function fetchDistanceMatrixTile(origins, destinations, departure) {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await fetchDistanceMatrixBlock(origins, destinations, departure);
+    } catch (e) {
+      if (!e.retryable || attempt >= DM_MAX_RETRIES) throw e;
+      await sleep(Math.min(8000, 500 * 2 ** attempt) * (0.5 + Math.random()));
+    }
+  }
+}
+
+function fetchDistanceMatrixBlock(origins, destinations, departure) {
   return new Promise((resolve, reject) => {
     if (!google.maps || !google.maps.DistanceMatrixService) {
       reject(new Error('DistanceMatrixService unavailable'));
       return;
     }
     const svc = new google.maps.DistanceMatrixService();
-    const origins = points.map(p => new google.maps.LatLng(p.lat, p.lng));
-    const destinations = origins;
     svc.getDistanceMatrix({
-      origins,
-      destinations,
+      origins: origins.map(p => new google.maps.LatLng(p.lat, p.lng)),
+      destinations: destinations.map(p => new google.maps.LatLng(p.lat, p.lng)),
       travelMode: google.maps.TravelMode.DRIVING,
-      drivingOptions: { departureTime: new Date() },
+      drivingOptions: { departureTime: new Date(departure || Date.now()) },
     }, (res, status) => {
       if (status !== 'OK' || !res || !res.rows) {
-        reject(new Error('Bad DistanceMatrix response'));
+        const err = new Error(`Bad DistanceMatrix response: ${status}`);
+        err.retryable = status === 'OVER_QUERY_LIMIT' || status === 'UNKNOWN_ERROR';
+        reject(err);
         return;
       }
-      const n = points.length;
-      const M = Array.from({length:n}, ()=>Array(n).fill(0));
-      for (let i=0;i<n;i++) {
-        const row = res.rows[i].elements;
-        for (let j=0;j<n;j++) {
-          const el = row[j];
-          M[i][j] = el && el.duration && el.duration.value ? el.duration.value : (i===j?0:Infinity);
-        }
-      }
-      resolve(M);
+      const B = origins.map((o, i) => destinations.map((d, j) => {
+        const el = res.rows[i] && res.rows[i].elements[j];
+        if (el && el.duration && el.duration.value) return el.duration.value;
+        return (o.lat === d.lat && o.lng === d.lng) ? 0 : Infinity;
+      }));
+      resolve(B);
     });
   });
 }
 
-function solveVRPGreedy(matrix, demands, capacity) {
-  const n = demands.length; // nodes (excluding depot)
-  const remaining = demands.slice();
-  const trips = [];
-
-  function anyRemaining() {
-    return remaining.some(x => x > 0);
+// Planner math. These functions run inside the planner Web Worker, which is
+// built from their source, so they must not touch anything outside their own
+// arguments. Matrices are flat row-major Float64Arrays with index 0 the depot.
+function vrpHaversineSeconds(lats, lngs) {
+  const n = lats.length, R = 6371000, rad = Math.PI / 180;
+  const M = new Float64Array(n * n);
+  for (let i=0;i<n;i++) {
+    const φ1 = lats[i] * rad, c1 = Math.cos(φ1);
+    for (let j=i+1;j<n;j++) {
+      const φ2 = lats[j] * rad;
+      const s1 = Math.sin((φ2 - φ1) / 2), s2 = Math.sin((lngs[j] - lngs[i]) * rad / 2);
+      const h = s1 * s1 + c1 * Math.cos(φ2) * s2 * s2;
+      const sec = 2 * R * Math.atan2(Math.sqrt(h), Math.sqrt(1 - h)) / 11.11; // ~40km/h
+      M[i * n + j] = sec;
+      M[j * n + i] = sec;
+    }
   }
+  return M;
+}
 
-  while (anyRemaining()) {
-    let capLeft = capacity;
-    let cur = 0; // start at depot
+// Nearest-neighbour trips. Stops with demand left sit in a swap-remove list,
+// so each step scans only live stops and "anything left?" is a counter.
+function vrpGreedyTrips(M, demands, capacity, emit) {
+  const n = demands.length, stride = n + 1;
+  const remaining = Float64Array.from(demands);
+  const live = new Int32Array(n), pos = new Int32Array(n), inTrip = new Int32Array(n).fill(-1);
+  let count = 0, t = 0;
+  for (let i=0;i<n;i++) if (remaining[i] > 0) { pos[i] = count; live[count++] = i; }
+  while (count > 0) {
+    let capLeft = capacity, cur = 0;
     const trip = [];
-
-    while (capLeft > 0 && anyRemaining()) {
-      let bestIdx = -1, bestTime = Infinity;
-      for (let i=0;i<n;i++) {
-        if (remaining[i] <= 0) continue;
-        const t = matrix[cur][i+1];
-        if (t < bestTime) { bestTime = t; bestIdx = i; }
+    while (capLeft > 0 && count > 0) {
+      const row = cur * stride + 1;
+      let best = -1, bestTime = Infinity;
+      for (let k=0;k<count;k++) {
+        const i = live[k], time = M[row + i];
+        if (time < bestTime || (time === bestTime && i < best)) { bestTime = time; best = i; }
       }
-      if (bestIdx === -1 || !isFinite(bestTime)) break;
-
-      const amt = Math.min(remaining[bestIdx], capLeft);
-      remaining[bestIdx] -= amt;
+      if (best === -1 || !isFinite(bestTime)) break;
+      const amt = Math.min(remaining[best], capLeft);
+      remaining[best] -= amt;
       capLeft -= amt;
-      if (!trip.includes(bestIdx)) trip.push(bestIdx);
-      cur = bestIdx + 1;
+      if (remaining[best] <= 0) {
+        const last = live[--count];
+        live[pos[best]] = last;
+        pos[last] = pos[best];
+      }
+      if (inTrip[best] !== t) { inTrip[best] = t; trip.push(best); }
+      cur = best + 1;
     }
-    trips.push(trip); // trip is list of node indices (0..n-1)
+    if (!trip.length) break; // only unreachable stops left
+    emit(trip, t++);
   }
-
-  return trips;
 }
 
-function splitTripsByCapacityInOrder(demands, capacity) {
-  const n = demands.length;
-  const remaining = demands.slice();
-  const trips = [];
-  let capLeft = capacity;
-  let trip = [];
-  for (let i = 0; i < n; i++) {
-    while (remaining[i] > 0) {
+function vrpTripsInOrder(demands, capacity, emit) {
+  let capLeft = capacity, trip = [], t = 0;
+  for (let i = 0; i < demands.length; i++) {
+    let remaining = demands[i];
+    while (remaining > 0) {
       if (capLeft === 0) {
-        if (trip.length) trips.push(trip);
+        if (trip.length) emit(trip, t++);
         trip = [];
         capLeft = capacity;
       }
-      const take = Math.min(remaining[i], capLeft);
-      remaining[i] -= take;
-      if (!trip.includes(i)) trip.push(i);
+      const take = Math.min(remaining, capLeft);
+      remaining -= take;
+      if (trip[trip.length - 1] !== i) trip.push(i);
       capLeft -= take;
     }
   }
-  if (trip.length) trips.push(trip);
-  return trips;
+  if (trip.length) emit(trip, t++);
 }
 
+// job: {id, kind: 'greedy'|'inOrder', demands, capacity, matrix?, lats?, lngs?}
+// Posts {id, trip, index} per closed trip, then {id, done} or {id, error}.
+function vrpPlannerJob(job, post) {
+  const emit = (trip, index) => post({ id: job.id, trip, index });
+  try {
+    if (job.kind === 'inOrder') {
+      vrpTripsInOrder(job.demands, job.capacity, emit);
+    } else {
+      const M = job.matrix || vrpHaversineSeconds(job.lats, job.lngs);
+      vrpGreedyTrips(M, job.demands, job.capacity, emit);
+    }
+    post({ id: job.id, done: true });
+  } catch (e) {
+    post({ id: job.id, error: String((e && e.message) || e) });
+  }
+}
+
+let plannerWorker = null,
+  plannerJobSeq = 0,
+  plannerJob = null;
+
+function getPlannerWorker() {
+  if (plannerWorker !== null) return plannerWorker;
+  try {
+    const source = [vrpHaversineSeconds, vrpGreedyTrips, vrpTripsInOrder, vrpPlannerJob].map(String).join('\n')
+      + '\nonmessage = (e) => vrpPlannerJob(e.data, (msg) => postMessage(msg));\n';
+    plannerWorker = new Worker(URL.createObjectURL(new Blob([source], { type: 'text/javascript' })));
+    plannerWorker.onmessage = (e) => onPlannerMessage(e.data);
+    plannerWorker.onerror = (e) => {
+      console.warn('Planner worker failed', e);
+      plannerWorker = null;
+      if (plannerJob) plannerJob.settle(null);
+    };
+  } catch (e) {
+    console.warn('Web Workers unavailable; planning on the page thread.', e);
+    plannerWorker = false;
+  }
+  return plannerWorker;
+}
+
+// Run a planner job off the page thread. Resolves with the trips (arrays of
+// pickup indices), or null when it fails or a newer job replaces it;
+// onTrip(trip, index) sees each trip as soon as it is closed.
+function runPlanner(job, onTrip) {
+  cancelPlanner();
+  return new Promise((resolve) => {
+    const id = ++plannerJobSeq;
+    plannerJob = {
+      id, onTrip, trips: [],
+      settle: (value) => { if (plannerJob && plannerJob.id === id) plannerJob = null; resolve(value); },
+    };
+    const worker = getPlannerWorker();
+    if (worker) {
+      worker.postMessage({ ...job, id }, job.matrix ? [job.matrix.buffer] : []);
+    } else {
+      vrpPlannerJob({ ...job, id }, onPlannerMessage);
+    }
+  });
+}
+
+function onPlannerMessage(msg) {
+  const job = plannerJob;
+  if (!job || !msg || msg.id !== job.id) return;
+  if (msg.trip) {
+    job.trips[msg.index] = msg.trip;
+    if (job.onTrip) job.onTrip(msg.trip, msg.index);
+  } else if (msg.done) {
+    job.settle(job.trips);
+  } else {
+    console.warn('Planner job failed', msg.error);
+    job.settle(null);
+  }
+}
+
+// Abandon the running job; terminating the worker stops its scan at once.
+function cancelPlanner() {
+  const job = plannerJob;
+  if (!job) return;
+  if (plannerWorker) {
+    plannerWorker.terminate();
+    plannerWorker = null;
+  }
+  job.settle(null);
+}
+
+function flattenMatrix(rows) {
+  const n = rows.length, M = new Float64Array(n * n);
+  for (let i=0;i<n;i++) {
+    for (let j=0;j<n;j++) {
+      const v = rows[i] ? rows[i][j] : null;
+      M[i * n + j] = typeof v === 'number' ? v : Infinity;
+    }
+  }
+  return M;
+}
+
+// Directions requests take at most 25 intermediate waypoints; longer trips
+// are routed as chained segments that share their end points.
+const DIR_MAX_WAYPOINTS = 25,
+  DIR_CONCURRENCY = 3,
+  DIR_MAX_RETRIES = 5;
+let vrpDrawGeneration = 0;
+
+// Run async jobs with at most `limit` in flight, in submission order.
+function createLimiter(limit) {
+  let active = 0;
+  const queue = [];
+  const pump = () => {
+    while (active < limit && queue.length) {
+      const { fn, resolve, reject } = queue.shift();
+      active++;
+      Promise.resolve().then(fn).then(resolve, reject).finally(() => { active--; pump(); });
+    }
+  };
+  return (fn) => new Promise((resolve, reject) => { queue.push({ fn, resolve, reject }); pump(); });
+}
+
+function directionsSegments(stops) {
+  const segments = [];
+  for (let a = 0; a < stops.length - 1; a += DIR_MAX_WAYPOINTS + 1) {
+    segments.push(stops.slice(a, a + DIR_MAX_WAYPOINTS + 2));
+  }
+  return segments;
+}
+
+async function routeWithBackoff(request) {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await directionsService.route(request);
+    } catch (e) {
+      const code = e && (e.code || e.status);
+      if ((code !== 'OVER_QUERY_LIMIT' && code !== 'UNKNOWN_ERROR') || attempt >= DIR_MAX_RETRIES) throw e;
+      await sleep(Math.min(8000, 500 * 2 ** attempt) * (0.5 + Math.random()));
+    }
+  }
+}
+
+// Depot -> stops -> depot in visiting order, titled for the marker layer.
+function tripStops(t, visitOrder, pickups, depotLL) {
+  const depot = { lat: depotLL.lat, lng: depotLL.lng, title: 'Depot', depot: true };
+  const stops = visitOrder.map((i, k) => ({
+    lat: pickups[i].lat, lng: pickups[i].lng, title: `Trip ${t + 1} · ${k + 1}. ${pickups[i].name || ''}`,
+  }));
+  return [depot, ...stops, { ...depot }];
+}
+
+function directionsTripInfo(t, color, idxs, pickups, results, optimized) {
+  const first = results[0].routes && results[0].routes[0];
+  const order = (optimized && first && first.waypoint_order) || idxs.map((_, i)=>i);
+  const legs = results.flatMap(r => (r.routes && r.routes[0] && r.routes[0].legs) || []);
+  let totalMeters = 0, totalSeconds = 0;
+  const items = [];
+  for (let k = 0; k < order.length; k++) {
+    const stopIdxInPickups = idxs[order[k]];
+    const stopName = pickups[stopIdxInPickups]?.name || `Stop ${k+1}`;
+    const leg = legs[k];
+    if (leg && leg.distance && leg.duration) {
+      items.push({ name: stopName, distanceText: leg.distance.text, durationText: leg.duration.text });
+      totalMeters += leg.distance.value || 0;
+      totalSeconds += leg.duration.value || 0;
+    }
+  }
+  const retLeg = legs[order.length];
+  let returnDistanceText = '', returnDurationText = '';
+  if (retLeg && retLeg.distance && retLeg.duration) {
+    totalMeters += retLeg.distance.value || 0;
+    totalSeconds += retLeg.duration.value || 0;
+    returnDistanceText = retLeg.distance.text;
+    returnDurationText = retLeg.duration.text;
+  }
+  return { trip: t + 1, color, items, totalMeters, totalSeconds, returnDistanceText, returnDurationText };
+}
+
+function straightLineTrip(t, color, idxs, pickups, depotLL) {
+  const visits = tripStops(t, idxs, pickups, depotLL);
+  const overlay = addRouteTrip(t, visits, color, visits.slice(0, -1), 5);
+  let prev = depotLL;
+  let totalMeters = 0, totalSeconds = 0;
+  const items = [];
+  for (let k = 0; k < idxs.length; k++) {
+    const p = pickups[idxs[k]];
+    const dM = dist(prev, {lat: p.lat, lng: p.lng});
+    const durS = dM / 11.11; // ~40km/h
+    items.push({ name: p.name || `Stop ${k+1}`, distanceText: `${(dM/1609.34).toFixed(1)} mi`, durationText: `${Math.round(durS/60)} min` });
+    totalMeters += dM;
+    totalSeconds += durS;
+    prev = {lat: p.lat, lng: p.lng};
+  }
+  const backM = dist(prev, depotLL);
+  const backS = backM / 11.11;
+  totalMeters += backM;
+  totalSeconds += backS;
+  return {
+    overlay,
+    info: {
+      trip: t + 1,
+      color,
+      items,
+      totalMeters,
+      totalSeconds,
+      returnDistanceText: `${(backM/1609.34).toFixed(1)} mi`,
+      returnDurationText: `${Math.round(backS/60)} min`,
+    },
+  };
+}
+
+// Route every trip concurrently (DIR_CONCURRENCY requests in flight) and draw
+// each one as soon as its directions arrive. A newer call supersedes this one:
+// its queued requests are skipped and late replies are dropped.
 async function drawTrips(trips, depotLL, pickups, optimizeWaypoints=true) {
   clearVRPRoutes();
+  const generation = ++vrpDrawGeneration;
+  const current = () => generation === vrpDrawGeneration;
+  const limit = createLimiter(DIR_CONCURRENCY);
 
   const colors = ['#4285F4', '#34A853', '#FBBC05', '#EA4335', '#A142F4', '#00ACC1'];
   const tripsInfo = [];
+  const show = (t, overlay, info) => {
+    vrpRenderers[t] = { overlay };
+    tripsInfo.push(info);
+    setVRPInfo(tripsInfo);
+  };
 
-  for (let t=0; t<trips.length; t++) {
-    const idxs = trips[t];
-    if (!idxs.length) continue;
-    const waypoints = idxs.map(i => ({ location: new google.maps.LatLng(pickups[i].lat, pickups[i].lng), stopover: true }));
+  await Promise.all(trips.map(async (idxs, t) => {
+    if (!idxs.length) return;
+    const color = colors[t % colors.length];
+    const stops = [depotLL, ...idxs.map(i => ({ lat: pickups[i].lat, lng: pickups[i].lng })), depotLL];
+    const segments = directionsSegments(stops);
+    // Waypoint optimisation only makes sense when the whole trip is one request.
+    const optimized = optimizeWaypoints && segments.length === 1;
+    let results;
     try {
-      const result = await directionsService.route({
-        origin: depotLL,
-        destination: depotLL,
-        waypoints,
-        optimizeWaypoints: optimizeWaypoints,
-        travelMode: google.maps.TravelMode.DRIVING,
-      });
-      const dr = new google.maps.DirectionsRenderer({
-        map,
-        suppressMarkers: false,
-        polylineOptions: { strokeWeight: 6, strokeColor: colors[t % colors.length] },
-        preserveViewport: true,
-      });
-      dr.setDirections(result);
-      vrpRenderers.push({ overlay: dr });
-
-      try {
-        const route = result.routes && result.routes[0];
-        if (route) {
-          const order = route.waypoint_order || idxs.map((_, i)=>i);
-          const legs = route.legs || [];
-          let totalMeters = 0, totalSeconds = 0;
-          const items = [];
-          for (let k = 0; k < order.length; k++) {
-            const stopIdxInPickups = idxs[order[k]];
-            const stopName = pickups[stopIdxInPickups]?.name || `Stop ${k+1}`;
-            const leg = legs[k];
-            if (leg && leg.distance && leg.duration) {
-              items.push({ name: stopName, distanceText: leg.distance.text, durationText: leg.duration.text });
-              totalMeters += leg.distance.value || 0;
-              totalSeconds += leg.duration.value || 0;
-            }
-          }
-          const retLeg = legs[order.length];
-          let returnDistanceText = '', returnDurationText = '';
-          if (retLeg && retLeg.distance && retLeg.duration) {
-            totalMeters += retLeg.distance.value || 0;
-            totalSeconds += retLeg.duration.value || 0;
-            returnDistanceText = retLeg.distance.text;
-            returnDurationText = retLeg.duration.text;
-          }
-          tripsInfo.push({
-            trip: t + 1,
-            color: colors[t % colors.length],
-            items,
-            totalMeters,
-            totalSeconds,
-            returnDistanceText,
-            returnDurationText,
-          });
-        }
-      } catch (_) {}
+      results = await Promise.all(segments.map(seg => limit(() => {
+        if (!current()) throw new Error('superseded');
+        return routeWithBackoff({
+          origin: seg[0],
+          destination: seg[seg.length - 1],
+          waypoints: seg.slice(1, -1).map(p => ({ location: new google.maps.LatLng(p.lat, p.lng), stopover: true })),
+          optimizeWaypoints: optimized,
+          travelMode: google.maps.TravelMode.DRIVING,
+        });
+      })));
     } catch (e) {
+      if (!current()) return;
       console.warn('Directions route failed for trip', t, e);
-      const path = [new google.maps.LatLng(depotLL.lat, depotLL.lng), ...idxs.map(i => new google.maps.LatLng(pickups[i].lat, pickups[i].lng)), new google.maps.LatLng(depotLL.lat, depotLL.lng)];
-      const pl = new google.maps.Polyline({ path, strokeColor: colors[t % colors.length], strokeOpacity: 1.0, strokeWeight: 5, map });
-      vrpRenderers.push({ overlay: pl });
-
-      try {
-        let prev = depotLL;
-        let totalMeters = 0, totalSeconds = 0;
-        const items = [];
-        for (let k = 0; k < idxs.length; k++) {
-          const p = pickups[idxs[k]];
-          const dM = dist(prev, {lat: p.lat, lng: p.lng});
-          const durS = dM / 11.11; // ~40km/h
-          items.push({ name: p.name || `Stop ${k+1}`, distanceText: `${(dM/1609.34).toFixed(1)} mi`, durationText: `${Math.round(durS/60)} min` });
-          totalMeters += dM;
-          totalSeconds += durS;
-          prev = {lat: p.lat, lng: p.lng};
+      const fallback = straightLineTrip(t, color, idxs, pickups, depotLL);
+      show(t, fallback.overlay, fallback.info);
+      return;
+    }
+    if (!current()) return;
+    // Full-resolution step geometry goes to the LOD layer instead of one
+    // DirectionsRenderer (with its own markers) per segment.
+    const path = [];
+    for (const result of results) {
+      const legs = (result.routes && result.routes[0] && result.routes[0].legs) || [];
+      for (const leg of legs) {
+        for (const step of leg.steps || []) {
+          for (const p of step.path || []) path.push({ lat: p.lat(), lng: p.lng() });
         }
-        const backM = dist(prev, depotLL);
-        const backS = backM / 11.11;
-        totalMeters += backM;
-        totalSeconds += backS;
-        tripsInfo.push({
-          trip: t + 1,
-          color: colors[t % colors.length],
-          items,
-          totalMeters,
-          totalSeconds,
-          returnDistanceText: `${(backM/1609.34).toFixed(1)} mi`,
-          returnDurationText: `${Math.round(backS/60)} min`,
-        });
-      } catch (_) {}
+      }
     }
-  }
-
-  setVRPInfo(tripsInfo);
+    const first = results[0].routes && results[0].routes[0];
+    const order = (optimized && first && first.waypoint_order) || idxs.map((_, i)=>i);
+    const visits = tripStops(t, order.map(k => idxs[k]), pickups, depotLL);
+    const overlay = addRouteTrip(t, path.length ? path : visits, color, visits.slice(0, -1), 6);
+    let info;
+    try {
+      info = directionsTripInfo(t, color, idxs, pickups, results, optimized);
+    } catch (_) {
+      info = { trip: t + 1, color, items: [], totalMeters: 0, totalSeconds: 0 };
+    }
+    show(t, overlay, info);
+  }));
 }
 
 window.init = init;
+initPyBridge();
 
 function isMiniViewport() {
   try {
@@ -941,7 +1510,7 @@ function startGeoWatch() {
   if (!navigator.geolocation || !navigator.geolocation.watchPosition) return;
   navigator.geolocation.watchPosition((pos) => {
     const { latitude, longitude } = pos.coords;
-    const hd = (pos.coords.heading != null && !isNaN(pos.coords.heading)) ? pos.coords.heading : 0;
+    const hd = (pos.coords.heading != null && !isNaN(pos.coords.heading)) ? pos.coords.heading : null;
     if (!origin) origin = { lat: latitude, lng: longitude };
     updateUser(latitude, longitude, hd, pos.coords.accuracy);
     if (!initialGeoCentered) {
@@ -964,7 +1533,7 @@ async function locateViaFallback() {
       const j = await res.json();
       if (j && j.latitude && j.longitude) {
         const lat = +j.latitude, lng = +j.longitude;
-        updateUser(lat, lng, 0, null);
+        updateUser(lat, lng, null, null);
         if (!initialGeoCentered) {
           try { map.panTo({lat, lng}); map.setZoom(14); } catch(_){}
           initialGeoCentered = true;
@@ -985,7 +1554,7 @@ async function locateViaFallback() {
         const j = await res.json();
         const lat = j?.location?.lat, lng = j?.location?.lng, acc = j?.accuracy;
         if (isFinite(lat) && isFinite(lng)) {
-          updateUser(lat, lng, 0, acc);
+          updateUser(lat, lng, null, acc);
           if (!initialGeoCentered) {
             try { map.panTo({lat, lng}); map.setZoom(14); } catch(_){}
             initialGeoCentered = true;
@@ -998,7 +1567,7 @@ async function locateViaFallback() {
 
   try {
     const c = map.getCenter();
-    updateUser(c.lat(), c.lng(), 0, null);
+    updateUser(c.lat(), c.lng(), null, null);
     if (!initialGeoCentered) {
       map.setZoom(12);
       initialGeoCentered = true;
@@ -1009,10 +1578,183 @@ async function locateViaFallback() {
 function clearVRPRoutes() {
   try {
     vrpRenderers.forEach(obj => obj && obj.overlay && obj.overlay.setMap && obj.overlay.setMap(null));
+    clearRouteLayer();
   } catch (_) {}
   vrpRenderers = [];
 }
 
+// Route geometry layer for planner trips. Each trip is one Polyline whose
+// path is swapped between Douglas–Peucker simplifications when the zoom
+// band changes; all stop markers are features of one shared Data layer.
+// Band i covers zooms [LOD_BANDS[i], LOD_BANDS[i+1]); the last band draws the
+// full path.
+const LOD_BANDS = [0, 8, 11, 14, 16],
+  LOD_PIXEL_TOLERANCE = 1.5;
+const routeLayer = { trips: new Map(), data: null, band: -1 };
+
+function lodBand(zoom) {
+  let band = 0;
+  while (band + 1 < LOD_BANDS.length && zoom >= LOD_BANDS[band + 1]) band++;
+  return band;
+}
+
+function ensureRouteLayer() {
+  if (routeLayer.data || !map) return;
+  routeLayer.data = new google.maps.Data({ map });
+  routeLayer.data.setStyle(f => ({
+    icon: {
+      path: google.maps.SymbolPath.CIRCLE, scale: f.getProperty('depot') ? 7 : 5,
+      fillColor: f.getProperty('color'), fillOpacity: 1, strokeColor: '#fff', strokeWeight: 2,
+    },
+    title: f.getProperty('title'),
+    zIndex: 10,
+  }));
+  routeLayer.band = lodBand(map.getZoom());
+  map.addListener('zoom_changed', () => {
+    const band = lodBand(map.getZoom());
+    if (band === routeLayer.band) return;
+    routeLayer.band = band;
+    routeLayer.trips.forEach(entry => entry.polyline.setPath(lodPath(entry, band)));
+  });
+}
+
+// Simplifications are built lazily, once per trip and band, with a tolerance
+// of LOD_PIXEL_TOLERANCE pixels at the band's most detailed zoom.
+function lodPath(entry, band) {
+  if (band >= LOD_BANDS.length - 1) return entry.path;
+  if (!entry.lod[band]) {
+    const lat = entry.path.length ? entry.path[0].lat : 0;
+    const metersPerPixel = 156543.03392 * Math.cos(toRad(lat)) / 2 ** (LOD_BANDS[band + 1] - 1);
+    entry.lod[band] = simplifyPath(entry.path, LOD_PIXEL_TOLERANCE * metersPerPixel);
+  }
+  return entry.lod[band];
+}
+
+// Douglas–Peucker on a local equirectangular projection, iterative so long
+// routes cannot overflow the stack.
+function simplifyPath(path, tolerance) {
+  const n = path.length;
+  if (n < 3) return path.slice();
+  const kx = 111320 * Math.cos(toRad(path[0].lat)), ky = 110540;
+  const xs = new Float64Array(n), ys = new Float64Array(n);
+  for (let i = 0; i < n; i++) { xs[i] = path[i].lng * kx; ys[i] = path[i].lat * ky; }
+  const keep = new Uint8Array(n);
+  keep[0] = keep[n - 1] = 1;
+  const stack = [0, n - 1], tol2 = tolerance * tolerance;
+  while (stack.length) {
+    const b = stack.pop(), a = stack.pop();
+    const dx = xs[b] - xs[a], dy = ys[b] - ys[a], len2 = dx * dx + dy * dy;
+    let worst = -1, worstD = tol2;
+    for (let i = a + 1; i < b; i++) {
+      let px = xs[i] - xs[a], py = ys[i] - ys[a];
+      if (len2 > 0) {
+        const u = Math.max(0, Math.min(1, (px * dx + py * dy) / len2));
+        px -= u * dx; py -= u * dy;
+      }
+      const d = px * px + py * py;
+      if (d > worstD) { worstD = d; worst = i; }
+    }
+    if (worst >= 0) {
+      keep[worst] = 1;
+      stack.push(a, worst, worst, b);
+    }
+  }
+  const out = [];
+  for (let i = 0; i < n; i++) if (keep[i]) out.push(path[i]);
+  return out;
+}
+
+// Draw trip `t` through the layer. path: [{lat, lng}] at full resolution;
+// stops: [{lat, lng, title, depot?}]. Returns a vrpRenderers overlay whose
+// setMap shows or hides the polyline and the trip's stop features together.
+function addRouteTrip(t, path, color, stops, weight = 5) {
+  ensureRouteLayer();
+  removeRouteTrip(t);
+  const entry = { path, lod: [], features: [] };
+  entry.polyline = new google.maps.Polyline({
+    path: lodPath(entry, routeLayer.band), strokeColor: color, strokeOpacity: 1.0, strokeWeight: weight, map,
+  });
+  for (const s of stops) {
+    entry.features.push(routeLayer.data.add(new google.maps.Data.Feature({
+      geometry: new google.maps.Data.Point(s),
+      properties: { trip: t, color: s.depot ? '#202124' : color, title: s.title || '', depot: !!s.depot },
+    })));
+  }
+  routeLayer.trips.set(t, entry);
+  return {
+    setMap: (m) => {
+      entry.polyline.setMap(m);
+      entry.features.forEach(f => routeLayer.data.overrideStyle(f, { visible: !!m }));
+    },
+  };
+}
+
+function removeRouteTrip(t) {
+  const entry = routeLayer.trips.get(t);
+  if (!entry) return;
+  entry.polyline.setMap(null);
+  entry.features.forEach(f => routeLayer.data.remove(f));
+  routeLayer.trips.delete(t);
+}
+
+function clearRouteLayer() {
+  Array.from(routeLayer.trips.keys()).forEach(removeRouteTrip);
+}
+
+// Trip geometry pushed from Python (vrp_cpp.draw_trips_on_maps_widget) as
+// chunks of encoded polylines. Chunks are queued and all pending overlays are
+// created in one animation frame; a newer batch replaces the current one.
+let tripOverlayBatch = 0,
+  tripOverlayQueue = [],
+  tripOverlayFrame = 0;
+
+function receiveTripOverlays(payload) {
+  let msg;
+  try { msg = typeof payload === 'string' ? JSON.parse(payload) : payload; } catch (_) { return; }
+  if (!msg || msg.batch < tripOverlayBatch) return;
+  if (msg.batch !== tripOverlayBatch) {
+    tripOverlayBatch = msg.batch;
+    tripOverlayQueue = [];
+    clearVRPRoutes();
+  }
+  tripOverlayQueue.push(...(msg.trips || []));
+  if (!tripOverlayFrame) tripOverlayFrame = requestAnimationFrame(flushTripOverlays);
+}
+
+function flushTripOverlays() {
+  tripOverlayFrame = 0;
+  const pending = tripOverlayQueue;
+  tripOverlayQueue = [];
+  if (!map) return;
+  for (const t of pending) {
+    const path = decodePolyline(t.path, t.points);
+    // Paths run depot -> stops -> depot; the interior points are the stops.
+    const stops = path.slice(1, -1).map((p, k) => ({ ...p, title: `Trip ${t.trip + 1} · stop ${k + 1}` }));
+    vrpRenderers[t.trip] = { overlay: addRouteTrip(t.trip, path, t.color, stops) };
+  }
+}
+
+// Google encoded polyline -> [{lat, lng}] (precision 1e-5).
+function decodePolyline(str, count = 0) {
+  const out = new Array(count);
+  let index = 0, lat = 0, lng = 0, n = 0;
+  while (index < str.length) {
+    for (let k = 0; k < 2; k++) {
+      let shift = 0, result = 0, b;
+      do {
+        b = str.charCodeAt(index++) - 63;
+        result |= (b & 0x1f) << shift;
+        shift += 5;
+      } while (b >= 0x20);
+      const delta = (result & 1) ? ~(result >> 1) : (result >> 1);
+      if (k === 0) lat += delta; else lng += delta;
+    }
+    out[n++] = { lat: lat * 1e-5, lng: lng * 1e-5 };
+  }
+  out.length = n;
+  return out;
+}
+
 function setVRPInfo(tripsInfo) {
   const panel = document.getElementById('vrpInfoPanel');
   if (!panel) return;
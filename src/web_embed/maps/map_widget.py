@@ -2,6 +2,9 @@ import os
 from typing import Tuple
 from PyQt5.QtCore import QUrl
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
+from ..app_assets import fill_page, inline_page
+from ..app_scheme import app_page_url
+from .bridge import MapsBridge, install_bridge
 
 VECTOR_MAP_ID = "8ffd5464ed7851a4af500474"
 
@@ -29,42 +32,22 @@ class MapsWidget(QWebEngineView):
                 print("No Google Maps API key found! This will cause the map to fail to load")
             else:
                 print(f"MapsWidget: API key loaded (length: {len(key)})")
-            here = os.path.dirname(__file__)
-            
-            html_path = os.path.join(here, "map.html")
-            css_path = os.path.join(here, "map.css")
-            js_path = os.path.join(here, "map.js")
-            
-            if not os.path.exists(html_path):
-                print(f"map.html not found at: {html_path}")
-                return
-            if not os.path.exists(css_path):
-                print(f"map.css not found at: {css_path}")
-                return
-            if not os.path.exists(js_path):
-                print(f"map.js not found at: {js_path}")
-                return
-                
-            try:
-                html = open(html_path, encoding="utf-8").read()
-                css  = open(css_path,  encoding="utf-8").read()
-                js   = open(js_path,   encoding="utf-8").read()
-            except UnicodeDecodeError:
-                print("Unicode decode error, trying with cp1252 encoding")
-                html = open(html_path, encoding="cp1252").read()
-                css  = open(css_path,  encoding="cp1252").read()
-                js   = open(js_path,   encoding="cp1252").read()
-            html = (
-                html
-                .replace("__API_KEY__", key)
-                .replace("__MAP_ID__",  VECTOR_MAP_ID)
-                .replace("__LAT__",     str(center[0]))
-                .replace("__LNG__",     str(center[1]))
-                .replace("/*INLINE_CSS*/", css)
-                .replace("//INLINE_JS",  js)
-            )
+            values = {"API_KEY": key, "MAP_ID": VECTOR_MAP_ID, "LAT": center[0], "LNG": center[1]}
             self.setPage(_GeoPage(self))
-            self.setHtml(html, QUrl("https://localhost/"))
+            self.bridge = MapsBridge(self)
+            self.channel = install_bridge(self.page(), self.bridge)
+            # map.html names its CSS and scripts as bundle assets (app_assets).
+            # Served over app://, they load from the prebuilt bundle; without
+            # the scheme they are inlined and go through setHtml as before.
+            url = None
+            try:
+                url = app_page_url(self.page().profile(), "maps/map.html", **values)
+            except Exception as e:
+                print(f"MapsWidget: app:// assets unavailable ({e}), inlining the page")
+            if url is not None:
+                self.setUrl(url)
+            else:
+                self.setHtml(fill_page(inline_page("maps/map.html"), values), QUrl("https://localhost/"))
         except Exception as e:
             print(f"Error initializing MapsWidget: {str(e)}")
             super().__init__(parent)
@@ -0,0 +1,173 @@
+// Shared "you are here" layer for the Google Maps page and the Leaflet mini map.
+//
+// One DOM element holds the arrow; it is never rebuilt. A fix only records a
+// target. A requestAnimationFrame loop glides position and heading from what
+// is on screen toward it and writes a single CSS transform per frame. The
+// loop stops when the marker arrives, so a parked car costs no frames. With
+// follow on, the camera moves only when the marker leaves a central deadband.
+//
+// Each map supplies an adapter: attach(el, onView), project(lat, lng) ->
+// {x, y} in the element's pane, containerPoint(lat, lng) -> {x, y} in the
+// viewport, size() -> {w, h}, pan(lat, lng) and heading() (map rotation).
+
+const POSITION_GLIDE_MAX_MS = 1200;  // longest glide between two fixes
+const POSITION_JUMP_M = 500;         // farther than this snaps instead of gliding
+const POSITION_MIN_MOVE_M = 2;       // movement that gives a heading when the fix has none
+const POSITION_DEADBAND = 0.25;      // margin (fraction of the view per side) that triggers a pan
+const POSITION_PAN_SETTLE_MS = 700;  // no new pan while the previous one settles
+
+function positionDistance(a, b) {
+  const r = Math.PI / 180,
+    dφ = (b.lat - a.lat) * r,
+    dλ = (b.lng - a.lng) * r,
+    h = Math.sin(dφ / 2) ** 2 + Math.cos(a.lat * r) * Math.cos(b.lat * r) * Math.sin(dλ / 2) ** 2;
+  return 2 * 6371000 * Math.atan2(Math.sqrt(h), Math.sqrt(1 - h));
+}
+
+function positionBearing(a, b) {
+  const r = Math.PI / 180,
+    φ1 = a.lat * r,
+    φ2 = b.lat * r,
+    y = Math.sin((b.lng - a.lng) * r) * Math.cos(φ2),
+    x = Math.cos(φ1) * Math.sin(φ2) - Math.sin(φ1) * Math.cos(φ2) * Math.cos((b.lng - a.lng) * r);
+  return ((Math.atan2(y, x) * 180) / Math.PI + 360) % 360;
+}
+
+function createPositionLayer(adapter, opts = {}) {
+  const size = opts.size || 32, color = opts.color || '#1a73e8';
+  const el = document.createElement('div');
+  el.className = 'position-marker';
+  el.style.cssText = `position:absolute;left:0;top:0;width:${size}px;height:${size}px;`
+    + `margin:${-size / 2}px 0 0 ${-size / 2}px;pointer-events:none;will-change:transform;`
+    + `z-index:${opts.zIndex || 650};display:none;`;
+  el.innerHTML = `<svg xmlns="http://www.w3.org/2000/svg" width="${size}" height="${size}" viewBox="-16 -16 32 32">`
+    + `<path d="M 0 -14 L 9 11 L 0 5 L -9 11 Z" fill="${color}" stroke="#ffffff" stroke-width="2" stroke-linejoin="round"/></svg>`;
+
+  let shown = null, from = null, target = null;
+  let start = 0, duration = 0, frame = 0, lastFix = 0;
+  let following = false, panAfter = 0;
+
+  function render() {
+    if (!shown) return;
+    const p = adapter.project(shown.lat, shown.lng);
+    if (!p) return;
+    el.style.display = '';
+    el.style.transform = `translate(${p.x}px,${p.y}px) rotate(${shown.heading - (adapter.heading() || 0)}deg)`;
+  }
+
+  function keepInView(now) {
+    if (!following || now < panAfter) return;
+    const c = adapter.containerPoint(shown.lat, shown.lng), s = adapter.size();
+    if (!c || !s.w || !s.h) return;
+    const mx = s.w * POSITION_DEADBAND, my = s.h * POSITION_DEADBAND;
+    if (c.x < mx || c.x > s.w - mx || c.y < my || c.y > s.h - my) {
+      panAfter = now + POSITION_PAN_SETTLE_MS;
+      adapter.pan(target.lat, target.lng);
+    }
+  }
+
+  function step(now) {
+    frame = 0;
+    const t = duration > 0 ? Math.min(1, (now - start) / duration) : 1;
+    // Shortest way round for the heading (350° -> 10° turns 20°, not 340°).
+    const turn = ((target.heading - from.heading + 540) % 360) - 180;
+    shown = {
+      lat: from.lat + (target.lat - from.lat) * t,
+      lng: from.lng + (target.lng - from.lng) * t,
+      heading: (from.heading + turn * t + 360) % 360,
+    };
+    render();
+    keepInView(now);
+    if (t < 1) frame = requestAnimationFrame(step);
+  }
+
+  function update(fix) {
+    const now = performance.now();
+    const next = { lat: +fix.lat, lng: +fix.lng, heading: target ? target.heading : 0 };
+    if (typeof fix.heading === 'number' && isFinite(fix.heading)) {
+      next.heading = fix.heading;
+    } else if (target && positionDistance(target, next) >= POSITION_MIN_MOVE_M) {
+      next.heading = positionBearing(target, next);
+    }
+    const jump = !shown || positionDistance(shown, next) > POSITION_JUMP_M;
+    from = jump ? next : shown;
+    target = next;
+    // Glide over about one fix interval so motion is continuous at walking and driving rates.
+    duration = jump ? 0 : Math.min(POSITION_GLIDE_MAX_MS, now - lastFix);
+    start = now;
+    lastFix = now;
+    if (!frame) frame = requestAnimationFrame(step);
+  }
+
+  function setFollow(on) {
+    const was = following;
+    following = !!on;
+    if (following && !was && target) {
+      panAfter = performance.now() + POSITION_PAN_SETTLE_MS;
+      adapter.pan(target.lat, target.lng);
+    }
+  }
+
+  adapter.attach(el, render);
+  return {
+    update,
+    setFollow,
+    following: () => following,
+    position: () => (target ? { lat: target.lat, lng: target.lng } : null),
+    render,
+  };
+}
+
+function googlePositionAdapter(map) {
+  let overlay = null;
+  return {
+    attach(el, onView) {
+      class PositionOverlay extends google.maps.OverlayView {
+        onAdd() { this.getPanes().floatPane.appendChild(el); }
+        draw() { onView(); }
+        onRemove() { el.remove(); }
+      }
+      overlay = new PositionOverlay();
+      overlay.setMap(map);
+    },
+    project(lat, lng) {
+      const proj = overlay && overlay.getProjection();
+      const p = proj && proj.fromLatLngToDivPixel(new google.maps.LatLng(lat, lng));
+      return p ? { x: p.x, y: p.y } : null;
+    },
+    containerPoint(lat, lng) {
+      const proj = overlay && overlay.getProjection();
+      const p = proj && proj.fromLatLngToContainerPixel(new google.maps.LatLng(lat, lng));
+      return p ? { x: p.x, y: p.y } : null;
+    },
+    size() {
+      const div = map.getDiv();
+      return { w: div.clientWidth, h: div.clientHeight };
+    },
+    pan(lat, lng) { map.panTo({ lat, lng }); },
+    heading() { return map.getHeading ? map.getHeading() || 0 : 0; },
+  };
+}
+
+function leafletPositionAdapter(map) {
+  return {
+    attach(el, onView) {
+      map.getPane('markerPane').appendChild(el);
+      map.on('zoom viewreset resize', onView);
+    },
+    project(lat, lng) {
+      const p = map.latLngToLayerPoint([lat, lng]);
+      return { x: p.x, y: p.y };
+    },
+    containerPoint(lat, lng) {
+      const p = map.latLngToContainerPoint([lat, lng]);
+      return { x: p.x, y: p.y };
+    },
+    size() {
+      const s = map.getSize();
+      return { w: s.x, h: s.y };
+    },
+    pan(lat, lng) { map.panTo([lat, lng], { animate: true, duration: 0.5 }); },
+    heading() { return 0; },
+  };
+}
@@ -0,0 +1,82 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import json
+
+from src.web_embed.app_assets import (
+    IMMUTABLE, REVALIDATE, AssetBundle, _strip_css, _strip_js, build_bundle, fill_page, inline_page, minify,
+    source_fingerprint,
+)
+
+
+def _tree(root):
+    os.makedirs(os.path.join(root, "vendor", "lib", "images"))
+    with open(os.path.join(root, "page.html"), "w") as f:
+        f.write('<link rel="stylesheet" href="{{asset:app.css}}">\n'
+                '<script>const KEY="__API_KEY__";</script>\n'
+                '<script src="{{asset:vendor/lib/lib.js}}"></script>\n'
+                '<script src="{{asset:app.js}}"></script>\n')
+    with open(os.path.join(root, "app.js"), "w") as f:
+        f.write("// comment\nfunction f(a) {\n  /* block\n     comment */\n  return a + 1;  // tail\n}\n")
+    with open(os.path.join(root, "app.css"), "w") as f:
+        f.write("/* c */\nbody {\n  margin: 0;\n}\ninput[type=\"text\"] , a { color: red; }\n")
+    with open(os.path.join(root, "vendor", "lib", "lib.js"), "w") as f:
+        f.write("/* @preserve lib */\n!function(){}();\n")
+    with open(os.path.join(root, "vendor", "lib", "images", "icon.png"), "wb") as f:
+        f.write(b"\x89PNG")
+
+
+def test_bundle_hashes_minifies_and_serves(tmp_path):
+    root, out = str(tmp_path / "src"), str(tmp_path / "bundle")
+    _tree(root)
+    kw = dict(root=root, pages=("page.html",), static_dirs=("vendor/lib/images",))
+    bundle = build_bundle(out, **kw)
+
+    js = bundle.files["app.js"]
+    assert js.startswith("app.") and js.endswith(".min.js")
+    assert bundle.files["vendor/lib/lib.js"].endswith(".js") and ".min." not in bundle.files["vendor/lib/lib.js"]
+    assert bundle.files["vendor/lib/images/icon.png"] == "vendor/lib/images/icon.png"
+
+    html = bundle.read("/page.html")[0].decode()
+    assert f'src="/{js}"' in html and "{{asset:" not in html
+    data, mime, cache = bundle.read(bundle.url("app.js"))
+    assert mime == "application/javascript" and cache == IMMUTABLE
+    assert b"comment" not in data and b"return a + 1" in data
+    assert bundle.read("/page.html")[2] == REVALIDATE
+    assert bundle.read(bundle.url("vendor/lib/lib.js"))[0] == b"/* @preserve lib */\n!function(){}();\n"
+    assert bundle.read("/vendor/lib/images/icon.png")[1] == "image/png"
+    assert bundle.read("/missing.js") is None
+
+    # Same sources, same names; an edit gets a new name and the old file goes.
+    assert build_bundle(out, **kw).files == bundle.files
+    with open(os.path.join(root, "app.js"), "a") as f:
+        f.write("f(2);\n")
+    rebuilt = build_bundle(out, **kw)
+    assert rebuilt.files["app.js"] != js
+    assert not os.path.exists(os.path.join(out, js))
+    with open(os.path.join(out, "manifest.json")) as f:
+        assert json.load(f)["fingerprint"] == source_fingerprint(**kw)
+
+
+def test_extra_roots_stay_inside(tmp_path):
+    root, out = str(tmp_path / "src"), str(tmp_path / "bundle")
+    _tree(root)
+    build_bundle(out, root=root, pages=("page.html",), static_dirs=())
+    fonts = tmp_path / "fonts"
+    fonts.mkdir()
+    (fonts / "A.ttf").write_bytes(b"font")
+    bundle = AssetBundle(out, roots={"Fonts": str(fonts)})
+    assert bundle.read("/Fonts/A.ttf") == (b"font", "font/ttf", "public, max-age=86400")
+    assert bundle.read("/Fonts/../src/app.js") is None
+    assert bundle.read("/Fonts/") is None
+
+
+def test_inline_page_and_minify_fallbacks(tmp_path):
+    root = str(tmp_path)
+    _tree(root)
+    html = fill_page(inline_page("page.html", root=root), {"API_KEY": "k123"})
+    assert 'const KEY="k123"' in html and "{{asset:" not in html
+    assert "<style>body{" in html and "/* c */" not in html and "!function(){}();" in html
+    # Strings and trailing comments are left alone.
+    assert _strip_css('input[type="text"] , a { color: red; }') == 'input[type="text"],a{color: red}\n'
+    assert _strip_js("s = 'a // b';\n/* x */ y();\n") == "s = 'a // b';\n/* x */ y();\n"
+    assert minify("vendor/x.js", "  keep  ") == "  keep  "
@@ -0,0 +1,13 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.places_cache import PlacesCache
+
+
+def test_places_entries_expire_by_max_age_and_persist(tmp_path):
+    path = str(tmp_path / "places.json")
+    cache = PlacesCache(path, max_entries=10)
+    cache.store([("d:abc", {"name": "Depot"}), ("ac:sta", [{"place_id": "x"}])], now=1000.0)
+    again = PlacesCache(path)
+    assert again.lookup(["d:abc", "q:none"], max_age=60, now=1030.0) == {"d:abc": {"t": 1000.0, "v": {"name": "Depot"}}}
+    assert again.lookup(["ac:sta"], max_age=60, now=1100.0) == {}
@@ -0,0 +1,33 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import random
+
+from src.polyline import encode_polyline, decode_polyline
+from src.vrp_cpp import trip_overlay_chunks
+
+
+def test_encode_matches_reference_and_round_trips():
+    pts = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    assert encode_polyline(pts) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    # Exact halves at 1e-5 round up like Math.round: 3850000.5 -> 3850001, -2.5 -> -2.
+    halves = [(38.500005, -120.200005), (0.000025, -0.000025), (-0.000015, 0.000015)]
+    assert encode_polyline(halves) == "ap~iF~ps|Uzo~iF{ps|UFG"
+    assert decode_polyline("ap~iF~ps|Uzo~iF{ps|UFG") == [[38.50001, -120.2], [3e-05, -2e-05], [-1e-05, 2e-05]]
+    rnd = random.Random(1)
+    pts = [(rnd.uniform(-80, 80), rnd.uniform(-179, 179)) for _ in range(200)]
+    for (a, b), (c, d) in zip(pts, decode_polyline(encode_polyline(pts))):
+        assert abs(a - c) < 1e-5 and abs(b - d) < 1e-5
+
+
+def test_overlay_chunks_split_large_plans():
+    depot = {"lat": 37.77, "lng": -122.41}
+    trips = [{"index": t, "items": [{"lat": 37.7 + 0.001 * k, "lng": -122.4 + 0.001 * t}
+                                    for k in range(100)]} for t in range(50)]
+    msgs = list(trip_overlay_chunks(trips, depot, chunk_points=1000, flush_seconds=60))
+    assert len({m["batch"] for m in msgs}) == 1
+    assert [m["seq"] for m in msgs] == list(range(len(msgs)))
+    assert [m["final"] for m in msgs] == [False] * (len(msgs) - 1) + [True]
+    sent = [t for m in msgs for t in m["trips"]]
+    assert [t["trip"] for t in sent] == list(range(50))
+    assert all(t["points"] == 102 for t in sent)
+    assert len(decode_polyline(sent[0]["path"])) == 102
@@ -0,0 +1,94 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import heapq
+import math
+import random
+
+from src.road_network import RoadNetwork, road_matrices
+from src.vrp_cpp import _encode_request
+from src.vrp_numpy import solve_vrp_with_numpy
+
+
+def _grid(k, seed=0):
+    rnd = random.Random(seed)
+    lats = [40.0 + i * 0.002 for i in range(k) for _ in range(k)]
+    lngs = [-74.0 + j * 0.002 for _ in range(k) for j in range(k)]
+    edges = []
+    for i in range(k):
+        for j in range(k):
+            for a, b in ((i, j + 1), (i + 1, j)):
+                if a >= k or b >= k:
+                    continue
+                m = 170.0 + rnd.random() * 40
+                s = m / rnd.choice([8.0, 13.0, 20.0])
+                edges.append((i * k + j, a * k + b, s, m))
+                if rnd.random() > 0.15:  # some one-way streets
+                    edges.append((a * k + b, i * k + j, s, m))
+    return lats, lngs, edges
+
+
+def _dijkstra(n, edges, src):
+    adj = [[] for _ in range(n)]
+    for u, v, s, _ in edges:
+        adj[u].append((v, s))
+    dist = [math.inf] * n
+    dist[src] = 0.0
+    heap = [(0.0, src)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, s in adj[u]:
+            if d + s < dist[v]:
+                dist[v] = d + s
+                heapq.heappush(heap, (d + s, v))
+    return dist
+
+
+def test_hierarchy_matches_dijkstra_and_survives_save(tmp_path):
+    lats, lngs, edges = _grid(15)
+    net = RoadNetwork.from_edges(lats, lngs, edges)
+    path = str(tmp_path / "grid.ch.npz")
+    net.save(path)
+    loaded = RoadNetwork.load(path)
+    nodes = random.Random(3).sample(range(len(lats)), 12)
+    for graph in (net, loaded):
+        seconds, _ = graph.node_matrix(nodes, nodes)
+        for a, s in enumerate(nodes):
+            expected = _dijkstra(len(lats), edges, s)
+            for b, t in enumerate(nodes):
+                assert math.isclose(seconds[a, b], expected[t], rel_tol=1e-9, abs_tol=1e-9)
+
+
+OSM = """<?xml version='1.0' encoding='UTF-8'?>
+<osm version="0.6">
+  <node id="1" lat="40.000" lon="-74.000"/>
+  <node id="2" lat="40.000" lon="-73.990"/>
+  <node id="3" lat="40.010" lon="-73.990"/>
+  <node id="4" lat="40.010" lon="-74.000"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="residential"/></way>
+  <way id="11"><nd ref="3"/><nd ref="4"/><tag k="highway" v="primary"/><tag k="oneway" v="yes"/></way>
+  <way id="12"><nd ref="4"/><nd ref="1"/><tag k="highway" v="footway"/></way>
+</osm>
+"""
+
+
+def test_osm_roads_feed_the_solvers(tmp_path):
+    path = tmp_path / "tiny.osm"
+    path.write_text(OSM)
+    net = RoadNetwork.from_osm(str(path))
+    assert len(net) == 4  # the footway contributes no nodes of its own
+    depot = {"lat": 40.0, "lng": -74.0}
+    pickups = [{"name": "far", "lat": 40.01, "lng": -74.0, "demand": 3}]
+    seconds, meters = road_matrices(depot, pickups, net)
+    # Out: the long way round (1-2-3-4). Back: no drivable road leaves 4, so
+    # the pair falls back to the straight line.
+    assert meters[0, 1] > 2500
+    assert math.isclose(meters[1, 0], 1111.9, rel_tol=1e-3)
+    assert seconds[0, 1] > seconds[1, 0]
+    res = solve_vrp_with_numpy(depot, pickups, 5, matrix=seconds, meters=meters)
+    trip = res["trips"][0]
+    assert trip["items"][0]["meters"] == round(meters[0, 1])
+    assert trip["totalSeconds"] == round(seconds[0, 1] + seconds[1, 0])
+    blob = _encode_request(depot, pickups, 5, True, seconds, meters)
+    assert sum(line.startswith("matrix: ") for line in blob.splitlines()) == 2
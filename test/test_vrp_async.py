@@ -0,0 +1,73 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import pytest
+
+import src.vrp_async as vrp_async
+from src.vrp_async import LatestSolveRunner, solve_vrp_async
+from src.vrp_bench import generate_instance
+
+
+def _instance(n=40, seed=4):
+    inst = generate_instance("clustered", n, seed=seed)
+    return inst["depot"], inst["pickups"], inst["capacity"]
+
+
+@pytest.fixture
+def slow_solve(monkeypatch):
+    """Replace solve_vrp with one that runs until should_stop, like a long local search."""
+    real = vrp_async.solve_vrp
+    started = threading.Event()
+
+    def solve(depot, pickups, capacity, should_stop=None, slow=False, **kwargs):
+        if slow:
+            started.set()
+            deadline = time.perf_counter() + 30.0
+            while not should_stop() and time.perf_counter() < deadline:
+                time.sleep(0.005)
+        return real(depot, pickups, capacity, should_stop=should_stop, **kwargs)
+
+    monkeypatch.setattr(vrp_async, "solve_vrp", solve)
+    return started
+
+
+def test_cancel_stops_a_running_solve(slow_solve):
+    depot, pickups, capacity = _instance()
+    handle = solve_vrp_async(depot, pickups, capacity, engine="numpy", slow=True)
+    assert slow_solve.wait(5.0)
+    start = time.perf_counter()
+    handle.cancel()
+    with pytest.raises(CancelledError):
+        handle.result(timeout=5.0)
+    assert time.perf_counter() - start < 1.0
+    assert handle.cancelled() and handle.done()
+
+
+def test_cancel_of_a_queued_solve_never_runs_it():
+    depot, pickups, capacity = _instance()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        gate = threading.Event()
+        executor.submit(gate.wait, 5.0)
+        handle = solve_vrp_async(depot, pickups, capacity, executor=executor, engine="numpy")
+        handle.cancel()
+        gate.set()
+        with pytest.raises(CancelledError):
+            handle.result(timeout=5.0)
+
+
+def test_latest_runner_drops_superseded_results(slow_solve):
+    depot, pickups, capacity = _instance()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        runner = LatestSolveRunner(executor)
+        old_id, old = runner.submit(depot, pickups, capacity, engine="numpy", slow=True)
+        assert slow_solve.wait(5.0)
+        new_id, new = runner.submit(depot, pickups[:10], capacity, engine="numpy")
+        assert new_id > old_id
+        assert not runner.is_current(old_id) and runner.is_current(new_id)
+        with pytest.raises(CancelledError):
+            old.result(timeout=5.0)
+        result = new.result(timeout=5.0)
+        assert sum(t["load"] for t in result["trips"]) == sum(p["demand"] for p in pickups[:10])
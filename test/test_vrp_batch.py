@@ -0,0 +1,66 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import multiprocessing
+import time
+
+import pytest
+
+import src.vrp_batch as vrp_batch
+from src.vrp_batch import solve_vrp_batch
+from src.vrp_bench import generate_instance
+
+
+def _instance(n, seed):
+    inst = generate_instance("uniform", n, seed=seed)
+    return {"depot": inst["depot"], "pickups": inst["pickups"], "capacity": inst["capacity"], "engine": "numpy"}
+
+
+def test_failed_instances_become_error_records():
+    good = _instance(20, 1)
+    bad = dict(_instance(20, 2), strategy="no-such-strategy")
+    recs = sorted(solve_vrp_batch([good, bad, good], workers=2), key=lambda r: r["index"])
+    assert [r["index"] for r in recs] == [0, 1, 2]
+    assert recs[0]["error"] is None and recs[0]["trips"] > 0 and recs[0]["totalSeconds"] > 0
+    assert recs[1]["result"] is None and recs[1]["error"].startswith("ValueError")
+    assert recs[1]["trips"] == 0
+    assert recs[2]["result"] == recs[0]["result"]
+
+
+def _gone(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return any(line.split()[1] == "Z" for line in f if line.startswith("State:"))
+    except FileNotFoundError:
+        return True
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork" or not os.path.isdir("/proc"),
+    reason="needs forked workers to inherit the slow solver, and /proc",
+)
+def test_deadline_reports_and_terminates_overrunning_solves(tmp_path, monkeypatch):
+    real = vrp_batch.solve_vrp
+
+    def solve(slow=False, **kwargs):
+        if slow:
+            (tmp_path / f"{os.getpid()}.pid").write_text("")
+            time.sleep(60)
+        return real(**kwargs)
+
+    monkeypatch.setattr(vrp_batch, "solve_vrp", solve)
+    fast = _instance(20, 1)
+    start = time.perf_counter()
+    recs = sorted(
+        solve_vrp_batch([fast, dict(fast, slow=True), dict(fast, slow=True)], workers=3, deadline=1.0),
+        key=lambda r: r["index"],
+    )
+    assert time.perf_counter() - start < 5.0
+    assert recs[0]["error"] is None
+    assert [r["error"] for r in recs[1:]] == ["deadline exceeded", "deadline exceeded"]
+
+    pids = [int(p.stem) for p in tmp_path.glob("*.pid")]
+    assert pids
+    limit = time.perf_counter() + 5.0
+    while not all(_gone(pid) for pid in pids) and time.perf_counter() < limit:
+        time.sleep(0.05)
+    assert all(_gone(pid) for pid in pids)
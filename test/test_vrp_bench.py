@@ -0,0 +1,27 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import csv
+
+from src.vrp_bench import generate_instance, run_benchmark, write_csv, compare_to_baseline
+
+
+def test_generators_are_seeded():
+    for layout in ("uniform", "clustered", "ring"):
+        a = generate_instance(layout, 100, seed=4)
+        assert a == generate_instance(layout, 100, seed=4)
+        assert a != generate_instance(layout, 100, seed=5)
+        assert len(a["pickups"]) == 100
+        assert all(p["demand"] >= 1 for p in a["pickups"])
+
+
+def test_run_benchmark_reports_and_writes_csv(tmp_path):
+    records = run_benchmark(sizes=[10, 50], layouts=["ring"], engines=["numpy"], repeat=2)
+    assert [r["n"] for r in records] == [10, 50]
+    for r in records:
+        assert r["error"] is None and r["trips"] > 0 and r["totalSeconds"] > 0
+        assert r["min"] <= r["p50"] <= r["p90"] <= r["p99"] <= r["max"]
+    assert compare_to_baseline(records, records) == []
+    path = tmp_path / "bench.csv"
+    write_csv(records, str(path))
+    rows = list(csv.DictReader(open(path)))
+    assert len(rows) == 2 and rows[0]["engine"] == "numpy"
@@ -0,0 +1,55 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import threading
+
+from src.persistent_lru import PersistentLRU
+from src.vrp_cache import TravelTimeCache
+
+
+def test_lru_evicts_least_recent_and_persists(tmp_path):
+    path = str(tmp_path / "lru.json")
+    lru = PersistentLRU(path, max_entries=2)
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    lru.flush()
+    again = PersistentLRU(path, max_entries=2)
+    assert again.get("b") is None
+    assert (again.get("a"), again.get("c")) == (1, 3)
+
+
+def test_concurrent_flushes_keep_the_newest_snapshot(tmp_path):
+    path = str(tmp_path / "lru.json")
+    lru = PersistentLRU(path)
+    started, release = threading.Event(), threading.Event()
+    write = lru._write
+
+    def slow_first_write(items):
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        write(items)
+
+    lru._write = slow_first_write
+    lru.put("a", 1)
+    first = threading.Thread(target=lru.flush)
+    first.start()
+    assert started.wait(5)
+    lru.put("b", 2)
+    second = threading.Thread(target=lru.flush)
+    second.start()
+    second.join(0.2)
+    release.set()
+    first.join()
+    second.join()
+    assert PersistentLRU(path).get("b") == 2
+
+
+def test_travel_times_are_quantised_and_bucketed(tmp_path):
+    cache = TravelTimeCache(str(tmp_path / "tt.json"), bucket_minutes=60)
+    a, b = {"lat": 40.75001, "lng": -73.98}, {"lat": 40.76, "lng": -73.99}
+    cache.store([(a, b, 120.0)], departure=0)
+    near_a = {"lat": 40.75003, "lng": -73.98002}
+    assert cache.lookup_matrix([near_a, b], departure=0) == [[0.0, 120.0], [None, 0.0]]
+    assert cache.lookup_matrix([a, b], departure=3 * 3600)[0][1] is None
@@ -0,0 +1,68 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.vrp_bench import generate_instance
+from src.vrp_cluster import merge_underfilled, solve_vrp_clustered, sweep_clusters
+from src.vrp_cpp import solve_vrp
+from src.vrp_numpy import build_matrices
+
+
+def test_sweep_partitions_by_capacity():
+    inst = generate_instance("clustered", 300, seed=1)
+    clusters = sweep_clusters(inst["depot"], inst["pickups"], inst["capacity"], trips_per_cluster=3)
+    assert sorted(i for c in clusters for i in c) == list(range(300))
+    limit = 3 * inst["capacity"]
+    for c in clusters:
+        assert len(c) == 1 or sum(inst["pickups"][i]["demand"] for i in c) <= limit
+
+
+def test_decomposed_solve_serves_all_demand():
+    inst = generate_instance("ring", 400, seed=2)
+    res = solve_vrp(**inst, engine="numpy", decompose=True, workers=2)
+    served = [0] * 400
+    for trip in res["trips"]:
+        assert trip["load"] <= inst["capacity"]
+        for it in trip["items"]:
+            served[it["index"]] += it["load"]
+    assert served == [p["demand"] for p in inst["pickups"]]
+
+
+def test_merge_underfilled_joins_partial_neighbours():
+    depot = {"lat": 0.0, "lng": 0.0}
+    pickups = [{"lat": 0.10, "lng": 0.0}, {"lat": 0.10, "lng": 0.01}, {"lat": -0.1, "lng": 0.0}]
+    _, D = build_matrices(depot, pickups)
+    trips, loads = merge_underfilled(D, [[0], [1], [2]], [[30], [30], [90]], 100)
+    assert sorted(map(sorted, trips)) == [[0, 1], [2]]
+
+
+def _served(res, n):
+    served = [0] * n
+    for trip in res["trips"]:
+        for it in trip["items"]:
+            served[it["index"]] += it["load"]
+    return served
+
+
+def test_stop_reaches_cluster_solves_and_skips_the_rest():
+    inst = generate_instance("ring", 400, seed=2)
+    calls = []
+
+    def should_stop():
+        calls.append(threading.current_thread())
+        return len(calls) > 3
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        res = solve_vrp_clustered(
+            inst["depot"], inst["pickups"], inst["capacity"], trips_per_cluster=2,
+            executor=executor, should_stop=should_stop, engine="numpy", improve=True, time_budget=5.0,
+        )
+    assert any(t is not threading.main_thread() for t in calls)  # polled inside cluster solves
+    assert _served(res, 400) == [p["demand"] for p in inst["pickups"]]
+
+
+def test_stop_before_start_still_covers_every_stop():
+    inst = generate_instance("clustered", 300, seed=3)
+    res = solve_vrp(**inst, engine="numpy", decompose=True, workers=2, should_stop=lambda: True)
+    assert _served(res, 300) == [p["demand"] for p in inst["pickups"]]
@@ -0,0 +1,94 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import random
+
+from src.vrp_incremental import solve_vrp_incremental
+
+
+def _served(plan):
+    served = [0] * len(plan.pickups)
+    for trip, load in zip(plan.trips, plan.loads):
+        assert sum(load) <= plan.capacity
+        for i, amt in zip(trip, load):
+            served[i] += amt
+    return served
+
+
+def test_edits_keep_untouched_trips():
+    rnd = random.Random(5)
+    depot = {"lat": 37.77, "lng": -122.41}
+    pickups = [{"id": i, "name": f"P{i}", "lat": 37.77 + rnd.uniform(-0.1, 0.1),
+                "lng": -122.41 + rnd.uniform(-0.1, 0.1), "demand": rnd.randint(1, 40)}
+               for i in range(120)]
+    plan = solve_vrp_incremental(depot, pickups, 100)
+
+    edited = [dict(p) for p in pickups if p["id"] != 3]
+    edited[10]["demand"] += 25
+    edited.append({"id": "new", "name": "New", "lat": 37.8, "lng": -122.4, "demand": 7})
+    plan2 = solve_vrp_incremental(depot, edited, 100, previous=plan)
+
+    assert _served(plan2) == [p["demand"] for p in edited]
+    assert plan2.changed_trips and len(plan2.changed_trips) < len(plan2.trips)
+    old = {tuple(pickups[i]["id"] for i in t) for t in plan.trips}
+    for t, trip in enumerate(plan2.trips):
+        if t not in plan2.changed_trips:
+            assert tuple(edited[i]["id"] for i in trip) in old
+    assert len(plan2.result()["trips"]) == len(plan2.trips)
+
+
+def test_capacity_cut_repairs_to_feasible():
+    depot = {"lat": 0.0, "lng": 0.0}
+    pickups = [{"name": f"S{i}", "lat": 0.01 * i, "lng": 0.0, "demand": 30} for i in range(1, 9)]
+    plan = solve_vrp_incremental(depot, pickups, 90)
+    plan2 = solve_vrp_incremental(depot, pickups, 60, previous=plan)
+    assert _served(plan2) == [30] * 8
+
+
+def test_moved_stop_with_same_id_is_reinserted():
+    rnd = random.Random(11)
+    depot = {"lat": 37.77, "lng": -122.41}
+    pickups = [{"id": i, "name": f"P{i}", "lat": 37.77 + rnd.uniform(-0.1, 0.1),
+                "lng": -122.41 + rnd.uniform(-0.1, 0.1), "demand": rnd.randint(1, 40)}
+               for i in range(60)]
+    plan = solve_vrp_incremental(depot, pickups, 100)
+    old_trip = next(t for t in plan.trips if 0 in t)
+
+    moved = [dict(p) for p in pickups]
+    moved[0]["lat"] += 1.0
+    plan2 = solve_vrp_incremental(depot, moved, 100, previous=plan)
+
+    assert _served(plan2) == [p["demand"] for p in moved]
+    new_t = next(t for t, trip in enumerate(plan2.trips) if 0 in trip)
+    assert new_t in plan2.changed_trips
+    rest = [i for i in old_trip if i != 0]
+    if rest:
+        old_t = next(t for t, trip in enumerate(plan2.trips) if rest[0] in trip)
+        assert old_t in plan2.changed_trips
+    # The stop is re-placed by cheapest insertion, not kept where it was.
+    D = plan2.seconds
+    route = [0] + [u + 1 for u in plan2.trips[new_t]] + [0]
+    k = route.index(1)
+    detour = D[route[k - 1]][1] + D[1][route[k + 1]] - D[route[k - 1]][route[k + 1]]
+    for trip, load in zip(plan2.trips, plan2.loads):
+        if 0 in trip or sum(load) + moved[0]["demand"] > 100:
+            continue
+        r = [0] + [u + 1 for u in trip] + [0]
+        best = min(D[a][1] + D[1][b] - D[a][b] for a, b in zip(r, r[1:]))
+        assert detour <= best + 1e-6
+
+
+def test_dropping_a_trip_reports_the_shifted_trips():
+    rnd = random.Random(7)
+    depot = {"lat": 37.77, "lng": -122.41}
+    pickups = [{"id": i, "name": f"P{i}", "lat": 37.77 + rnd.uniform(-0.1, 0.1),
+                "lng": -122.41 + rnd.uniform(-0.1, 0.1), "demand": rnd.randint(1, 40)}
+               for i in range(60)]
+    plan = solve_vrp_incremental(depot, pickups, 100)
+    assert len(plan.trips) > 3
+    gone = {pickups[i]["id"] for i in plan.trips[0]}
+    edited = [p for p in pickups if p["id"] not in gone]
+    plan2 = solve_vrp_incremental(depot, edited, 100, previous=plan)
+
+    assert _served(plan2) == [p["demand"] for p in edited]
+    assert len(plan2.trips) == len(plan.trips) - 1
+    assert plan2.changed_trips == set(range(len(plan2.trips)))
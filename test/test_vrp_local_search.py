@@ -0,0 +1,41 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import random
+
+from src.vrp_numpy import build_matrices, greedy_trips
+from src.vrp_local_search import improve_trips
+
+
+def _plan_cost(M, trips):
+    total = 0.0
+    for trip in trips:
+        route = [0] + [i + 1 for i in trip] + [0]
+        total += sum(M[route[k], route[k + 1]] for k in range(len(route) - 1))
+    return total
+
+
+def test_improvement_keeps_capacity_and_demand():
+    rnd = random.Random(3)
+    depot = {"lat": 40.75, "lng": -73.98}
+    pickups = [{"lat": 40.75 + rnd.uniform(-0.05, 0.05), "lng": -73.98 + rnd.uniform(-0.05, 0.05),
+                "demand": rnd.randint(1, 40)} for _ in range(80)]
+    _, M = build_matrices(depot, pickups)
+    demands = [p["demand"] for p in pickups]
+    trips, loads = greedy_trips(M, demands, 120)
+    seen = []
+    new_trips, new_loads = improve_trips(M, trips, loads, 120, time_budget=2.0,
+                                         progress=lambda t, l, c: seen.append(c))
+    served = [0] * len(pickups)
+    for trip, load in zip(new_trips, new_loads):
+        assert sum(load) <= 120
+        for i, amt in zip(trip, load):
+            served[i] += amt
+    assert served == demands
+    assert _plan_cost(M, new_trips) <= _plan_cost(M, trips)
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_zero_budget_returns_input_plan():
+    _, M = build_matrices({"lat": 0.0, "lng": 0.0}, [{"lat": 0.01, "lng": 0.0}, {"lat": 0.0, "lng": 0.01}])
+    trips, loads = [[0, 1]], [[1, 1]]
+    assert improve_trips(M, trips, loads, 10, time_budget=0) == (trips, loads)
@@ -0,0 +1,46 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import numpy as np
+import pytest
+
+from src.vrp_bench import generate_instance
+from src.vrp_cpp import solve_vrp
+from src.vrp_matrix_store import MatrixStore
+from src.vrp_numpy import build_matrices
+
+
+def test_matrix_set_round_trip_and_solve(tmp_path):
+    inst = generate_instance("clustered", 80, seed=9)
+    depot, pickups, capacity = inst["depot"], inst["pickups"], inst["capacity"]
+    locations = [dict(depot, id="depot")] + [dict(p, id=f"c{i}") for i, p in enumerate(pickups)]
+    meters, seconds = build_matrices(depot, pickups)
+    seconds = seconds * np.random.default_rng(0).uniform(1.0, 1.3, seconds.shape)  # asymmetric
+    MatrixStore.create("daily", locations, seconds, meters, directory=str(tmp_path), block_rows=16)
+    store = MatrixStore.open("daily", directory=str(tmp_path))
+    assert isinstance(store.seconds, np.memmap) and store.seconds.dtype == np.float32
+
+    # Today: a shuffled subset, matched by id or by coordinates.
+    today = [pickups[i] for i in (40, 3, 77, 12, 5, 60)]
+    today[1] = dict(today[1], id="c3", lat=today[1]["lat"] + 0.001)  # moved pin, same customer
+    sub_s, sub_m = store.submatrix([depot] + today)
+    rows = [0, 41, 4, 78, 13, 6, 61]
+    assert np.allclose(sub_s, seconds[np.ix_(rows, rows)], rtol=1e-6)
+    assert np.allclose(sub_m, meters[np.ix_(rows, rows)], rtol=1e-6)
+    legs = store.legs([depot] + today)
+    assert np.isclose(legs[2, 5], seconds[4, 6], rtol=1e-6)
+
+    res = solve_vrp(depot, today, capacity, engine="numpy", matrix_store=store)
+    ref = solve_vrp(depot, today, capacity, engine="numpy", matrix=sub_s, meters=sub_m)
+    assert res.pop("matrixSource") == "store"
+    assert res == ref
+
+    stranger = {"name": "new", "lat": depot["lat"] + 0.5, "lng": depot["lng"], "demand": 1}
+    looked = store.lookup_matrix([depot, today[0], stranger])
+    assert looked[0][1] == pytest.approx(seconds[0, 41], abs=0.05)
+    assert looked[0][2] is None and looked[2][2] == 0.0
+    with pytest.raises(ValueError):
+        store.submatrix([depot, stranger])
+    with pytest.warns(RuntimeWarning, match="not in matrix set"):
+        fallback = solve_vrp(depot, today + [stranger], capacity, engine="numpy", matrix_store=store)
+    assert fallback.pop("matrixSource") == "haversine"
+    assert fallback == solve_vrp(depot, today + [stranger], capacity, engine="numpy")
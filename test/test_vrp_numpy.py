@@ -0,0 +1,62 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import random
+
+from src.vrp_numpy import greedy_trips, split_trips_in_order, build_matrices, solve_vrp_with_numpy
+from src.vrp_cpp import solve_vrp, iter_vrp_trips
+
+
+def _instance(n, seed=7):
+    rnd = random.Random(seed)
+    depot = {"lat": 37.77, "lng": -122.41}
+    pickups = [
+        {"name": f"P{i}", "lat": 37.77 + rnd.uniform(-0.1, 0.1),
+         "lng": -122.41 + rnd.uniform(-0.1, 0.1), "demand": rnd.randint(1, 70)}
+        for i in range(n)
+    ]
+    return depot, pickups
+
+
+def test_greedy_serves_all_demand_within_capacity():
+    depot, pickups = _instance(60)
+    _, seconds = build_matrices(depot, pickups)
+    demands = [p["demand"] for p in pickups]
+    trips, loads = greedy_trips(seconds, demands, 100)
+    served = [0] * len(pickups)
+    for trip, load in zip(trips, loads):
+        assert sum(load) <= 100
+        for i, amt in zip(trip, load):
+            served[i] += amt
+    assert served == demands
+
+
+def test_manual_order_keeps_input_order():
+    trips, loads = split_trips_in_order([60, 80, 10], 100)
+    assert trips == [[0, 1], [1, 2]]
+    assert loads == [[60, 40], [40, 10]]
+
+
+def test_result_shape_matches_cpp_contract():
+    depot, pickups = _instance(5)
+    res = solve_vrp_with_numpy(depot, pickups, 100)
+    trip = res["trips"][0]
+    assert set(trip) == {"index", "items", "load", "totalMeters", "totalSeconds", "returnMeters",
+                         "returnSeconds", "returnDistanceText", "returnDurationText"}
+    assert set(trip["items"][0]) == {"index", "name", "lat", "lng", "load", "cumulativeLoad",
+                                     "meters", "seconds", "distanceText", "durationText"}
+    item = trip["items"][0]
+    assert (item["lat"], item["lng"]) == (round(pickups[item["index"]]["lat"], 6),
+                                          round(pickups[item["index"]]["lng"], 6))
+    assert trip["items"][-1]["cumulativeLoad"] == trip["load"] <= 100
+
+
+def test_solve_vrp_numpy_engine():
+    depot, pickups = _instance(20)
+    assert solve_vrp(depot, pickups, 100, engine="numpy") == solve_vrp_with_numpy(depot, pickups, 100)
+
+
+def test_streamed_trips_match_full_result():
+    depot, pickups = _instance(40)
+    for optimize in (True, False):
+        streamed = list(iter_vrp_trips(depot, pickups, 100, optimize=optimize, engine="numpy"))
+        assert streamed == solve_vrp_with_numpy(depot, pickups, 100, optimize=optimize)["trips"]
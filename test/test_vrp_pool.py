@@ -0,0 +1,96 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import shutil
+import subprocess
+
+import pytest
+
+from src.vrp_bench import generate_instance
+from src.vrp_cpp import _find_solver
+from src.vrp_pool import SolverPool
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "cpp_backend", "vrp_solver.cpp")
+
+
+@pytest.fixture(scope="module")
+def solver(tmp_path_factory):
+    """A built vrp_solver: the configured one, or compiled here; skipped without a compiler."""
+    found = _find_solver()
+    if found:
+        return found
+    cxx = shutil.which("c++") or shutil.which("g++") or shutil.which("clang++")
+    if not cxx:
+        pytest.skip("vrp_solver is not built and no C++ compiler is available")
+    out = str(tmp_path_factory.mktemp("solver") / "vrp_solver")
+    if subprocess.run([cxx, "-O2", "-std=c++17", SOURCE, "-o", out], capture_output=True).returncode != 0:
+        pytest.skip("vrp_solver failed to build")
+    return out
+
+
+def _crash_once(tmp_path, solver):
+    """Solver wrapper whose first process reads one request and exits without answering."""
+    marker = tmp_path / "crashed"
+    script = tmp_path / "crashing_solver"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import os, sys\n"
+        f"marker, real = {str(marker)!r}, {solver!r}\n"
+        "if os.path.exists(marker):\n"
+        "    os.execv(real, [real] + sys.argv[1:])\n"
+        "open(marker, 'w').close()\n"
+        "for line in sys.stdin:\n"
+        "    if line.strip() == 'end':\n"
+        "        os._exit(1)\n"
+    )
+    script.chmod(0o755)
+    return str(script)
+
+
+def _instance(n, seed=3):
+    inst = generate_instance("uniform", n, seed=seed)
+    return inst["depot"], inst["pickups"], inst["capacity"]
+
+
+def test_crashed_worker_is_restarted_and_request_retried(tmp_path, solver):
+    depot, pickups, capacity = _instance(30)
+    with SolverPool(size=1, solver_path=solver) as ref_pool:
+        expected = ref_pool.solve(depot, pickups, capacity)
+    with SolverPool(size=1, solver_path=_crash_once(tmp_path, solver)) as pool:
+        assert pool.solve(depot, pickups, capacity) == expected
+        assert pool._workers[0].restarts == 1
+
+
+def test_timeout_kills_and_replaces_worker(solver):
+    with SolverPool(size=1, solver_path=solver) as pool:
+        worker = pool._workers[0]
+        old = worker.proc
+        with pytest.raises(TimeoutError):
+            pool.solve(*_instance(3000), timeout=0.001)
+        assert worker.restarts == 1 and worker.proc is not old and old.poll() is not None
+        depot, pickups, capacity = _instance(20)
+        assert pool.solve(depot, pickups, capacity)["trips"]
+
+
+def test_abandoned_stream_leaves_worker_usable(solver):
+    depot, pickups, capacity = _instance(200)
+    with SolverPool(size=1, solver_path=solver) as pool:
+        expected = pool.solve(depot, pickups, capacity)
+        assert len(expected["trips"]) > 2
+        stream = pool.iter_trips(depot, pickups, capacity)
+        next(stream)
+        stream.close()
+        assert pool._workers[0].restarts == 1
+        assert pool.solve(depot, pickups, capacity) == expected
+        assert len(list(pool.iter_trips(depot, pickups, capacity))) == len(expected["trips"])
+        assert pool._workers[0].restarts == 1
+
+
+def test_health_check_restarts_dead_workers(solver):
+    with SolverPool(size=2, solver_path=solver) as pool:
+        assert pool.health_check() == 0
+        victim = pool._workers[1]
+        victim.proc.kill()
+        victim.proc.wait()
+        assert pool.health_check() == 1
+        assert victim.restarts == 1 and victim.alive()
+        assert pool.health_check() == 0
@@ -0,0 +1,54 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import numpy as np
+import pytest
+
+from src.vrp_bench import generate_instance
+from src.vrp_cpp import solve_vrp
+from src.vrp_numpy import HaversineLegs, METERS_PER_SECOND, _demands, build_matrices, solve_vrp_with_numpy
+from src.vrp_savings import savings_trips
+
+
+def _visits(result):
+    served = {}
+    for trip in result["trips"]:
+        for it in trip["items"]:
+            served[it["index"]] = served.get(it["index"], 0) + it["load"]
+    return served
+
+
+def _cost(seconds, trips):
+    return sum(seconds[a, b] for t in trips for a, b in zip([0] + [u + 1 for u in t], [u + 1 for u in t] + [0]))
+
+
+def test_savings_merges_within_capacity_and_beats_round_trips():
+    inst = generate_instance("uniform", 150, seed=8, capacity=60)
+    depot, pickups, capacity = inst["depot"], inst["pickups"], inst["capacity"]
+    pickups[0]["demand"] = 2 * capacity + 5  # split into two full trucks plus a remainder
+    _, seconds = build_matrices(depot, pickups)
+    demands = _demands(pickups)
+    trips, loads = savings_trips(seconds, demands, capacity)
+    served = np.zeros(len(pickups), dtype=int)
+    for trip, load in zip(trips, loads):
+        assert sum(load) <= capacity
+        for u, a in zip(trip, load):
+            served[u] += a
+    assert (served == demands).all()
+    assert sum(t == [0] and l == [capacity] for t, l in zip(trips, loads)) == 2
+    # Lazy legs pick neighbours by chord length instead; the plan may differ
+    # slightly but costs about the same.
+    lazy, _ = savings_trips(HaversineLegs(depot, pickups, 1.0 / METERS_PER_SECOND), demands, capacity)
+    assert sorted(u for t in lazy for u in t) == sorted(u for t in trips for u in t)
+    assert np.isclose(_cost(seconds, lazy), _cost(seconds, trips), rtol=0.02)
+
+    greedy = solve_vrp(depot, pickups, capacity, engine="numpy")
+    res = solve_vrp(depot, pickups, capacity, strategy="savings")
+    assert _visits(res) == _visits(greedy)
+    total = sum(t["totalSeconds"] for t in res["trips"])
+    assert total < sum(t["totalSeconds"] for t in greedy["trips"])
+    round_trips = sum(seconds[0, u + 1] + seconds[u + 1, 0] for u in range(len(pickups)))
+    assert total < round_trips
+    spatial = solve_vrp_with_numpy(depot, pickups, capacity, strategy="savings", spatial=True)
+    assert _visits(spatial) == _visits(greedy)
+    with pytest.raises(ValueError):
+        solve_vrp(depot, pickups, capacity, engine="cpp", strategy="savings")
@@ -0,0 +1,49 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import itertools
+
+import numpy as np
+
+from src.vrp_bench import generate_instance
+from src.vrp_cpp import solve_vrp
+from src.vrp_sequence import held_karp, sequence_trips
+
+
+def _tour(C, order):
+    stops = [0] + list(order) + [0]
+    return sum(C[a, b] for a, b in zip(stops, stops[1:]))
+
+
+def test_held_karp_matches_brute_force_on_asymmetric_costs():
+    rng = np.random.default_rng(5)
+    for k in range(1, 8):
+        for _ in range(5):
+            C = rng.uniform(1.0, 100.0, (k + 1, k + 1))
+            np.fill_diagonal(C, 0.0)
+            order, cost = held_karp(C)
+            assert sorted(order) == list(range(1, k + 1))
+            assert np.isclose(_tour(C, order), cost)
+            best = min(_tour(C, p) for p in itertools.permutations(range(1, k + 1)))
+            assert np.isclose(cost, best)
+
+
+def test_sequencing_keeps_visits_and_never_lengthens_trips():
+    inst = generate_instance("clustered", 120, seed=4, capacity=200)
+    depot, pickups, capacity = inst["depot"], inst["pickups"], inst["capacity"]
+    plain = solve_vrp(depot, pickups, capacity, engine="numpy")
+    seq = solve_vrp(depot, pickups, capacity, engine="numpy", sequence=True)
+    assert len(seq["trips"]) == len(plain["trips"])
+    for a, b in zip(plain["trips"], seq["trips"]):
+        assert sorted((it["index"], it["load"]) for it in a["items"]) == sorted(
+            (it["index"], it["load"]) for it in b["items"]
+        )
+        assert b["totalSeconds"] <= a["totalSeconds"]
+    assert sum(t["totalSeconds"] for t in seq["trips"]) < sum(t["totalSeconds"] for t in plain["trips"])
+
+    # Above the exact limit the 2-opt/Or-opt fallback still never makes a trip worse.
+    rng = np.random.default_rng(1)
+    C = rng.uniform(1.0, 100.0, (31, 31))
+    trip = list(range(30))
+    (new,), (load,) = sequence_trips(C, [trip], [[1] * 30], max_exact=12)
+    assert sorted(new) == trip and load == [1] * 30
+    assert _tour(C, [u + 1 for u in new]) <= _tour(C, [u + 1 for u in trip])
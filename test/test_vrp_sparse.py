@@ -0,0 +1,42 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import numpy as np
+import pytest
+
+from src.vrp_bench import generate_instance
+from src.vrp_cpp import solve_vrp
+from src.vrp_numpy import build_matrices, iter_vrp_with_numpy
+from src.vrp_sparse import NeighborLegs
+
+
+def test_neighbor_legs_match_dense_matrix_and_spatial_neighbours():
+    inst = generate_instance("clustered", 200, seed=6)
+    depot, pickups = inst["depot"], inst["pickups"]
+    _, seconds = build_matrices(depot, pickups)
+    legs = NeighborLegs(depot, pickups, k=8)
+    assert legs.neighbors.shape == (201, 8) and legs.values.shape == (201, 8)
+    for a in (0, 1, 57, 200):
+        for b in (0, 3, 99, 200):  # stored or computed on demand, same value
+            assert np.isclose(legs[a, b], seconds[a, b]) and np.isclose(legs[a][b], seconds[a, b])
+    sub = seconds[1:, 1:] + np.diag(np.full(200, np.inf))
+    for u in (1, 100, 200):
+        expected = set(np.argsort(sub[u - 1], kind="stable")[:8] + 1)
+        assert set(legs.neighbors[u]) == expected
+
+
+def test_solvers_accept_neighbor_legs():
+    inst = generate_instance("uniform", 250, seed=2)
+    depot, pickups, capacity = inst["depot"], inst["pickups"], inst["capacity"]
+    legs = NeighborLegs(depot, pickups)
+    total = lambda res: sum(t["totalSeconds"] for t in res["trips"])
+    dense = solve_vrp(depot, pickups, capacity, engine="numpy")
+    sparse = solve_vrp(depot, pickups, capacity, matrix=legs)
+    assert total(sparse) == total(dense)
+    assert list(iter_vrp_with_numpy(depot, pickups, capacity, matrix=legs)) == sparse["trips"]
+    improved = solve_vrp(depot, pickups, capacity, matrix=legs, improve=True, time_budget=0.5)
+    assert total(improved) < total(sparse)
+    for kw in ({"strategy": "savings"}, {"sequence": True}, {"optimize": False}):
+        res = solve_vrp(depot, pickups, capacity, matrix=legs, **kw)
+        assert sum(len(t["items"]) for t in res["trips"]) >= len(pickups)
+    with pytest.raises(ValueError):
+        solve_vrp(depot, pickups, capacity, engine="cpp", matrix=legs)
@@ -0,0 +1,38 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+import math
+import random
+
+from src.vrp_bench import generate_instance
+from src.vrp_numpy import HaversineLegs, _demands, build_matrices, greedy_trips, solve_vrp_with_numpy
+from src.vrp_spatial import SpatialIndex, iter_greedy_trips_spatial
+
+
+def test_nearest_matches_brute_force_with_deletions():
+    rnd = random.Random(11)
+    lats = [40.7 + rnd.gauss(0, 0.05) for _ in range(400)]
+    lngs = [-74.0 + rnd.gauss(0, 0.05) for _ in range(400)]
+    pickups = [{"lat": a, "lng": b} for a, b in zip(lats, lngs)]
+    index = SpatialIndex(lats, lngs)
+    alive = set(range(400))
+    while alive:
+        q = (40.7 + rnd.uniform(-0.2, 0.2), -74.0 + rnd.uniform(-0.2, 0.2))
+        legs = HaversineLegs({"lat": q[0], "lng": q[1]}, pickups)
+        D = [legs[0, i + 1] for i in range(len(pickups))]
+        expected = min(alive, key=lambda i: (D[i], i))
+        assert math.isclose(D[index.nearest(*q)], D[expected], rel_tol=1e-12)
+        victim = rnd.choice(sorted(alive))
+        index.remove(victim)
+        alive.discard(victim)
+    assert index.nearest(40.7, -74.0) == -1
+
+
+def test_spatial_greedy_matches_dense_greedy():
+    for layout in ("uniform", "clustered", "ring"):
+        inst = generate_instance(layout, 600, seed=2)
+        demands = _demands(inst["pickups"])
+        _, seconds = build_matrices(inst["depot"], inst["pickups"])
+        dense = greedy_trips(seconds, demands, inst["capacity"])
+        spatial = list(iter_greedy_trips_spatial(inst["depot"], inst["pickups"], demands, inst["capacity"]))
+        assert dense == ([t for t, _ in spatial], [l for _, l in spatial])
+        assert solve_vrp_with_numpy(**inst, spatial=True) == solve_vrp_with_numpy(**inst, spatial=False)